@@ -0,0 +1,265 @@
+"""
+Benchmarks for the serial decoders.
+
+Generates valid, invalid and partial serials for every device family from
+schemas.json and times parse_serial, parse_serial_partial,
+get_missing_segments_hint and validate_year_week_sequence at several input
+sizes. Results are written as JSON so runs from different releases can be
+compared:
+
+    python benchmarks/bench_decoders.py -o bench.json
+    python benchmarks/bench_decoders.py --sizes 1 1000 --compare bench.json
+
+With --compare, any case that got slower than --threshold (default 20%)
+is reported and the exit code is 1.
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+from datetime import date, datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from smiley_identifier import (  # noqa: E402
+    SCHEMA_PATH,
+    compile_schemas,
+    get_missing_segments_hint,
+    load_schemas,
+    parse_serial,
+    parse_serial_partial,
+    validate_year_week_sequence,
+)
+from smiley_identifier.tables import WEEK_CODES, year_codes  # noqa: E402
+
+FAMILIES = ["Touch1000", "SmileyTouch", "SmileyTerminal", "SmileyMini"]
+KINDS = ["valid", "invalid", "partial"]
+DEFAULT_SIZES = [1, 1000, 1000000]
+ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+# --- Serial generator ---
+class SerialGenerator:
+    """Random serials for one device family, built from the compiled schema tables."""
+
+    def __init__(self, tables, family, seed=0):
+        self.rng = random.Random(seed)
+        self.tables = [t for t in tables.values() if t.family == family]
+        if not self.tables:
+            raise ValueError(f"No device types for family '{family}' in the schema")
+        self.years = sorted(year_codes(date.today().year))
+        self.weeks = sorted(WEEK_CODES)
+
+    @staticmethod
+    def _slots(table):
+        """Valid codes per (start, stop) slice; fields sharing a slice must all accept the code."""
+        slots = {}
+        for field in table.fields:
+            codes = set(field.codes)
+            slot = (field.start, field.stop)
+            slots[slot] = slots[slot] & codes if slot in slots else codes
+        return slots
+
+    def _compose(self, table, codes):
+        chars = [" "] * table.length
+        for (start, stop), code in codes.items():
+            chars[start:stop] = code
+        return "".join(chars)
+
+    def _valid_codes(self, table):
+        rng = self.rng
+        codes = {
+            (0, 2): rng.choice(self.years),
+            (2, 4): rng.choice(self.weeks),
+            (4, 5): table.type_code,
+            table.sequence: f"{rng.randint(1, 9999):04d}",
+        }
+        for slot, valid in self._slots(table).items():
+            codes[slot] = rng.choice(sorted(valid))
+        return codes
+
+    def valid(self):
+        table = self.rng.choice(self.tables)
+        return self._compose(table, self._valid_codes(table))
+
+    def invalid(self):
+        """
+        A valid serial with one code (year, week, device number or a lookup
+        field) corrupted. The type code is never touched, so the serial stays
+        in its family.
+        """
+        rng = self.rng
+        table = rng.choice(self.tables)
+        codes = self._valid_codes(table)
+        slots = self._slots(table)
+        slot = rng.choice([(0, 2), (2, 4), table.sequence] + list(slots))
+        width = slot[1] - slot[0]
+        accepted = slots.get(slot, set())
+        while True:
+            if slot == (0, 2):
+                bad = rng.choice(["99", "X1", "1O"])
+            elif slot == (2, 4):
+                bad = rng.choice(["00", "53", "W1"])
+            elif slot == table.sequence:
+                bad = rng.choice(["0000", "12O4", "ABCD"])
+            else:
+                bad = "".join(rng.choice(ALPHABET) for _ in range(width))
+                if slot[0] == 4:
+                    bad = table.type_code + bad[1:]  # the legacy cable code starts with the type code
+            if bad not in accepted:
+                break
+        codes[slot] = bad
+        return self._compose(table, codes)
+
+    def partial(self):
+        serial = self.valid()
+        return serial[: self.rng.randint(1, len(serial) - 1)]
+
+    def generate(self, kind, count):
+        make = getattr(self, kind)
+        return [make() for _ in range(count)]
+
+
+# --- Timing ---
+def _split(serial):
+    return serial[0:2], serial[2:4], serial[-4:]
+
+
+BENCHMARKS = {
+    "parse_serial": (lambda serials: serials, parse_serial),
+    "parse_serial_partial": (lambda serials: serials, parse_serial_partial),
+    "get_missing_segments_hint": (lambda serials: serials, get_missing_segments_hint),
+    "validate_year_week_sequence": (
+        lambda serials: [_split(s) for s in serials],
+        lambda parts: validate_year_week_sequence(parts[0], parts[1], parts[2], []),
+    ),
+}
+
+
+def time_calls(fn, inputs, min_time):
+    """
+    Best seconds per call over enough repeats to run for at least ``min_time``.
+    Small inputs are looped ``number`` times per repeat so timer overhead stays negligible.
+    """
+    number = max(1, 1000 // len(inputs))
+    best = float("inf")
+    elapsed = 0.0
+    repeats = 0
+    while repeats < 3 or elapsed < min_time:
+        started = time.perf_counter()
+        for _ in range(number):
+            for item in inputs:
+                fn(item)
+        seconds = time.perf_counter() - started
+        best = min(best, seconds)
+        elapsed += seconds
+        repeats += 1
+        if len(inputs) >= 100000:
+            break  # a single pass over a large input is long enough
+    return best / (number * len(inputs)), repeats
+
+
+def run(sizes, functions, families, kinds, min_time, seed):
+    tables = compile_schemas(load_schemas())
+    results = []
+    for family in families:
+        generator = SerialGenerator(tables, family, seed)
+        for kind in kinds:
+            for size in sizes:
+                serials = generator.generate(kind, size)
+                for name in functions:
+                    prepare, fn = BENCHMARKS[name]
+                    per_call, repeats = time_calls(fn, prepare(serials), min_time)
+                    results.append({
+                        "function": name,
+                        "family": family,
+                        "kind": kind,
+                        "size": size,
+                        "repeats": repeats,
+                        "ns_per_call": per_call * 1e9,
+                        "calls_per_sec": 1 / per_call if per_call else 0.0,
+                    })
+                    print(
+                        f"{name:28} {family:15} {kind:8} n={size:<8} {per_call * 1e9:10.0f} ns/call",
+                        file=sys.stderr,
+                    )
+    return results
+
+
+def _metadata():
+    with open(SCHEMA_PATH, "rb") as f:
+        schema_hash = hashlib.sha256(f.read()).hexdigest()
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, cwd=os.path.dirname(SCHEMA_PATH)
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "commit": commit,
+        "schema_sha256": schema_hash,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return the cases that are more than ``threshold`` (fraction) slower than ``baseline``."""
+    previous = {
+        (r["function"], r["family"], r["kind"], r["size"]): r["ns_per_call"] for r in baseline["results"]
+    }
+    regressions = []
+    for r in results:
+        before = previous.get((r["function"], r["family"], r["kind"], r["size"]))
+        if before and r["ns_per_call"] > before * (1 + threshold):
+            regressions.append({**r, "baseline_ns_per_call": before, "slowdown": r["ns_per_call"] / before})
+    return regressions
+
+
+def main(argv=None):
+    cli = argparse.ArgumentParser(description="Benchmark the Smiley serial decoders.")
+    cli.add_argument("-o", "--output", default="-", help="JSON output file (default: stdout)")
+    cli.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    cli.add_argument("--functions", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    cli.add_argument("--families", nargs="+", choices=FAMILIES, default=FAMILIES)
+    cli.add_argument("--kinds", nargs="+", choices=KINDS, default=KINDS)
+    cli.add_argument("--min-time", type=float, default=0.2, help="minimum seconds timed per case")
+    cli.add_argument("--seed", type=int, default=1234)
+    cli.add_argument("--compare", help="earlier JSON report to check for regressions")
+    cli.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before flagging (0.2 = 20%%)")
+    args = cli.parse_args(argv)
+
+    results = run(args.sizes, args.functions, args.families, args.kinds, args.min_time, args.seed)
+    report = {"meta": _metadata(), "results": results}
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare) as f:
+            report["regressions"] = compare(results, json.load(f), args.threshold)
+        for r in report["regressions"]:
+            print(
+                f"REGRESSION {r['function']} {r['family']} {r['kind']} n={r['size']}: "
+                f"{r['baseline_ns_per_call']:.0f} -> {r['ns_per_call']:.0f} ns/call ({r['slowdown']:.2f}x)",
+                file=sys.stderr,
+            )
+        exit_code = 1 if report["regressions"] else 0
+
+    text = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
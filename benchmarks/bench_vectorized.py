@@ -0,0 +1,64 @@
+"""
+Vectorized decoding against a parse_serial loop.
+
+Times ``vectorized.parse_serials`` and ``bulk.decode_chunk`` (a
+``parse_serial`` loop producing the same rows) on a column of serials from
+every device family, clean and with a share of invalid rows:
+
+    python benchmarks/bench_vectorized.py
+    python benchmarks/bench_vectorized.py --size 400000 --invalid 0 0.1 0.5
+"""
+import argparse
+import random
+import sys
+import time
+
+from bench_decoders import FAMILIES, SerialGenerator  # also puts the repository on sys.path
+
+from smiley_identifier import compile_schemas, load_schemas  # noqa: E402
+from smiley_identifier.bulk import decode_chunk  # noqa: E402
+
+
+def make_column(tables, size, invalid, seed):
+    """``size`` serials from all families, an ``invalid`` fraction of them corrupted."""
+    rng = random.Random(seed)
+    generators = [SerialGenerator(tables, family, seed + i) for i, family in enumerate(FAMILIES)]
+    return [rng.choice(generators).invalid() if rng.random() < invalid else rng.choice(generators).valid() for _ in range(size)]
+
+
+def best_of(fn, serials, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn(serials)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(argv=None):
+    cli = argparse.ArgumentParser(description="Benchmark vectorized decoding against a parse_serial loop.")
+    cli.add_argument("--size", type=int, default=100000, help="serials per column (default: 100000)")
+    cli.add_argument("--invalid", type=float, nargs="+", default=[0.0, 0.1], help="fractions of invalid rows")
+    cli.add_argument("--repeats", type=int, default=5)
+    cli.add_argument("--seed", type=int, default=1234)
+    args = cli.parse_args(argv)
+
+    try:
+        from smiley_identifier.vectorized import parse_serials
+    except ImportError:
+        raise SystemExit("Vectorized decoding requires pandas: pip install pandas")
+
+    tables = compile_schemas(load_schemas())
+    for invalid in args.invalid:
+        serials = make_column(tables, args.size, invalid, args.seed)
+        loop = best_of(lambda s: decode_chunk(s, tables), serials, args.repeats)
+        vectorized = best_of(lambda s: parse_serials(s, tables), serials, args.repeats)
+        print(
+            f"n={args.size} invalid={invalid:.0%}: parse_serial loop {loop:.3f}s, "
+            f"parse_serials {vectorized:.3f}s - {loop / vectorized:.1f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
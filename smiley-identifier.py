@@ -1,8 +1,32 @@
 import streamlit as st
-import json
+
+import io
+import os
+import tempfile
+import time
 
 from datetime import date
 
+from smiley_identifier import SCHEMA_PATH, get_missing_segments_hint
+from smiley_identifier.assets import LOGO_IMAGE, THUMBNAIL_URL, device_thumbnail
+from smiley_identifier.bulk import decode_file
+from smiley_identifier.cache import DecodeCache
+from smiley_identifier.errors import render_value
+from smiley_identifier.fleet import FleetIndex, build_index
+from smiley_identifier import metrics
+from smiley_identifier.incremental import IncrementalDecoder
+from smiley_identifier.registry import watch
+from smiley_identifier.result import decode_serials
+from smiley_identifier.scan import IMAGE_EXTENSIONS, read_label
+from smiley_identifier.store import ResultStore
+from smiley_identifier.suggest import suggest
+
+try:
+    # Optional component that reports the input on every keystroke
+    from st_keyup import st_keyup
+except ImportError:
+    st_keyup = None
+
 # --- Link to Sharepoiint pages ---
 touch_sharepoint_link= "https://happy365.sharepoint.com/:u:/r/sites/ProductDevelopmentTeam/SitePages/Smiley-Touch-Hardware.aspx?csf=1&web=1&share=EamzmUO3P2tOvMENzY-xWOcBcQ7Z0vuJ5C4Rvvi81PvJbQ&e=T53i8x"
 terminal_sharepoint_link = "https://happy365.sharepoint.com/:u:/s/MariachiEXT/EQO4nZM_cJVMveWeDyMb_NgB90s8ad5rS5zXezWIUlB7ZA?e=SkBniZ"
@@ -21,9 +45,13 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# --- Load schema ---
-with open("schemas.json") as f:
-    schemas = json.load(f)
+# Device photo column width in the wide layout (px); picks the thumbnail bucket
+DEVICE_IMAGE_WIDTH = 480
+# Base URL of the decode service's /assets route (long-lived cache headers),
+# e.g. http://localhost:8000/assets; default is Streamlit's static serving
+ASSET_URL = os.environ.get("SMILEY_ASSET_URL", "").rstrip("/") or None
+# SQLite file that memoizes bulk decode results (unset: no caching)
+RESULT_CACHE = os.environ.get("SMILEY_RESULT_CACHE") or None
 
 # --- Card template ---
 card_style = """
@@ -36,391 +64,105 @@ card_style = """
 
 
 
-# --- Year Week DeviceNumber Validation section ---
-def validate_year_week_sequence(year_raw, week_raw, sequence_raw, errors):
-    """
-    Enforce:
-      - year_raw, week_raw, sequence_raw are numeric
-      - year <= current year (assumes 20YY)
-      - week in [1, 52]
-      - sequence > 0
-    Returns tuple (year_display, week_display, sequence_display).
-    On error, returns error-marked strings and appends messages to errors.
-    """
+# --- Cached resources (shared across reruns and sessions) ---
+@st.cache_resource
+def get_schema_registry(path):
+    # Watches schemas.json and swaps in validated edits without a restart
+    return watch(path)
 
-    # Year
-    if year_raw.isdigit():
-        year_full = 2000 + int(year_raw)
-        current_year = date.today().year
-        if year_full > current_year:
-            year_display = f"❌ Invalid year '{year_raw}' (> current year)"
-            errors.append(f"Invalid year '{year_raw}' (> current year)")
-        else:
-            year_display = str(year_full)
-    else:
-        year_display = f"❌ Invalid year code '{year_raw}' (numbers only)"
-        errors.append(f"Invalid year code '{year_raw}' (numbers only)")
-
-    # Week
-    if week_raw.isdigit():
-        week_num = int(week_raw)
-        if 1 <= week_num <= 52:
-            week_display = week_raw
-        else:
-            week_display = f"❌ Invalid week '{week_raw}' (must be 1-52)"
-            errors.append(f"Invalid week '{week_raw}' (must be 1-52)")
-    else:
-        week_display = f"❌ Invalid week code '{week_raw}' (numbers only)"
-        errors.append(f"Invalid week code '{week_raw}' (numbers only)")
-
-    # Sequence (device number)
-    if sequence_raw.isdigit():
-        seq_num = int(sequence_raw)
-        if seq_num > 0:
-            sequence_display = sequence_raw  # keep zero-padded
-        else:
-            sequence_display = f"❌ Invalid device number '{sequence_raw}' (must be > 0)"
-            errors.append(f"Invalid device number '{sequence_raw}' (must be > 0)")
-    else:
-        sequence_display = f"❌ Invalid device number code '{sequence_raw}' (numbers only)"
-        errors.append(f"Invalid device number code '{sequence_raw}' (numbers only)")
 
-    return year_display, week_display, sequence_display
+@st.cache_resource
+def get_decode_cache():
+    return DecodeCache(maxsize=4096)
+
+
+@st.cache_resource
+def get_decode_metrics():
+    # One recorder per server process; SMILEY_METRICS=1 switches it on at startup
+    decode_metrics = metrics.DecodeMetrics()
+    if os.environ.get("SMILEY_METRICS", "").lower() in ("1", "true", "yes"):
+        metrics.enable(decode_metrics)
+    return decode_metrics
+
+
+@st.cache_resource
+def open_fleet_index(path):
+    return FleetIndex(path)
 
-# --- Helper function for safe lookups ---
-def safe_lookup(schema_section, key, field_name, device_type, errors):
-    """
-    Safely look up a key in the schema section.
-    Returns the mapped value if found, otherwise 'Unknown' and logs an error.
-    """
-    if key in schema_section:
-        return schema_section[key]
-    else:
-        errors.append(f"Invalid {field_name} code '{key}' for {device_type}")
-        return f"❌ Invalid {field_name} code '{key}' for {device_type}"
-
-# --- Compute which segments are missing (for toasts) ---
-def get_missing_segments_hint(serial: str) -> str:
-    n = len(serial)
-    missing = []
-
-    if n < 2:
-        missing.append("year (YY)")
-    if n < 4:
-        missing.append("week (WW)")
-
-    if n >= 5 and serial[4] == "A":
-        # Legacy 10-char
-        if n < 6:
-            missing.append("cable (AA/AB/AC)")
-        if n < 10:
-            missing.append("device number (XXXX)")
-    else:
-        # 14-char schema
-        if n < 5:
-            missing.append("device type (T/M/V/X/C)")
-        if n < 6:
-            missing.append("generation (G)")
-        if n < 7:
-            missing.append("radio/modem (R)")
-        if n < 8:
-            missing.append("hardware/model (H)")
-        if n < 10:
-            missing.append("changelog/cable (CL)")
-        if n < 14:
-            missing.append("device number (XXXX)")
-
-    if not missing:
-        return ""
-    return ", ".join(missing)
-
-# --- Progressive Serial Parser (partial-friendly) ---
-def parse_serial_partial(serial: str):
-    result = {}
-    errors = []
-    n = len(serial)
-
-    # Year
-    if n >= 2:
-        y_raw = serial[0:2]
-        y_display, _, _ = validate_year_week_sequence(y_raw, "00", "0001", [])
-        if y_display.startswith("❌"):
-            errors.append(y_display.replace("❌ ", ""))
-            result["year"] = y_display
-        else:
-            result["year"] = y_display
-
-    # Week
-    if n >= 4:
-        w_raw = serial[2:4]
-        _, w_display, _ = validate_year_week_sequence("00", w_raw, "0001", [])
-        if w_display.startswith("❌"):
-            errors.append(w_display.replace("❌ ", ""))
-            result["week"] = w_display
-        else:
-            result["week"] = w_display
-
-    # Decide schema path by type position if present
-    if n >= 5:
-        t = serial[4]
-        legacy_schema = schemas.get("Touch1000")
-
-        # Legacy path (10-char)
-        if t == "A":
-            if n >= 5:
-                result["device"] = (legacy_schema or {}).get("type", {}).get("A", "Smiley Touch - HONT1000")
-                result["schema_name"] = f"Legacy Schema: YYWWA{serial[5] if n>=6 else '•'}XXXX (used late 2017 - early 2019)"
-            if n >= 6:
-                cable_code = serial[4:6]
-                if legacy_schema:
-                    result["changelog"] = safe_lookup(legacy_schema["cables"], cable_code, "cable", "Touch1000", errors)
-            if legacy_schema:
-                result.setdefault("generation", legacy_schema.get("generation"))
-                result.setdefault("hardware", legacy_schema.get("hardware"))
-                result.setdefault("radio", "Refer to Sharepoint document")
-                result.setdefault("network", "Refer to Sharepoint document")
-            if n >= 10:
-                d_raw = serial[6:10]
-                # Validate sequence only
-                _, _, d_display = validate_year_week_sequence("00", "01", d_raw, [])
-                if d_display.startswith("❌"):
-                    errors.append(d_display.replace("❌ ", ""))
-                result["sequence"] = d_display
-
-            return result, errors
-
-        # 14-char path
-        device_type = t
-        if device_type in ["M", "V", "X", "T", "C"]:
-            # set schema display once device type is known
-            if device_type == "M":
-                result["device"] = schemas["SmileyMini"]["type"].get("M", "Smiley Mini")
-                result["schema_name"] = schemas["SmileyMini"]["format"]
-            elif device_type in ["V", "X"]:
-                result["device"] = schemas["SmileyTerminal"]["type"].get(device_type, "Smiley Terminal")
-                result["schema_name"] = schemas["SmileyTerminal"]["format"]
-            elif device_type in ["T", "C"]:
-                result["device"] = schemas["SmileyTouch"]["type"].get(device_type, "Smiley Touch")
-                result["schema_name"] = schemas["SmileyTouch"]["formats"][device_type]
-
-            # Generation (pos 5)
-            if n >= 6:
-                g = serial[5]
-                if device_type == "M":
-                    result["generation"] = safe_lookup(schemas["SmileyMini"]["generation"], g, "generation", result["device"], errors)
-                elif device_type in ["V", "X"]:
-                    result["generation"] = safe_lookup(schemas["SmileyTerminal"]["generation"], g, "generation", result["device"], errors)
-                else:
-                    result["generation"] = safe_lookup(schemas["SmileyTouch"]["generation"], g, "generation", result["device"], errors)
-
-            # Radio (pos 6) and any mapping to network
-            if n >= 7:
-                r = serial[6]
-                if device_type == "M":
-                    radio = safe_lookup(schemas["SmileyMini"]["radio"], r, "radio", result.get("device", ""), errors)
-                    result["radio"] = radio
-                    result["network"] = safe_lookup(schemas["SmileyMini"]["network"], r, "network", result.get("device", ""), errors)
-                elif device_type in ["V", "X"]:
-                    radio = safe_lookup(schemas["SmileyTerminal"]["radio"], r, "radio", result.get("device", ""), errors)
-                    result["radio"] = radio
-                    result["network"] = safe_lookup(schemas["SmileyTerminal"]["network"], r, "network", result.get("device", ""), errors)
-                else:  # Touch: network <- radio value
-                    result["network"] = safe_lookup(schemas["SmileyTouch"]["radio"], r, "radio", result.get("device", ""), errors)
-
-            # Hardware (pos 7) or model for Touch
-            if n >= 8:
-                h = serial[7]
-                if device_type == "M":
-                    result["hardware"] = safe_lookup(schemas["SmileyMini"]["hardware"], h, "hardware revision", result.get("device", ""), errors)
-                elif device_type in ["V", "X"]:
-                    result["hardware"] = safe_lookup(schemas["SmileyTerminal"]["hardware"], h, "hardware revision", result.get("device", ""), errors)
-                else:
-                    result["hardware"] = safe_lookup(schemas["SmileyTouch"]["model"], serial[5], "model", result.get("device", ""), errors)
-
-            # Changelog (pos 8-9)
-            if n >= 10:
-                cl = serial[8:10]
-                if device_type == "M":
-                    result["changelog"] = safe_lookup(schemas["SmileyMini"]["changelog"], cl, "hardware", result.get("device", ""), errors)
-                elif device_type in ["V", "X"]:
-                    result["changelog"] = safe_lookup(schemas["SmileyTerminal"]["changelog"], cl, "changelog", result.get("device", ""), errors)
-                else:
-                    result["changelog"] = safe_lookup(schemas["SmileyTouch"]["cables"], cl, "cable", result.get("device", ""), errors)
-
-            # Specifications for Touch (maps from G) after we have G
-            if device_type in ["T", "C"] and n >= 6:
-                result["radio"] = safe_lookup(schemas["SmileyTouch"]["specifications"], serial[5], "specifications", result.get("device", ""), errors)
-
-            # Device number (last 4)
-            if n >= 14:
-                d_raw = serial[-4:]
-                _, _, d_display = validate_year_week_sequence("00", "01", d_raw, [])
-                if d_display.startswith("❌"):
-                    errors.append(d_display.replace("❌ ", ""))
-                result["sequence"] = d_display
-
-            return result, errors
-
-    # If we got here with too short input, keep legacy error for backward-compat on very short strings
-    if n < 2:
-        errors.append("Serial number format not recognized")
-    return result, errors
-
-# --- Strict Serial Parser (kept for tests/backward-compat) ---
-def parse_serial(serial):
-    result = {}
-    errors = []
-
-    # --- LegacySchema Touch1000 (10-char serials) ---
-    if len(serial) == 10 and serial[4] in ["A"]:
-        schema = "Legacy Schema: YYWWA" + serial[5] + "XXXX (used late 2017 - early 2019)"
-        production_year = serial[:2]
-        production_week = serial[2:4]
-        legacy_code = serial[4:6]
-        device_number = serial[6:10]
-
-        production_year, production_week, device_number = validate_year_week_sequence(production_year, production_week, device_number, errors )
-
-        legacy_schema = schemas.get("Touch1000")
-        if legacy_schema and not legacy_schema["type"]["A"]:
-            errors.append(f"Unknown legacy type code '{legacy_code}'")
-
-        changelog_value = safe_lookup((legacy_schema or {})["cables"], legacy_code, "cable", "Touch1000", errors)
-
-        result.update({
-            "schema_name": schema,
-            "year": production_year,
-            "week": production_week,
-            "device": (legacy_schema or {})["type"]["A"],
-            "generation": (legacy_schema or {})["generation"],
-            "radio": "Refer to Sharepoint document",
-            "network": "Refer to Sharepoint document",
-            "hardware": (legacy_schema or {})["hardware"],
-            "sequence": device_number,
-            "changelog": changelog_value
-        })
-
-        return result, errors
-
-    # --- Smiley family (14-character serials) ---
-    if len(serial) == 14:
-        production_year = serial[:2]
-        production_week = serial[2:4]
-        device_type = serial[4]
-        generation = serial[5]
-        model = serial[5]
-        specs = serial[5]
-        radio = serial[6]
-        network = serial[6]
-        hardware_rev = serial[7]
-        changelog_value = serial[8:10]
-        device_number = serial[-4:]
-
-        # validate year/week/sequence
-        production_year, production_week, device_number = validate_year_week_sequence(production_year, production_week, device_number, errors)
-
-        # --- Smiley Mini ---
-        if device_type == "M":
-            schema = schemas["SmileyMini"]["format"]
-            device_type_name = schemas["SmileyMini"]["type"].get(device_type, "Unknown")
-            network = radio
-
-            generation = safe_lookup(schemas["SmileyMini"]["generation"], generation, "generation", device_type_name, errors)
-            radio = safe_lookup(schemas["SmileyMini"]["radio"], radio, "radio", device_type_name, errors)
-            hardware_rev = safe_lookup(schemas["SmileyMini"]["hardware"], hardware_rev, "hardware revision", device_type_name, errors)
-            network = safe_lookup(schemas["SmileyMini"]["network"], network, "network", device_type_name, errors)
-            changelog_value = safe_lookup(schemas["SmileyMini"]["changelog"], changelog_value, "hardware", device_type_name, errors)
-
-            result.update({
-                "schema_name": schema,
-                "year": production_year,
-                "week": production_week,
-                "sequence": device_number,
-                "device": device_type_name,
-                "generation": generation,
-                "radio": radio,
-                "hardware": hardware_rev,
-                "network": network,
-                "changelog": changelog_value
-            })
-
-        # --- Smiley Terminal / Wall ---
-        elif device_type in ["V", "X"]:
-            schema = schemas["SmileyTerminal"]["format"]
-            device_type_name = schemas["SmileyTerminal"]["type"].get(device_type, "Unknown")
-
-            generation = safe_lookup(schemas["SmileyTerminal"]["generation"], generation, "generation", device_type_name, errors)
-            radio = safe_lookup(schemas["SmileyTerminal"]["radio"], radio, "radio", device_type_name, errors)
-            hardware_rev = safe_lookup(schemas["SmileyTerminal"]["hardware"], hardware_rev, "hardware revision", device_type_name, errors)
-            network = safe_lookup(schemas["SmileyTerminal"]["network"], network, "network", device_type_name, errors)
-            changelog_value = safe_lookup(schemas["SmileyTerminal"]["changelog"], changelog_value, "changelog", device_type_name, errors)
-
-            result.update({
-                "schema_name": schema,
-                "year": production_year,
-                "week": production_week,
-                "sequence": device_number,
-                "device": device_type_name,
-                "generation": generation,
-                "radio": radio,
-                "hardware": hardware_rev,
-                "network": network,
-                "changelog": changelog_value
-            })
-
-        # --- Smiley Touch (Legacy + New merged) ---
-        elif device_type in ["T", "C"]:
-            schema_format =  schemas["SmileyTouch"]["formats"][device_type]
-            device_type_name = schemas["SmileyTouch"]["type"].get(device_type, "Unknown")
-
-            generation = safe_lookup(schemas["SmileyTouch"]["generation"], generation, "generation", device_type_name, errors)
-            radio = safe_lookup(schemas["SmileyTouch"]["radio"], radio, "radio", device_type_name, errors)
-            hardware_rev = safe_lookup(schemas["SmileyTouch"]["hardware"], hardware_rev, "hardware revision", device_type_name, errors)
-            changelog_value = safe_lookup(schemas["SmileyTouch"]["cables"], changelog_value, "cable", device_type_name, errors)
-            model = safe_lookup(schemas["SmileyTouch"]["model"], model, "model", device_type_name, errors)
-            specifications = safe_lookup(schemas["SmileyTouch"]["specifications"], specs, "specifications", device_type_name, errors)
-
-            result.update({
-                "year": production_year,
-                "week": production_week,
-                "sequence": device_number,
-                "schema_name": schema_format,
-                "device": device_type_name,
-                "generation": generation,
-                "network": radio,
-                "radio": specifications,
-                "hardware": model,
-                "changelog": changelog_value
-            })
-
-        return result, errors
-
-    errors.append("Serial number format not recognized")
-    return result, errors
+
+@st.cache_resource
+def open_result_store(path):
+    # Bulk results persist across uploads; dropped automatically when schemas.json changes
+    return ResultStore(path)
+
+
+@st.cache_data(max_entries=32)
+def scan_label(data, name):
+    # Keyed by the photo bytes, so reruns do not decode the same upload again
+    upload = io.BytesIO(data)
+    upload.name = name
+    return read_label(upload, suggest=False)
+
+
+schema_registry = get_schema_registry(SCHEMA_PATH)
+decode_tables = schema_registry.tables
+decode_cache = get_decode_cache()
+decode_metrics = get_decode_metrics()
 
 
 # --- Streamlit UI ---
-st.set_page_config(page_title="Smiley Identifier", page_icon="images/happyornot_logo.svg", layout="wide")
+st.set_page_config(page_title="Smiley Identifier", page_icon=LOGO_IMAGE, layout="wide")
 st.title("HoN Smiley Identifier")
 st.write("")
 
 # --- Sidebar Input ---
-st.sidebar.image("images/happyornot_logo.svg", width='content')
+st.sidebar.image(LOGO_IMAGE, width='content')
 st.sidebar.write("")
 st.sidebar.write("")
 
 
 
-with st.sidebar.form("serial_form", border=False):
-    serial_input = st.text_input("Enter Serial Number", "").upper()
-    submit = st.form_submit_button("Search")  # triggers on Enter or button click
+mode = st.sidebar.radio("Mode", ["Single serial", "Bulk file", "Fleet search", "Admin"], horizontal=True, label_visibility="collapsed")
+
+if mode == "Single serial":
+    # Decode as you type: each change reuses the decoded prefix of the previous input
+    with st.sidebar:
+        if st_keyup is not None:
+            serial_input = (st_keyup("Enter Serial Number", "", key="serial_keyup", debounce=150) or "").upper()
+        else:
+            serial_input = st.text_input("Enter Serial Number", "", key="serial_text").upper()
+
+        # A label photo overrides the typed serial
+        label_photo = st.file_uploader(
+            "Or upload a label photo", type=[ext.lstrip(".") for ext in IMAGE_EXTENSIONS], key="label_photo"
+        )
+        if label_photo is not None:
+            try:
+                scanned = scan_label(label_photo.getvalue(), label_photo.name)
+            except RuntimeError as e:
+                st.error(str(e))
+            except Exception as e:
+                st.error(f"Could not read image: {e}")
+            else:
+                if scanned["serial"]:
+                    serial_input = scanned["serial"]
+                    timings = ", ".join(f"{stage} {seconds * 1000:.0f} ms" for stage, seconds in scanned["timings"].items())
+                    st.caption(f"Read {serial_input} by {scanned['method']} ({timings})")
+                else:
+                    st.warning("No serial found on the label")
+    if "serial_decoder" not in st.session_state:
+        st.session_state.serial_decoder = IncrementalDecoder()
+else:
+    serial_input = ""
     
 
 # --- Main Screen Output ---
-if submit and serial_input:
+if serial_input:
     serial_input = serial_input.strip()
     # Use partial-friendly parser for the app UI
-    parsed_serial_num, errors = parse_serial_partial(serial_input)
+    parsed_serial_num, errors = decode_cache.parse_serial_partial(
+        serial_input, decode_tables, decoder=st.session_state.serial_decoder.decode
+    )
 
     # --- Missing segments hint ---
     missing_hint = get_missing_segments_hint(serial_input)
@@ -433,6 +175,20 @@ if submit and serial_input:
         #st.error(f"❌ {e}")
         st.toast(f"❌ {e}")
 
+    # --- Did you mean ---
+    if errors:
+        suggestions = [s.serial for s in suggest(serial_input, decode_tables, partial=True, limit=3)]
+        if suggestions:
+            if st_keyup is None:
+                def use_suggestion(value):
+                    st.session_state.serial_text = value
+
+                st.write("Did you mean:")
+                for col, value in zip(st.columns(len(suggestions) + 2), suggestions):
+                    col.button(value, key=f"suggest_{value}", on_click=use_suggestion, args=(value,))
+            else:
+                st.write("Did you mean: " + ", ".join(f"`{value}`" for value in suggestions))
+
     # --- Two Columns ---
     col1, col2, col3 = st.columns([1, 1, 1])
 
@@ -440,28 +196,14 @@ if submit and serial_input:
     with col1:
         device_name = parsed_serial_num.get("device", "")
 
-        # Map possible device names to a simpler key for images
-        device_images = {
-            # Mini
-            "Smiley Mini": "images/mini_standard.jpg",
-
-            # Terminal
-            "Smiley Terminal": "images/terminal_standard.jpg",
-            "Smiley Terminal (Standard, Table, Rail)": "images/terminal_standard.jpg",
-            "Smiley Terminal (Wall attachment)": "images/terminal_wall.jpg",
-
-            # Touch
-            "Smiley Touch": "images/touch_nocam.jpg",
-            "Smiley Touch - HONT1000": "images/touch_nocam.jpg",
-            "Smiley Touch (camera hole)": "images/touch_cam.jpg"
-        }
-
-        # Get the image path, fallback to default logo
-        img_path = device_images.get(device_name, "images/happyornot_logo.svg")
-        img_caption = device_name if device_name in device_images else "[ Image Not Available ]"
+        # Get a column-sized thumbnail, fallback to default logo. Served by URL
+        # when possible, so the browser fetches (and caches) it once instead of
+        # the bytes going through the session on every rerun
+        static_url = ASSET_URL or (THUMBNAIL_URL if st.get_option("server.enableStaticServing") and not st.get_option("server.baseUrlPath") else None)
+        img_src, img_caption = device_thumbnail(device_name, DEVICE_IMAGE_WIDTH, static_url)
 
         # Display the image
-        st.image(img_path, caption=img_caption, width="stretch")
+        st.image(img_src, caption=img_caption, width="stretch")
         st.write("")
 
         # Display 'More info' link
@@ -482,7 +224,7 @@ if submit and serial_input:
             ("radio", specs_radio_title)
         ]:
             if key in parsed_serial_num:
-                st.markdown(card_style.format(title=title, value=parsed_serial_num[key]), unsafe_allow_html=True)
+                st.markdown(card_style.format(title=title, value=render_value(parsed_serial_num[key])), unsafe_allow_html=True)
                 
 
     # Right column: cards
@@ -496,6 +238,193 @@ if submit and serial_input:
             ("changelog", "📝 Changelog")
         ]:
             if key in parsed_serial_num:
-                st.markdown(card_style.format(title=title, value=parsed_serial_num[key]), unsafe_allow_html=True)
-                
+                st.markdown(card_style.format(title=title, value=render_value(parsed_serial_num[key])), unsafe_allow_html=True)
+
+
+# --- Bulk File Decoding ---
+if mode == "Bulk file":
+    st.subheader("Bulk decode")
+    st.write("Upload a CSV or Excel sheet with one serial per row. Rows are decoded in chunks and written to a downloadable file.")
+
+    uploaded = st.file_uploader("Serial list", type=["csv", "txt", "xlsx"])
+    bulk_col1, bulk_col2, bulk_col3 = st.columns([1, 1, 1])
+    with bulk_col1:
+        serial_column = st.text_input("Serial column header", "serial")
+    with bulk_col2:
+        out_format = st.selectbox("Output format", ["csv", "parquet"])
+    with bulk_col3:
+        bulk_jobs = st.number_input("Worker processes", min_value=1, max_value=os.cpu_count() or 1, value=1)
+
+    if uploaded is not None and st.button("Decode file"):
+        progress_text = st.empty()
+        out_fd, out_path = tempfile.mkstemp(suffix=f".{out_format}")
+        os.close(out_fd)
+        try:
+            stats = decode_file(
+                uploaded,
+                out_path,
+                column=serial_column,
+                fmt=out_format,
+                progress=lambda rows: progress_text.write(f"Decoded {rows:,} serials..."),
+                jobs=int(bulk_jobs),
+                cache=open_result_store(RESULT_CACHE) if RESULT_CACHE else None,
+            )
+        except RuntimeError as e:
+            # Missing optional dependency (openpyxl for Excel, pyarrow for Parquet)
+            progress_text.empty()
+            st.error(str(e))
+        else:
+            progress_text.empty()
+
+            m1, m2, m3, m4 = st.columns(4)
+            m1.metric("Serials", f"{stats['rows']:,}")
+            m2.metric("With errors", f"{stats['invalid']:,}")
+            m3.metric("Serials/sec", f"{stats['serials_per_sec']:,.0f}")
+            if "cache" in stats:
+                m4.metric(
+                    "Cache hit ratio",
+                    f"{stats['cache']['hit_ratio']:.0%}",
+                    help=f"{stats['cache']['duplicates']:,} repeats, {stats['cache']['hits']:,} from earlier runs, {stats['cache']['misses']:,} decoded",
+                )
+
+            with open(out_path, "rb") as f:
+                st.download_button(
+                    "Download decoded serials",
+                    f,
+                    file_name=f"{os.path.splitext(uploaded.name)[0]}_decoded.{out_format}",
+                    mime="text/csv" if out_format == "csv" else "application/octet-stream",
+                    on_click="ignore",
+                )
+        finally:
+            os.remove(out_path)
+
+
+# --- Fleet Search ---
+if mode == "Fleet search":
+    st.subheader("Fleet search")
+    st.write("Find indexed devices by type, build week and hardware codes.")
+
+    index_path = st.text_input("Index file", os.environ.get("SMILEY_FLEET_INDEX", "fleet.db"))
+
+    with st.expander("Add serials to the index", expanded=not os.path.exists(index_path)):
+        index_upload = st.file_uploader("Serial list", type=["csv", "txt", "xlsx"], key="index_upload")
+        index_column = st.text_input("Serial column header", "serial", key="index_column")
+        if index_upload is not None and st.button("Build index"):
+            progress_text = st.empty()
+            stats = build_index(
+                index_upload,
+                index_path,
+                column=index_column,
+                progress=lambda rows: progress_text.write(f"Indexed {rows:,} serials..."),
+                tables=decode_tables,
+            )
+            progress_text.empty()
+            st.success(f"Indexed {stats['indexed']:,} serials ({stats['skipped']:,} skipped) in {stats['seconds']:.1f}s")
+
+    if os.path.exists(index_path):
+        fleet = open_fleet_index(index_path)
+
+        families = sorted({table.family for table in decode_tables.values()})
+        family = st.selectbox("Family", families)
+        family_tables = [table for table in decode_tables.values() if table.family == family]
+        devices = {table.device: table.type_code for table in family_tables}
+        chosen_devices = st.multiselect("Device type", list(devices), default=list(devices))
+
+        all_years = (2015, date.today().year)
+        year_col, week_col = st.columns(2)
+        with year_col:
+            years = st.slider("Build year", *all_years, all_years)
+        with week_col:
+            weeks = st.slider("Build week", 1, 52, (1, 52))
+
+        # Field filters show display values but query the underlying codes
+        field_codes = {}
+        fields = [field for field in family_tables[0].fields if field.key is not None]
+        for field, col in zip(fields, st.columns(len(fields))):
+            labels = {f"{code} - {value}": code for code, value in field.codes.items()}
+            with col:
+                chosen = st.multiselect(field.key.capitalize(), list(labels), key=f"fleet_{family}_{field.key}")
+            if chosen:
+                field_codes[field.key] = [labels[label] for label in chosen]
+
+        query = dict(
+            type_code=[devices[device] for device in chosen_devices],
+            year=None if years == all_years else years,
+            week=None if weeks == (1, 52) else weeks,
+            **field_codes,
+        )
+        started = time.perf_counter()
+        matches = fleet.count(**query)
+        serials = fleet.search(limit=1000, **query)
+        elapsed = time.perf_counter() - started
+
+        m1, m2 = st.columns(2)
+        m1.metric("Matching devices", f"{matches:,}")
+        m2.metric("Query time", f"{elapsed * 1000:.1f} ms")
+        if serials:
+            st.dataframe(
+                [{"serial": decoded.serial, **decoded.to_dict()} for decoded in decode_serials(serials, decode_tables)],
+                hide_index=True,
+            )
+            if matches > len(serials):
+                st.caption(f"Showing the first {len(serials):,} of {matches:,} devices.")
+
+
+# --- Admin: decode instrumentation ---
+if mode == "Admin":
+    st.subheader("Decode instrumentation")
+    recording = metrics.current() is decode_metrics
+    if st.toggle("Record decode metrics", value=recording, help="Times every serial decoded in this server process: lookups (cache misses), bulk files and label scans") != recording:
+        if recording:
+            metrics.disable()
+        else:
+            metrics.enable(decode_metrics)
+        st.rerun()
+    if st.button("Reset metrics"):
+        decode_metrics.reset()
+
+    snapshot = decode_metrics.snapshot()
+    st.dataframe(
+        [
+            {"stage": stage, "calls": stats["count"], "mean ms": stats["mean_ms"], "p50 ms": stats["p50_ms"], "p99 ms": stats["p99_ms"]}
+            for stage, stats in snapshot["stages"].items()
+        ],
+        hide_index=True,
+    )
+
+    stage = st.selectbox("Latency histogram", list(snapshot["stages"]))
+    buckets = snapshot["stages"][stage]["buckets"]
+    previous = 0
+    histogram = {}
+    for bound, cumulative in buckets:
+        label = "> 10 ms" if bound == float("inf") else f"≤ {bound * 1e6:g} µs"
+        histogram[label] = cumulative - previous
+        previous = cumulative
+    st.bar_chart({"calls": histogram}, x_label="latency", y_label="calls", sort=False)
+
+    col_families, col_errors = st.columns(2)
+    with col_families:
+        st.write("Decodes per device family")
+        st.dataframe(snapshot["families"], hide_index=True)
+    with col_errors:
+        st.write("Errors per field")
+        st.dataframe(snapshot["errors"], hide_index=True)
+
+    prometheus_text = decode_metrics.to_prometheus()
+    with st.expander("Prometheus export"):
+        st.code(prometheus_text, language="text")
+    st.download_button("Download metrics", prometheus_text, file_name="smiley_metrics.prom", mime="text/plain")
+
+
+# --- Decode cache stats ---
+cache_info = decode_cache.info()
+st.sidebar.caption(
+    f"Decode cache: {cache_info['hits']} hits / {cache_info['misses']} misses "
+    f"({cache_info['size']}/{cache_info['maxsize']} entries)"
+)
 
+# --- Schema version ---
+schema_version = schema_registry.current
+st.sidebar.caption(f"Schema {schema_version.digest} (version {schema_version.version} of {len(schema_registry.versions)})")
+if schema_registry.last_error:
+    st.sidebar.warning(f"schemas.json was not reloaded: {schema_registry.last_error}")
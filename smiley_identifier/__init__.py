@@ -0,0 +1,88 @@
+"""
+HappyOrNot Smiley serial number decoding.
+
+The Streamlit app (``smiley-identifier.py``) is a thin UI on top of this
+package; batch jobs can import the parsers directly. Importing the package
+only loads the small standard-library-only parsing core. The schema is
+read on first decode, and the heavier tools (pandas-based ``parse_serials``,
+process pools, bulk file I/O) are imported when first accessed.
+"""
+from importlib import import_module
+
+from .cache import DecodeCache
+from .errors import DecodeError, ErrorCode, render_errors, render_result, render_value
+from .parser import (
+    SCHEMA_PATH,
+    default_tables,
+    get_missing_segments_hint,
+    load_default_schema,
+    load_schemas,
+    parse_serial,
+    parse_serial_partial,
+    safe_lookup,
+    set_default_schema,
+    validate_year_week_sequence,
+)
+from .result import DecodedSerial, decode_serial, decode_serials
+from .tables import DeviceTable, Field, compile_schemas
+
+# Attributes resolved on first access: name -> submodule
+_LAZY = {
+    "schemas": "parser",
+    "device_tables": "parser",
+    "IncrementalDecoder": "incremental",
+    "decode_file": "bulk",
+    "decode_parallel": "parallel",
+    "decode_stream": "stream",
+    "parse_serials": "vectorized",
+    "SchemaError": "registry",
+    "SchemaRegistry": "registry",
+    "validate_schemas": "registry",
+    "ResultStore": "store",
+}
+
+__all__ = [
+    "SCHEMA_PATH",
+    "DecodeCache",
+    "DecodeError",
+    "DecodedSerial",
+    "DeviceTable",
+    "ErrorCode",
+    "Field",
+    "IncrementalDecoder",
+    "ResultStore",
+    "SchemaError",
+    "SchemaRegistry",
+    "compile_schemas",
+    "decode_file",
+    "decode_parallel",
+    "decode_serial",
+    "decode_serials",
+    "decode_stream",
+    "default_tables",
+    "device_tables",
+    "get_missing_segments_hint",
+    "load_default_schema",
+    "load_schemas",
+    "parse_serial",
+    "parse_serial_partial",
+    "parse_serials",
+    "render_errors",
+    "render_result",
+    "render_value",
+    "safe_lookup",
+    "schemas",
+    "set_default_schema",
+    "validate_schemas",
+    "validate_year_week_sequence",
+]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(import_module(f".{_LAZY[name]}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
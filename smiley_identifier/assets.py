@@ -0,0 +1,127 @@
+"""
+Static UI assets: device name -> product photo, plus pre-resized thumbnails.
+
+Kept at module level so the mapping is built once per process rather than
+on every Streamlit rerun.
+
+The product photos are far larger than the device card they are shown
+in, and handing a path to ``st.image`` makes Streamlit re-read and
+re-check the full file on every rerun. Thumbnails are instead rendered
+once per width bucket, written to ``static/thumbs`` under a name that
+includes a hash of the source photo (so a URL never changes content and
+browsers can keep it), and held in memory as JPEG bytes:
+
+    python -m smiley_identifier.assets    # pre-generate every thumbnail
+"""
+import hashlib
+import os
+import sys
+
+from functools import lru_cache
+
+LOGO_IMAGE = "images/happyornot_logo.svg"
+
+# Map possible device names to a simpler key for images
+DEVICE_IMAGES = {
+    # Mini
+    "Smiley Mini": "images/mini_standard.jpg",
+
+    # Terminal
+    "Smiley Terminal": "images/terminal_standard.jpg",
+    "Smiley Terminal (Standard, Table, Rail)": "images/terminal_standard.jpg",
+    "Smiley Terminal (Wall attachment)": "images/terminal_wall.jpg",
+
+    # Touch
+    "Smiley Touch": "images/touch_nocam.jpg",
+    "Smiley Touch - HONT1000": "images/touch_nocam.jpg",
+    "Smiley Touch (camera hole)": "images/touch_cam.jpg",
+}
+
+# Thumbnail widths in pixels; requests are rounded up to the next bucket
+THUMBNAIL_WIDTHS = (160, 320, 480)
+THUMBNAIL_DIR = "static/thumbs"
+THUMBNAIL_URL = "/app/static/thumbs"  # where Streamlit serves THUMBNAIL_DIR (server.enableStaticServing)
+THUMBNAIL_QUALITY = 82
+
+
+def device_image(device_name):
+    """Return (image path, caption) for a device name, falling back to the logo."""
+    if device_name in DEVICE_IMAGES:
+        return DEVICE_IMAGES[device_name], device_name
+    return LOGO_IMAGE, "[ Image Not Available ]"
+
+
+# --- Thumbnails ---
+def thumbnail_width(width):
+    """The smallest bucket in THUMBNAIL_WIDTHS that is at least ``width`` (else the largest)."""
+    return next((bucket for bucket in THUMBNAIL_WIDTHS if bucket >= width), THUMBNAIL_WIDTHS[-1])
+
+
+def render_thumbnail(path, width):
+    """JPEG bytes of the image at ``path`` scaled down to ``width`` pixels wide."""
+    import io
+
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image).convert("RGB")
+    if image.width > width:
+        image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=THUMBNAIL_QUALITY, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+@lru_cache(maxsize=64)
+def _thumbnail(path, width, modified, directory):
+    # ``modified`` is only part of the cache key, so a replaced photo is picked up
+    with open(path, "rb") as f:
+        digest = hashlib.sha1(f.read()).hexdigest()[:12]
+    stem = os.path.splitext(os.path.basename(path))[0]
+    name = f"{stem}-{width}-{digest}.jpg"
+    target = os.path.join(directory, name)
+    if os.path.exists(target):
+        with open(target, "rb") as f:
+            return name, f.read()
+
+    data = render_thumbnail(path, width)
+    os.makedirs(directory, exist_ok=True)
+    partial = f"{target}.{os.getpid()}.tmp"
+    with open(partial, "wb") as f:
+        f.write(data)
+    os.replace(partial, target)  # concurrent renders just overwrite each other
+    return name, data
+
+
+def thumbnail(path, width, directory=THUMBNAIL_DIR):
+    """
+    (file name in ``directory``, JPEG bytes) of the thumbnail of ``path``
+    for ``width``, rounded up to a bucket. Rendered on first use, then
+    served from memory or the file written by an earlier run.
+    """
+    return _thumbnail(path, thumbnail_width(width), os.stat(path).st_mtime_ns, directory)
+
+
+def device_thumbnail(device_name, width, static_url=None):
+    """
+    Like ``device_image``, but with the product photo as a thumbnail for
+    ``width`` pixels: a URL under ``static_url`` when the thumbnails
+    directory is served statically, otherwise the JPEG bytes. The logo
+    fallback is a small SVG and is returned as a path.
+    """
+    path, caption = device_image(device_name)
+    if path == LOGO_IMAGE:
+        return path, caption
+    name, data = thumbnail(path, width)
+    return (f"{static_url}/{name}" if static_url else data), caption
+
+
+def build_thumbnails(directory=THUMBNAIL_DIR):
+    """Render every device photo at every bucket width; returns the file names."""
+    return [thumbnail(path, width, directory)[0] for path in sorted(set(DEVICE_IMAGES.values())) for width in THUMBNAIL_WIDTHS]
+
+
+if __name__ == "__main__":
+    directory = sys.argv[1] if len(sys.argv) > 1 else THUMBNAIL_DIR
+    names = build_thumbnails(directory)
+    print(f"Wrote {len(names)} thumbnails to {directory}", file=sys.stderr)
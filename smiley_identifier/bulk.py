@@ -0,0 +1,266 @@
+"""
+Bulk serial decoding.
+
+Streams serials from a CSV or Excel sheet through ``parse_serial`` in
+fixed-size chunks and writes the decoded columns plus an ``errors`` column
+to CSV or Parquet. Only one chunk is held in memory at a time, so a
+500k-row sheet costs the same memory as a 5k-row one.
+
+Usage:
+    python -m smiley_identifier.bulk serials.xlsx -o decoded.csv
+    python -m smiley_identifier.bulk serials.csv -o decoded.parquet --column "Serial"
+    python -m smiley_identifier.bulk serials.csv -o decoded.csv --cache results.db
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+
+from itertools import islice
+
+from .errors import render_value
+from .parser import parse_serial
+
+DECODED_FIELDS = [
+    "schema_name",
+    "device",
+    "year",
+    "week",
+    "sequence",
+    "generation",
+    "network",
+    "radio",
+    "hardware",
+    "changelog",
+]
+OUTPUT_COLUMNS = ["serial"] + DECODED_FIELDS + ["errors"]
+DEFAULT_CHUNK_SIZE = 10000
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm")
+
+
+# --- Readers ---
+def _source_name(source):
+    return source if isinstance(source, str) else getattr(source, "name", "")
+
+
+def _column_serials(rows, column):
+    """
+    Yield cleaned serials from an iterator of row sequences.
+    If the first row contains ``column`` (case-insensitive) it is treated as a
+    header and that column is used; otherwise the first column is read and the
+    first row is treated as data.
+    """
+    index = None
+    for row in rows:
+        if index is None:
+            header = ["" if cell is None else str(cell).strip().lower() for cell in row]
+            if column.lower() in header:
+                index = header.index(column.lower())
+                continue
+            index = 0
+        if len(row) <= index or row[index] is None:
+            continue
+        serial = str(row[index]).strip().upper()
+        if serial:
+            yield serial
+
+
+def read_serials(source, column="serial"):
+    """
+    Lazily yield serials from a CSV/TXT or Excel file.
+    ``source`` is a path or a binary file object with a ``name`` (e.g. a
+    Streamlit upload); the file type is picked from its extension.
+    """
+    if os.path.splitext(_source_name(source))[1].lower() in EXCEL_EXTENSIONS:
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise RuntimeError("Reading Excel files requires openpyxl (pip install openpyxl)")
+
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            yield from _column_serials(workbook.active.iter_rows(values_only=True), column)
+        finally:
+            workbook.close()
+        return
+
+    if isinstance(source, str):
+        f = open(source, newline="", encoding="utf-8-sig")
+    else:
+        f = io.TextIOWrapper(source, newline="", encoding="utf-8-sig")
+    with f:
+        yield from _column_serials(csv.reader(f), column)
+
+
+def iter_chunks(iterable, size=DEFAULT_CHUNK_SIZE):
+    """Yield lists of at most ``size`` items from ``iterable``."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# --- Decoding ---
+def decode_chunk(serials, tables=None):
+    """Decode a list of serials into output rows (lists in OUTPUT_COLUMNS order)."""
+    rows = []
+    for serial in serials:
+        result, errors = parse_serial(serial, tables)
+        row = [serial]
+        row.extend(render_value(result.get(field, "")) for field in DECODED_FIELDS)
+        row.append("; ".join([error.message for error in errors]))
+        rows.append(row)
+    return rows
+
+
+# --- Writers ---
+class _CsvSink:
+    def __init__(self, dest):
+        self._own = isinstance(dest, str)
+        self._file = open(dest, "w", newline="", encoding="utf-8") if self._own else dest
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(OUTPUT_COLUMNS)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        if self._own:
+            self._file.close()
+        else:
+            self._file.flush()
+
+
+class _ParquetSink:
+    def __init__(self, dest):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Writing Parquet files requires pyarrow (pip install pyarrow)")
+
+        self._pa = pa
+        self._schema = pa.schema([(column, pa.string()) for column in OUTPUT_COLUMNS])
+        self._writer = pq.ParquetWriter(dest, self._schema)
+
+    def write(self, rows):
+        # One row group per chunk keeps the writer's buffer bounded
+        columns = [self._pa.array([row[i] for row in rows], type=self._pa.string()) for i in range(len(OUTPUT_COLUMNS))]
+        self._writer.write_table(self._pa.Table.from_arrays(columns, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def _open_sink(dest, fmt):
+    if fmt == "parquet":
+        return _ParquetSink(dest)
+    if fmt == "csv":
+        return _CsvSink(dest)
+    raise ValueError(f"Unsupported output format '{fmt}' (expected csv or parquet)")
+
+
+def output_format(dest):
+    """Guess the output format from a destination path."""
+    return "parquet" if _source_name(dest).lower().endswith(".parquet") else "csv"
+
+
+def decode_file(source, dest, column="serial", fmt=None, chunk_size=DEFAULT_CHUNK_SIZE, progress=None, jobs=1, cache=None):
+    """
+    Decode every serial in ``source`` and write the results to ``dest``.
+    ``progress`` is called with the running row count after each chunk.
+    ``jobs`` > 1 (or 0 for all cores) decodes chunks on a process pool.
+    ``cache`` (a ``store.ResultStore`` or a path to one) skips serials
+    decoded before and repeats within a chunk.
+    Returns a dict with rows, invalid, seconds and serials_per_sec, plus
+    the cache counters and hit ratios of this run when caching.
+    """
+    sink = _open_sink(dest, fmt or output_format(dest))
+    rows = invalid = 0
+    started = time.perf_counter()
+    chunks = iter_chunks(read_serials(source, column), chunk_size)
+    store = counts = None
+    if cache is not None:
+        from .store import COUNTERS, ResultStore
+
+        store = cache if isinstance(cache, ResultStore) else ResultStore(cache)
+        counts = dict.fromkeys(COUNTERS, 0)
+        decoded_chunks = store.decode_chunks(chunks, jobs, counts)
+    elif jobs == 1:
+        decoded_chunks = map(decode_chunk, chunks)
+    else:
+        from .parallel import decode_rows_parallel
+
+        decoded_chunks = decode_rows_parallel(chunks, jobs)
+    try:
+        for decoded in decoded_chunks:
+            sink.write(decoded)
+            rows += len(decoded)
+            invalid += sum(1 for row in decoded if row[-1])
+            if progress is not None:
+                progress(rows)
+    finally:
+        sink.close()
+        if store is not None and store is not cache:
+            store.close()
+
+    seconds = time.perf_counter() - started
+    stats = {
+        "rows": rows,
+        "invalid": invalid,
+        "seconds": seconds,
+        "serials_per_sec": rows / seconds if seconds > 0 else 0.0,
+    }
+    if counts is not None:
+        from .store import hit_ratios
+
+        stats["cache"] = hit_ratios(counts)
+    return stats
+
+
+# --- CLI ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Decode a CSV/Excel column of Smiley serial numbers.")
+    parser.add_argument("input", help="CSV, TXT or Excel (.xlsx) file with serial numbers")
+    parser.add_argument("-o", "--output", default="-", help="output .csv or .parquet file (default: CSV on stdout)")
+    parser.add_argument("--column", default="serial", help="header of the serial column (default: serial, else the first column)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="serials decoded per chunk")
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes (0 = all cores, default: 1)")
+    parser.add_argument("--cache", metavar="FILE", help="SQLite result cache: only decode serials not seen before")
+    parser.add_argument("--prune-cache", action="store_true", help="first drop cached rows of other schema versions")
+    args = parser.parse_args(argv)
+    if args.prune_cache:
+        if not args.cache:
+            parser.error("--prune-cache needs --cache")
+        from .store import ResultStore
+
+        store = ResultStore(args.cache)
+        print(f"Pruned {store.prune()} cached rows of other schema versions", file=sys.stderr)
+        store.close()
+
+    dest = sys.stdout if args.output == "-" else args.output
+    try:
+        stats = decode_file(args.input, dest, column=args.column, chunk_size=args.chunk_size, jobs=args.jobs, cache=args.cache)
+    except RuntimeError as e:
+        parser.error(str(e))
+    print(
+        f"Decoded {stats['rows']} serials ({stats['invalid']} with errors) in {stats['seconds']:.2f}s "
+        f"- {stats['serials_per_sec']:,.0f} serials/sec",
+        file=sys.stderr,
+    )
+    if "cache" in stats:
+        cache = stats["cache"]
+        print(
+            f"Cache: {cache['duplicates']} repeats, {cache['hits']} hits, {cache['misses']} decoded "
+            f"- hit ratio {cache['hit_ratio']:.1%} (store {cache['store_hit_ratio']:.1%})",
+            file=sys.stderr,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
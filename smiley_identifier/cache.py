@@ -0,0 +1,77 @@
+"""
+Bounded LRU cache for decoded serials.
+
+Support staff look up the same handful of serials over and over, and the
+Streamlit app re-runs on every interaction. ``DecodeCache`` keeps the most
+recent results keyed by (parser, serial) together with hit/miss counters.
+The cache is tied to the decode tables it was filled with: passing a
+different tables object (e.g. after schemas.json changed) empties it.
+Cached results are shared between callers and must be treated as read-only.
+"""
+import threading
+
+from collections import OrderedDict
+
+from . import parser
+
+DEFAULT_MAXSIZE = 4096
+
+
+class DecodeCache:
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._tables = None
+        self._lock = threading.Lock()
+
+    def _get(self, key, decode, serial, tables):
+        if tables is None:
+            tables = parser.default_tables()
+        with self._lock:
+            if tables is not self._tables:
+                self._entries.clear()
+                self._tables = tables
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        entry = decode(serial, tables)
+        with self._lock:
+            if tables is self._tables:
+                self._entries[key] = entry
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def parse_serial(self, serial, tables=None):
+        """Cached ``parser.parse_serial``."""
+        return self._get((False, serial), parser.parse_serial, serial, tables)
+
+    def parse_serial_partial(self, serial, tables=None, decoder=None):
+        """
+        Cached ``parser.parse_serial_partial``. ``decoder`` replaces the parser
+        on a miss, e.g. an IncrementalDecoder's ``decode``.
+        """
+        return self._get((True, serial), decoder or parser.parse_serial_partial, serial, tables)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def info(self):
+        """Counters as a dict: hits, misses, size, maxsize, hit_ratio."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,167 @@
+"""
+Command-line decoder.
+
+Reads serials one per line from stdin or files and writes one decoded
+record per serial to stdout, as NDJSON (the same shape as the HTTP
+service) or CSV (the same columns as the bulk decoder). Input is consumed
+lazily and output is written as it is produced, so it can sit at the end
+of a pipe:
+
+    grep -o 'SN=[0-9A-Z]*' device.log | cut -c4- | python -m smiley_identifier
+    python -m smiley_identifier --partial --format csv scans.txt > decoded.csv
+    python -m smiley_identifier --jobs 0 fleet.txt > decoded.ndjson
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+
+from collections import deque
+
+from .bulk import DECODED_FIELDS, OUTPUT_COLUMNS
+from .errors import render_result, render_value
+from .parser import parse_serial, parse_serial_partial
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+# --- Input ---
+def iter_lines(paths):
+    """Yield lines from each path in turn ("-" is stdin)."""
+    for path in paths or ["-"]:
+        if path == "-":
+            yield from io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig", errors="replace")
+        else:
+            with open(path, encoding="utf-8-sig", errors="replace") as f:
+                yield from f
+
+
+def iter_serials(lines):
+    """Cleaned serials from raw lines; blank lines are skipped."""
+    for line in lines:
+        serial = line.strip().upper()
+        if serial:
+            yield serial
+
+
+# --- Output ---
+def _ndjson_writer(out, suggestions=False):
+    def write(serial, result, errors, suggested=()):
+        record = {"serial": serial, "result": render_result(result), "errors": [error.to_dict() for error in errors]}
+        if suggestions:
+            record["suggestions"] = [suggestion.serial for suggestion in suggested]
+        out.write(json.dumps(record, ensure_ascii=False))
+        out.write("\n")
+
+    return write
+
+
+def _csv_writer(out, suggestions=False):
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(OUTPUT_COLUMNS + ["suggestion"] if suggestions else OUTPUT_COLUMNS)
+
+    def write(serial, result, errors, suggested=()):
+        row = [serial]
+        row.extend(render_value(result.get(field, "")) for field in DECODED_FIELDS)
+        row.append("; ".join([error.message for error in errors]))
+        if suggestions:
+            row.append(suggested[0].serial if suggested else "")
+        writer.writerow(row)
+
+    return write
+
+
+WRITERS = {"ndjson": _ndjson_writer, "csv": _csv_writer}
+
+
+# --- Decoding ---
+def decode_lines(lines, out, fmt="ndjson", partial=False, jobs=1, chunk_size=DEFAULT_CHUNK_SIZE, line_buffered=False, suggestions=False):
+    """
+    Decode serials from ``lines`` and write them to ``out``. With
+    suggestions=True, serials with errors also get "did you mean" corrections.
+    With jobs=1 every serial is written as soon as its line has been read;
+    otherwise chunks of ``chunk_size`` serials are decoded on a process pool
+    and written back in input order. Returns (serials, serials with errors).
+    """
+    write = WRITERS[fmt](out, suggestions)
+    if suggestions:
+        from .suggest import get_corrector
+
+        corrector = get_corrector()
+    serials = iter_serials(lines)
+    if jobs == 1:
+        parse = parse_serial_partial if partial else parse_serial
+        decoded = ((serial, parse(serial)) for serial in serials)
+    else:
+        from .parallel import decode_parallel
+
+        # Serials handed to the pool but not yet written; bounded by the
+        # pool's in-flight window
+        pending = deque()
+
+        def submitted(serials):
+            for serial in serials:
+                pending.append(serial)
+                yield serial
+
+        pairs = decode_parallel(submitted(serials), jobs=jobs, chunk_size=chunk_size, partial=partial)
+        decoded = ((pending.popleft(), pair) for pair in pairs)
+
+    total = invalid = 0
+    for serial, (result, errors) in decoded:
+        if suggestions and errors:
+            write(serial, result, errors, corrector.suggest(serial, partial, limit=3))
+        else:
+            write(serial, result, errors)
+        total += 1
+        invalid += bool(errors)
+        if line_buffered:
+            out.flush()
+    out.flush()
+    return total, invalid
+
+
+def main(argv=None):
+    cli = argparse.ArgumentParser(description="Decode Smiley serial numbers read line by line from stdin or files.")
+    cli.add_argument("files", nargs="*", help="files with one serial per line (default: stdin, - also means stdin)")
+    mode = cli.add_mutually_exclusive_group()
+    mode.add_argument("--strict", dest="partial", action="store_false", help="decode complete serials with parse_serial (default)")
+    mode.add_argument("--partial", dest="partial", action="store_true", help="decode incomplete serials with parse_serial_partial")
+    cli.set_defaults(partial=False)
+    cli.add_argument("--format", choices=sorted(WRITERS), default="ndjson", help="output format (default: ndjson)")
+    cli.add_argument("--jobs", type=int, default=1, help="worker processes (0 = all cores, default: 1)")
+    cli.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="serials per worker task with --jobs")
+    cli.add_argument("--suggest", action="store_true", help="add \"did you mean\" corrections for serials with errors")
+    cli.add_argument("--line-buffered", action="store_true", help="flush after every serial")
+    cli.add_argument("-q", "--quiet", action="store_true", help="do not print the summary to stderr")
+    args = cli.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        total, invalid = decode_lines(
+            iter_lines(args.files),
+            sys.stdout,
+            fmt=args.format,
+            partial=args.partial,
+            jobs=args.jobs,
+            chunk_size=args.chunk_size,
+            line_buffered=args.line_buffered,
+            suggestions=args.suggest,
+        )
+    except BrokenPipeError:
+        # Downstream closed early (e.g. `| head`); silence the flush at exit
+        sys.stdout = open(os.devnull, "w")
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    if not args.quiet:
+        seconds = time.perf_counter() - start
+        print(f"Decoded {total} serials ({invalid} with errors) in {seconds:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Structured decode errors.
+
+The parsers record failures as small immutable ``DecodeError`` tuples
+(error code, field, offending code, device) instead of formatting message
+strings, which used to dominate the cost of decoding dirty batches. Text
+is only produced when something is displayed: ``str(error)`` gives the
+message, and ``render_value`` turns a failed field into the "❌ ..." text
+the UI cards show.
+"""
+from collections import namedtuple
+from enum import Enum
+from functools import partial
+
+
+class ErrorCode(Enum):
+    # Values are the message templates
+    FORMAT = "Serial number format not recognized"
+    YEAR_FUTURE = "Invalid year '{value}' (> current year)"
+    YEAR_NOT_NUMERIC = "Invalid year code '{value}' (numbers only)"
+    WEEK_RANGE = "Invalid week '{value}' (must be 1-52)"
+    WEEK_NOT_NUMERIC = "Invalid week code '{value}' (numbers only)"
+    SEQUENCE_ZERO = "Invalid device number '{value}' (must be > 0)"
+    SEQUENCE_NOT_NUMERIC = "Invalid device number code '{value}' (numbers only)"
+    UNKNOWN_CODE = "Invalid {field} code '{value}' for {device}"
+
+
+# code: ErrorCode
+# field: "year", "week", "sequence", "serial" or the schema field label
+# value: offending code from the serial
+# device: device the code was looked up for ("" if not device specific)
+class DecodeError(namedtuple("DecodeError", "code field value device", defaults=("",))):
+    __slots__ = ()
+
+    @property
+    def message(self):
+        return self.code.value.format(field=self.field, value=self.value, device=self.device)
+
+    def __str__(self):
+        return self.message
+
+    def to_dict(self):
+        return {
+            "code": self.code.name,
+            "field": self.field,
+            "value": self.value,
+            "device": self.device,
+            "message": self.message,
+        }
+
+
+FORMAT_ERROR = DecodeError(ErrorCode.FORMAT, "serial", "")
+
+# Hot-path constructor taking a (code, field, value, device) tuple; skips the
+# generated namedtuple __new__, which costs more than the old f-strings did
+new_error = partial(tuple.__new__, DecodeError)
+
+
+def render_value(value):
+    """Display text for a decoded field: failed fields become '❌ <message>'."""
+    if isinstance(value, DecodeError):
+        return f"❌ {value.message}"
+    return value
+
+
+def render_result(result):
+    """Copy of a parser result dict with every value rendered for display."""
+    return {key: render_value(value) for key, value in result.items()}
+
+
+def render_errors(errors):
+    """Error messages as strings."""
+    return [error.message for error in errors]
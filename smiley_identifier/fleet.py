@@ -0,0 +1,281 @@
+"""
+Indexed fleet lookup.
+
+Stores decoded serials in an SQLite file so the fleet can be queried by
+device type, build date and schema fields, e.g. "all Touch T4100 LTE
+units built 2021 weeks 10-30" or "all Terminals with changelog 01".
+
+Only the raw codes are stored (type code, build year/week, device number
+and the code behind every schema field); display values are resolved
+from the current decode tables when results are shown, so editing a label
+in schemas.json does not require a rebuild. Every query is anchored on
+the device type code and served from composite (type, field, build week)
+indexes, so range and equality queries touch only the matching index
+entries and stay in the millisecond range for tens of millions of rows.
+
+Usage:
+    python -m smiley_identifier.fleet build fleet.csv -o fleet.db
+    python -m smiley_identifier.fleet query fleet.db --family SmileyTouch --year 2021 --week 10-30 --field generation=4 --field network=1
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from . import parser
+from .bulk import DEFAULT_CHUNK_SIZE, iter_chunks, read_serials
+from .result import decode_serial
+
+# Schema field codes stored per serial, in column order
+FIELD_COLUMNS = ["generation", "network", "radio", "hardware", "changelog"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS devices (
+    serial TEXT NOT NULL UNIQUE,
+    type_code TEXT NOT NULL,
+    built INTEGER NOT NULL,        -- year * 100 + week
+    sequence INTEGER NOT NULL,
+    generation TEXT,
+    network TEXT,
+    radio TEXT,
+    hardware TEXT,
+    changelog TEXT
+)
+"""
+
+_INDEXES = ["type_code, built"] + [f"type_code, {column}, built" for column in FIELD_COLUMNS]
+
+
+def _field_slices(table):
+    """(start, stop) of the code behind each FIELD_COLUMNS entry, None if the family has no such field."""
+    slices = {field.key: (field.start, field.stop) for field in table.fields if field.key is not None}
+    return [slices.get(column) for column in FIELD_COLUMNS]
+
+
+def index_row(serial, table, slices=None):
+    """The devices row for a clean, full-length serial."""
+    start, stop = table.sequence
+    row = [serial, table.type_code, 200000 + int(serial[0:4]), int(serial[start:stop])]
+    row.extend(serial[s[0]:s[1]] if s is not None else None for s in slices or _field_slices(table))
+    return row
+
+
+def _range(value):
+    """An int, (low, high) tuple or "low-high" string as an inclusive (low, high) pair."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        low, _, high = value.partition("-")
+        return int(low), int(high or low)
+    if isinstance(value, int):
+        return value, value
+    low, high = value
+    return int(low), int(high)
+
+
+def _as_list(value):
+    return [value] if isinstance(value, str) else list(value)
+
+
+class FleetIndex:
+    """
+    SQLite-backed index of decoded serials. Each thread gets its own
+    connection, so one instance can be shared by a server or Streamlit app.
+    """
+
+    def __init__(self, path, tables=None):
+        self.path = path
+        self._tables = tables
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+
+    @property
+    def tables(self):
+        return self._tables if self._tables is not None else parser.default_tables()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path)
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # --- Building ---
+    def create_indexes(self):
+        with self._connect() as conn:
+            for i, columns in enumerate(_INDEXES):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS devices_{i} ON devices ({columns})")
+            conn.execute("ANALYZE")
+
+    def add(self, serials, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+        """
+        Index every serial in ``serials`` that decodes without errors.
+        Serials with errors or an unknown type code (which only get their
+        date and number checked) and already indexed serials are skipped.
+        Returns (indexed, skipped) counts.
+        """
+        tables = self.tables
+        slices = {code: _field_slices(table) for code, table in tables.items()}
+        conn = self._connect()
+        indexed = skipped = 0
+        insert = f"INSERT OR IGNORE INTO devices VALUES ({', '.join('?' * (4 + len(FIELD_COLUMNS)))})"
+        for chunk in iter_chunks(serials, chunk_size):
+            rows = []
+            for serial in chunk:
+                decoded = decode_serial(serial, tables)
+                if decoded.ok and decoded.table is not None:
+                    rows.append(index_row(serial, decoded.table, slices[decoded.type_code]))
+            with conn:
+                inserted = conn.executemany(insert, rows).rowcount
+            indexed += inserted
+            skipped += len(chunk) - inserted
+            if progress is not None:
+                progress(indexed + skipped)
+        return indexed, skipped
+
+    # --- Queries ---
+    def _where(self, family=None, type_code=None, year=None, week=None, **fields):
+        unknown = set(fields) - set(FIELD_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))} (expected {', '.join(FIELD_COLUMNS)})")
+
+        # Always constrain the type code - it leads every index
+        if type_code is not None:
+            type_codes = _as_list(type_code)
+        else:
+            type_codes = [code for code, table in self.tables.items() if family is None or table.family == family]
+            if not type_codes:
+                raise ValueError(f"Unknown device family '{family}'")
+        clauses = [f"type_code IN ({', '.join('?' * len(type_codes))})"]
+        params = list(type_codes)
+
+        years = _range(year) or (2000, 2099)
+        weeks = _range(week)
+        low_week, high_week = weeks or (1, 52)
+        if year is not None or weeks is not None:
+            clauses.append("built BETWEEN ? AND ?")
+            params += [years[0] * 100 + low_week, years[1] * 100 + high_week]
+            if weeks is not None and years[0] != years[1]:
+                clauses.append("built % 100 BETWEEN ? AND ?")
+                params += [low_week, high_week]
+
+        for column, codes in fields.items():
+            if codes is None:
+                continue
+            codes = _as_list(codes)
+            clauses.append(f"{column} IN ({', '.join('?' * len(codes))})")
+            params += codes
+        return " AND ".join(clauses), params
+
+    def count(self, **query):
+        """Number of indexed serials matching ``query`` (see ``search``)."""
+        where, params = self._where(**query)
+        return self._connect().execute(f"SELECT COUNT(*) FROM devices WHERE {where}", params).fetchone()[0]
+
+    def search(self, limit=1000, offset=0, **query):
+        """
+        Serials matching every given condition:
+        family / type_code: schema family name, or one or more type codes
+        year / week: a number, an inclusive (low, high) pair or "low-high"
+        generation, network, radio, hardware, changelog: one or more raw codes
+        """
+        where, params = self._where(**query)
+        sql = f"SELECT serial FROM devices WHERE {where} LIMIT ? OFFSET ?"
+        return [row[0] for row in self._connect().execute(sql, params + [limit, offset])]
+
+    def type_counts(self):
+        """{type code: number of indexed serials}."""
+        rows = self._connect().execute("SELECT type_code, COUNT(*) FROM devices GROUP BY type_code")
+        return dict(rows.fetchall())
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM devices").fetchone()[0]
+
+
+def build_index(source, path, column="serial", chunk_size=DEFAULT_CHUNK_SIZE, progress=None, tables=None):
+    """
+    Index the serials in a CSV/Excel file (e.g. bulk decoder output) into the
+    SQLite file ``path``. Secondary indexes are created after loading, which
+    is much faster than maintaining them row by row.
+    Returns a dict with indexed, skipped and seconds.
+    """
+    started = time.perf_counter()
+    index = FleetIndex(path, tables)
+    conn = index._connect()
+    # WAL keeps every chunk commit atomic, so a build interrupted by a crash
+    # or a Streamlit rerun leaves the rows committed so far, never a corrupt
+    # file. NORMAL only fsyncs at checkpoints: a power loss can drop the
+    # last chunks committed, but cannot corrupt the database.
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    try:
+        indexed, skipped = index.add(read_serials(source, column), chunk_size, progress)
+        index.create_indexes()
+    finally:
+        index.close()
+    return {"indexed": indexed, "skipped": skipped, "seconds": time.perf_counter() - started}
+
+
+# --- CLI ---
+def main(argv=None):
+    cli = argparse.ArgumentParser(description="Build and query an SQLite index of Smiley serial numbers.")
+    commands = cli.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="index a CSV/Excel column of serials")
+    build.add_argument("input", help="CSV, TXT or Excel (.xlsx) file with serial numbers")
+    build.add_argument("-o", "--output", required=True, help="SQLite index file to create or extend")
+    build.add_argument("--column", default="serial", help="header of the serial column (default: serial, else the first column)")
+
+    query = commands.add_parser("query", help="print the serials matching a query")
+    query.add_argument("index", help="SQLite index file")
+    query.add_argument("--family", help="schema family, e.g. SmileyTouch")
+    query.add_argument("--type", dest="type_code", action="append", help="device type code (repeatable)")
+    query.add_argument("--year", help="year or year range, e.g. 2021 or 2020-2022")
+    query.add_argument("--week", help="week or week range, e.g. 10-30")
+    query.add_argument("--limit", type=int, default=1000)
+    query.add_argument("--count", action="store_true", help="print only the number of matches")
+    query.add_argument(
+        "--field", dest="fields", action="append", default=[], metavar="FIELD=CODE",
+        help=f"field code(s), comma separated (repeatable); fields: {', '.join(FIELD_COLUMNS)}",
+    )
+    args = cli.parse_args(argv)
+
+    if args.command == "build":
+        stats = build_index(args.input, args.output, column=args.column)
+        print(
+            f"Indexed {stats['indexed']} serials ({stats['skipped']} with errors or already indexed skipped) in {stats['seconds']:.2f}s",
+            file=sys.stderr,
+        )
+        return 0
+
+    if not os.path.exists(args.index):
+        cli.error(f"no such index: {args.index}")
+    fields = {}
+    for item in args.fields:
+        key, sep, codes = item.partition("=")
+        if not sep:
+            cli.error(f"expected FIELD=CODE, got '{item}'")
+        fields[key] = codes.upper().split(",")
+    index = FleetIndex(args.index)
+    conditions = dict(family=args.family, type_code=args.type_code, year=args.year, week=args.week, **fields)
+    try:
+        if args.count:
+            print(index.count(**conditions))
+        else:
+            for serial in index.search(limit=args.limit, **conditions):
+                print(serial)
+    except ValueError as e:
+        cli.error(str(e))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Incremental (as-you-type) decoding.
+
+``IncrementalDecoder.decode`` returns exactly what ``parse_serial_partial``
+returns, but keeps the decoded segments of the previous input. When the
+new input shares a prefix with the previous one - the usual case while
+typing, where the serial grows one character at a time - every segment
+that only depends on characters inside that prefix is reused and only the
+newly completed positions are looked up and validated. Edits and
+backspaces simply invalidate the segments past the first changed
+character.
+"""
+from . import parser
+from .errors import FORMAT_ERROR
+from .tables import WEEK_CODES, current_year_codes, is_valid_sequence
+
+
+def _common_prefix(a, b):
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+class IncrementalDecoder:
+    """
+    Stateful drop-in for parse_serial_partial; keep one per input box/session.
+    Segments are cached as {name: (end, value, errors)} where ``end`` is the
+    number of leading characters the segment depends on.
+    """
+
+    def __init__(self, tables=None):
+        self.tables = tables
+        self.serial = ""
+        self.computed = 0  # segments decoded
+        self.reused = 0    # segments served from the previous prefix
+        self._segments = {}
+        self._table = None
+        self._seen_tables = None
+
+    def reset(self):
+        self.serial = ""
+        self._segments.clear()
+        self._table = None
+
+    def _segment(self, name, end, compute, *args):
+        segment = self._segments.get(name)
+        if segment is not None:
+            self.reused += 1
+            return segment
+        errors = []
+        segment = self._segments[name] = (end, compute(errors, *args), errors)
+        self.computed += 1
+        return segment
+
+    def decode(self, serial, tables=None):
+        """Decode ``serial``; returns (result, errors) like parse_serial_partial, and is recorded as one by metrics."""
+        if tables is None:
+            tables = self.tables if self.tables is not None else parser.default_tables()
+        if parser._recorder is not None:
+            return parser._recorder.observe("parse_serial_partial", self._decode, serial, tables)
+        return self._decode(serial, tables)
+
+    def _decode(self, serial, tables):
+        if tables is not self._seen_tables:
+            self.reset()
+            self._seen_tables = tables
+
+        # Drop everything that depends on characters that changed
+        keep = _common_prefix(self.serial, serial)
+        for name in [name for name, segment in self._segments.items() if segment[0] > keep]:
+            del self._segments[name]
+        if keep < 5:
+            self._table = None
+        self.serial = serial
+
+        result = {}
+        errors = []
+        n = len(serial)
+
+        if n >= 2:
+            _, result["year"], segment_errors = self._segment("year", 2, _decode_year, serial)
+            errors.extend(segment_errors)
+        if n >= 4:
+            _, result["week"], segment_errors = self._segment("week", 4, _decode_week, serial)
+            errors.extend(segment_errors)
+
+        if n >= 5:
+            table = self._table
+            if table is None:
+                table = self._table = tables.get(serial[4])
+            if table is not None:
+                result["device"] = table.device
+                if table.legacy:
+                    result["schema_name"] = table.schema_name.format(serial[5] if n >= 6 else "•")
+                else:
+                    result["schema_name"] = table.schema_name
+
+                for field in table.partial_fields:
+                    if n >= field.gate:
+                        _, value, segment_errors = self._segment(
+                            field.key, max(field.stop, 5), _decode_field, serial, field, table.error_device
+                        )
+                        result[field.key] = value
+                        errors.extend(segment_errors)
+
+                for key, value in table.fixed.items():
+                    result.setdefault(key, value)
+
+                # The device number is read from the end of the input, so it is
+                # re-checked whenever the serial is long enough
+                if n >= table.length:
+                    start, stop = table.partial_sequence
+                    d_raw = serial[start:stop]
+                    result["sequence"] = d_raw if is_valid_sequence(d_raw) else parser._validate_sequence(d_raw, errors)
+
+                return result, errors
+
+        if n < 2:
+            errors.append(FORMAT_ERROR)
+        return result, errors
+
+    def missing_segments_hint(self):
+        """get_missing_segments_hint for the last decoded serial."""
+        return parser.get_missing_segments_hint(self.serial)
+
+
+def _decode_year(errors, serial):
+    y_raw = serial[0:2]
+    y_display = current_year_codes().get(y_raw)
+    return y_display if y_display is not None else parser._validate_year(y_raw, errors)
+
+
+def _decode_week(errors, serial):
+    w_raw = serial[2:4]
+    return w_raw if w_raw in WEEK_CODES else parser._validate_week(w_raw, errors)
+
+
+def _decode_field(errors, serial, field, device):
+    code = serial[field.start:field.stop]
+    value = field.codes.get(code)
+    return value if value is not None else parser.safe_lookup(field.codes, code, field.label, device, errors)
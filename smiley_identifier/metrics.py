@@ -0,0 +1,209 @@
+"""
+Optional decode instrumentation.
+
+``enable()`` hooks a ``DecodeMetrics`` into ``parse_serial``,
+``parse_serial_partial`` and ``IncrementalDecoder.decode`` (recorded as
+``parse_serial_partial``) - for every caller in the process: bulk
+decoding, the CLI, the HTTP service and the app - which then records:
+
+    - a latency histogram per stage (parser function)
+    - decodes and decodes with errors per stage and device family
+    - errors per field and error code, i.e. which codes fail most
+    - schema code lookups per field, found or not
+
+Lookups are counted from the serial and its decode table after each
+parse, because the parsers resolve codes inline and only fall back to
+``safe_lookup`` for codes that are missing. Only actual decodes are
+recorded: ``DecodeCache`` hits are counted by the cache, and the
+candidates ``suggest`` checks are not lookups.
+
+``to_prometheus()`` renders them in the Prometheus text exposition format
+(the HTTP service serves it at ``/metrics/prometheus``) and the app's Admin
+panel shows them. While disabled the parsers only check one module global,
+so the overhead is a few nanoseconds per serial. Worker processes of the
+process pool keep their own (disabled) hook.
+"""
+import threading
+
+from bisect import bisect_left
+from time import perf_counter
+
+from . import parser
+
+STAGES = ("parse_serial", "parse_serial_partial")
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 5e-3, 1e-2)
+UNKNOWN_FAMILY = "(unknown)"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Latency histogram with fixed bucket bounds (plus +Inf), like a Prometheus histogram."""
+
+    __slots__ = ("bounds", "counts", "total", "count")
+
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def cumulative(self):
+        """[(upper bound, observations <= bound)], ending with (inf, count)."""
+        running, rows = 0, []
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            running += count
+            rows.append((bound, running))
+        return rows
+
+    def quantile(self, q):
+        """Estimated ``q`` quantile, interpolated within its bucket (as Prometheus' histogram_quantile)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        lower, seen = 0.0, 0
+        for bound, count in zip(self.bounds, self.counts):
+            if seen + count >= rank and count:
+                return lower + (bound - lower) * (rank - seen) / count
+            lower, seen = bound, seen + count
+        return self.bounds[-1]  # in the +Inf bucket: report the largest finite bound
+
+
+def _table(serial, tables):
+    if tables is None:
+        tables = parser.default_tables()
+    return tables.get(serial[4]) if len(serial) >= 5 else None
+
+
+def _looked_up(stage, serial, table):
+    """The fields whose code ``stage`` looked up in ``serial``, mirroring the parsers' field loops."""
+    if table is None:
+        return ()
+    if stage == "parse_serial":
+        return table.fields if table.length == len(serial) else ()
+    return [field for field in table.partial_fields if len(serial) >= field.gate]
+
+
+class DecodeMetrics:
+    """Counters and histograms filled by the instrumented parsers; thread-safe."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {stage: Histogram(self.buckets) for stage in STAGES}
+            self.decodes = {}   # (stage, family) -> serials decoded
+            self.failures = {}  # (stage, family) -> serials with errors
+            self.errors = {}    # (field, error code name) -> errors
+            self.lookups = {}   # (field, "hit"/"miss") -> code lookups
+
+    # --- Hooks (called by the parsers) ---
+    def observe(self, stage, parse, serial, tables):
+        started = perf_counter()
+        result, errors = parse(serial, tables)
+        elapsed = perf_counter() - started
+        table = _table(serial, tables)
+        key = (stage, table.family if table is not None else UNKNOWN_FAMILY)
+        lookups = [
+            (field.label, "hit" if serial[field.start:field.stop] in field.codes else "miss")
+            for field in _looked_up(stage, serial, table)
+        ]
+        with self._lock:
+            self.histograms[stage].observe(elapsed)
+            self.decodes[key] = self.decodes.get(key, 0) + 1
+            if errors:
+                self.failures[key] = self.failures.get(key, 0) + 1
+                for error in errors:
+                    error_key = (error.field, error.code.name)
+                    self.errors[error_key] = self.errors.get(error_key, 0) + 1
+            for lookup_key in lookups:
+                self.lookups[lookup_key] = self.lookups.get(lookup_key, 0) + 1
+        return result, errors
+
+    # --- Reading ---
+    def snapshot(self):
+        """Plain-dict copy: stages (count, mean/p50/p99 ms, histogram), families, errors, lookups."""
+        with self._lock:
+            stages = {}
+            for stage, histogram in self.histograms.items():
+                stages[stage] = {
+                    "count": histogram.count,
+                    "sum_seconds": histogram.total,
+                    "mean_ms": histogram.total / histogram.count * 1000 if histogram.count else 0.0,
+                    "p50_ms": histogram.quantile(0.5) * 1000,
+                    "p99_ms": histogram.quantile(0.99) * 1000,
+                    "buckets": histogram.cumulative(),
+                }
+            families = [
+                {"stage": stage, "family": family, "decodes": count, "with_errors": self.failures.get((stage, family), 0)}
+                for (stage, family), count in sorted(self.decodes.items())
+            ]
+            errors = [
+                {"field": field, "code": code, "errors": count}
+                for (field, code), count in sorted(self.errors.items(), key=lambda item: -item[1])
+            ]
+            lookups = [
+                {"field": field, "outcome": outcome, "lookups": count}
+                for (field, outcome), count in sorted(self.lookups.items())
+            ]
+        return {"stages": stages, "families": families, "errors": errors, "lookups": lookups}
+
+    def to_prometheus(self, prefix="smiley"):
+        """The metrics in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_decode_seconds Time spent per decode stage.",
+            f"# TYPE {prefix}_decode_seconds histogram",
+        ]
+        for stage, stats in snapshot["stages"].items():
+            for bound, count in stats["buckets"]:
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{prefix}_decode_seconds_bucket{{stage="{stage}",le="{le}"}} {count}')
+            lines.append(f'{prefix}_decode_seconds_sum{{stage="{stage}"}} {stats["sum_seconds"]!r}')
+            lines.append(f'{prefix}_decode_seconds_count{{stage="{stage}"}} {stats["count"]}')
+
+        counters = [
+            ("decodes_total", "Serials decoded per stage and device family.", snapshot["families"], ("stage", "family"), "decodes"),
+            ("decode_failures_total", "Serials decoded with errors per stage and device family.", snapshot["families"], ("stage", "family"), "with_errors"),
+            ("decode_errors_total", "Decode errors per field and error code.", snapshot["errors"], ("field", "code"), "errors"),
+            ("lookups_total", "Schema code lookups per field.", snapshot["lookups"], ("field", "outcome"), "lookups"),
+        ]
+        for name, help_text, rows, labels, value in counters:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for row in rows:
+                label_text = ",".join(f'{label}="{_escape(row[label])}"' for label in labels)
+                lines.append(f"{prefix}_{name}{{{label_text}}} {row[value]}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# --- Switch ---
+def enable(metrics=None):
+    """Start recording into ``metrics`` (default: the current one, or a new DecodeMetrics); returns it."""
+    if metrics is None:
+        metrics = parser._recorder or DecodeMetrics()
+    parser._recorder = metrics
+    return metrics
+
+
+def disable():
+    """Stop recording; the collected metrics stay readable via the returned object."""
+    metrics, parser._recorder = parser._recorder, None
+    return metrics
+
+
+def current():
+    """The active DecodeMetrics, or None while instrumentation is off."""
+    return parser._recorder
@@ -0,0 +1,94 @@
+"""
+Parallel batch decoding across CPU cores.
+
+Serials are split into chunks and decoded on a ``ProcessPoolExecutor``.
+Each worker compiles the schema once in its initializer and then reuses
+it for every chunk it receives. By default workers get the schema the
+parent process is using (including one swapped in by a SchemaRegistry),
+so they never decode against a different version than the parent. Only ``jobs * 2`` chunks are in
+flight at a time and results are yielded in input order, so arbitrarily
+long (streamed) inputs can be decoded with flat memory.
+"""
+import multiprocessing
+import os
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from . import parser
+from .bulk import DEFAULT_CHUNK_SIZE, decode_chunk, iter_chunks
+from .result import decode_serials
+
+
+def _init_worker(schema_path, schema=None):
+    """Load the schema once per worker process."""
+    if schema is not None:
+        parser.set_default_schema(schema)
+    else:
+        parser.load_default_schema(schema_path)
+
+
+def _decode_pairs(serials, partial):
+    parse = parser.parse_serial_partial if partial else parser.parse_serial
+    return [parse(serial) for serial in serials]
+
+
+def _decode_compact(serials, partial):
+    return decode_serials(serials, partial=partial)
+
+
+def resolve_jobs(jobs):
+    """Number of worker processes for ``jobs`` (None or 0 = all cores)."""
+    return jobs if jobs and jobs > 0 else os.cpu_count() or 1
+
+
+def make_executor(jobs=None, schema_path=None, schema=None):
+    """
+    Create a process pool whose workers have the schema preloaded: the
+    file at ``schema_path``, the ``schema`` dict, or by default this
+    process's current schema.
+    """
+    if not schema_path and schema is None:
+        schema = parser.schemas
+    return ProcessPoolExecutor(
+        max_workers=resolve_jobs(jobs),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(schema_path, None) if schema_path else (None, schema),
+    )
+
+
+def map_ordered(executor, fn, items, window, *args):
+    """
+    Like executor.map, but submits lazily: at most ``window`` tasks are
+    pending at once, and results are yielded in submission order.
+    """
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def decode_rows_parallel(chunks, jobs=None, schema_path=None):
+    """Decode an iterable of serial chunks into bulk output rows, one row list per chunk."""
+    jobs = resolve_jobs(jobs)
+    with make_executor(jobs, schema_path) as executor:
+        yield from map_ordered(executor, decode_chunk, chunks, jobs * 2)
+
+
+def decode_parallel(serials, jobs=None, chunk_size=DEFAULT_CHUNK_SIZE, partial=False, schema_path=None, compact=False):
+    """
+    Decode ``serials`` on ``jobs`` worker processes.
+    Yields (result, errors) for every serial, in input order - the same pairs
+    parse_serial (or parse_serial_partial with partial=True) returns. With
+    compact=True it yields DecodedSerial objects instead, which are much
+    cheaper to ship back from the workers and to keep in memory.
+    """
+    jobs = resolve_jobs(jobs)
+    worker = _decode_compact if compact else _decode_pairs
+    with make_executor(jobs, schema_path) as executor:
+        for decoded in map_ordered(executor, worker, iter_chunks(serials, chunk_size), jobs * 2, partial):
+            yield from decoded
@@ -0,0 +1,302 @@
+"""
+Serial number parsing core for HappyOrNot Smiley devices.
+
+Decodes production year/week, device family, generation, radio/modem,
+hardware and changelog information from a serial number using the
+lookup tables in ``schemas.json``. Nothing in here depends on Streamlit,
+so the parsers can be imported by batch jobs as well as the UI.
+
+The default schema is read on first use, not at import time, so importing
+the package stays cheap and never touches the filesystem. Set
+SMILEY_SCHEMA_PATH to use a schemas.json from another location.
+"""
+import os
+import threading
+
+from datetime import date
+
+from .errors import FORMAT_ERROR, ErrorCode, new_error
+from .tables import WEEK_CODES, compile_schemas, current_year_codes, is_valid_sequence
+
+# --- Load schema ---
+SCHEMA_PATH = os.environ.get("SMILEY_SCHEMA_PATH") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "schemas.json"
+)
+
+_load_lock = threading.Lock()
+
+# Instrumentation hook: a metrics.DecodeMetrics while instrumentation is on
+# (see metrics.enable). While it is None, the decode path pays one global check.
+_recorder = None
+
+
+def load_schemas(path=SCHEMA_PATH):
+    """Read and return the device schema definitions from ``path``."""
+    import json
+
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def set_default_schema(schema, tables=None):
+    """
+    Make ``schema`` the package-wide ``schemas``, with ``tables`` (compiled
+    from it if not given) as ``device_tables``. Decodes already running keep
+    the tables they started with.
+    """
+    global schemas, device_tables
+    if tables is None:
+        tables = compile_schemas(schema)
+    with _load_lock:
+        schemas, device_tables = schema, tables
+        return device_tables
+
+
+def load_default_schema(path=SCHEMA_PATH):
+    """(Re)load the package-wide ``schemas`` and ``device_tables`` from ``path``."""
+    return set_default_schema(load_schemas(path))
+
+
+def default_tables():
+    """The package-wide decode tables, loading the schema on first use."""
+    try:
+        return device_tables
+    except NameError:
+        with _load_lock:
+            if "device_tables" in globals():
+                return device_tables
+        return load_default_schema()
+
+
+def __getattr__(name):
+    # Lazy module attributes: parser.schemas / parser.device_tables
+    if name in ("schemas", "device_tables"):
+        default_tables()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# --- Year Week DeviceNumber Validation section ---
+# Enum member lookups are comparatively slow, so the hot path uses these aliases
+_YEAR_FUTURE = ErrorCode.YEAR_FUTURE
+_YEAR_NOT_NUMERIC = ErrorCode.YEAR_NOT_NUMERIC
+_WEEK_RANGE = ErrorCode.WEEK_RANGE
+_WEEK_NOT_NUMERIC = ErrorCode.WEEK_NOT_NUMERIC
+_SEQUENCE_ZERO = ErrorCode.SEQUENCE_ZERO
+_SEQUENCE_NOT_NUMERIC = ErrorCode.SEQUENCE_NOT_NUMERIC
+_UNKNOWN_CODE = ErrorCode.UNKNOWN_CODE
+
+
+def _validate_year(year_raw, errors):
+    if year_raw.isdecimal():
+        year_full = 2000 + int(year_raw)
+        if year_full <= date.today().year:
+            return str(year_full)
+        error = new_error((_YEAR_FUTURE, "year", year_raw, ""))
+    else:
+        error = new_error((_YEAR_NOT_NUMERIC, "year", year_raw, ""))
+    errors.append(error)
+    return error
+
+
+def _validate_week(week_raw, errors):
+    if week_raw.isdecimal():
+        if 1 <= int(week_raw) <= 52:
+            return week_raw
+        error = new_error((_WEEK_RANGE, "week", week_raw, ""))
+    else:
+        error = new_error((_WEEK_NOT_NUMERIC, "week", week_raw, ""))
+    errors.append(error)
+    return error
+
+
+def _validate_sequence(sequence_raw, errors):
+    if sequence_raw.isdecimal():
+        if int(sequence_raw) > 0:
+            return sequence_raw  # keep zero-padded
+        error = new_error((_SEQUENCE_ZERO, "sequence", sequence_raw, ""))
+    else:
+        error = new_error((_SEQUENCE_NOT_NUMERIC, "sequence", sequence_raw, ""))
+    errors.append(error)
+    return error
+
+
+def validate_year_week_sequence(year_raw, week_raw, sequence_raw, errors):
+    """
+    Enforce:
+      - year_raw, week_raw, sequence_raw are numeric
+      - year <= current year (assumes 20YY)
+      - week in [1, 52]
+      - sequence > 0
+    Returns tuple (year_display, week_display, sequence_display).
+    On error, the failing value is a DecodeError, which is also appended to errors.
+    """
+    year_display = _validate_year(year_raw, errors)
+    week_display = _validate_week(week_raw, errors)
+    sequence_display = _validate_sequence(sequence_raw, errors)
+    return year_display, week_display, sequence_display
+
+# --- Helper function for safe lookups ---
+def safe_lookup(schema_section, key, field_name, device_type, errors):
+    """
+    Safely look up a key in the schema section.
+    Returns the mapped value if found, otherwise a DecodeError (also appended to errors).
+    """
+    if key in schema_section:
+        return schema_section[key]
+    error = new_error((_UNKNOWN_CODE, field_name, key, device_type))
+    errors.append(error)
+    return error
+
+# --- Compute which segments are missing (for toasts) ---
+def get_missing_segments_hint(serial: str) -> str:
+    n = len(serial)
+    missing = []
+
+    if n < 2:
+        missing.append("year (YY)")
+    if n < 4:
+        missing.append("week (WW)")
+
+    if n >= 5 and serial[4] == "A":
+        # Legacy 10-char
+        if n < 6:
+            missing.append("cable (AA/AB/AC)")
+        if n < 10:
+            missing.append("device number (XXXX)")
+    else:
+        # 14-char schema
+        if n < 5:
+            missing.append("device type (T/M/V/X/C)")
+        if n < 6:
+            missing.append("generation (G)")
+        if n < 7:
+            missing.append("radio/modem (R)")
+        if n < 8:
+            missing.append("hardware/model (H)")
+        if n < 10:
+            missing.append("changelog/cable (CL)")
+        if n < 14:
+            missing.append("device number (XXXX)")
+
+    if not missing:
+        return ""
+    return ", ".join(missing)
+
+# --- Progressive Serial Parser (partial-friendly) ---
+def parse_serial_partial(serial: str, tables=None):
+    """
+    Decode as much of a (possibly incomplete) serial as its length allows.
+    Returns (result dict, list of DecodeError); fields that failed to decode
+    hold their DecodeError.
+    """
+    if _recorder is not None:
+        return _recorder.observe("parse_serial_partial", _parse_serial_partial, serial, tables)
+    return _parse_serial_partial(serial, tables)
+
+
+def _parse_serial_partial(serial, tables=None):
+    if tables is None:
+        tables = default_tables()
+    result = {}
+    errors = []
+    n = len(serial)
+
+    # Year
+    if n >= 2:
+        y_raw = serial[0:2]
+        y_display = current_year_codes().get(y_raw)
+        result["year"] = y_display if y_display is not None else _validate_year(y_raw, errors)
+
+    # Week
+    if n >= 4:
+        w_raw = serial[2:4]
+        result["week"] = w_raw if w_raw in WEEK_CODES else _validate_week(w_raw, errors)
+
+    # Decide schema path by type position if present
+    if n >= 5:
+        table = tables.get(serial[4])
+        if table is not None:
+            result["device"] = table.device
+            if table.legacy:
+                result["schema_name"] = table.schema_name.format(serial[5] if n >= 6 else "•")
+            else:
+                result["schema_name"] = table.schema_name
+
+            device = table.error_device
+            for key, start, stop, codes, label, gate in table.partial_fields:
+                if n >= gate:
+                    code = serial[start:stop]
+                    value = codes.get(code)
+                    result[key] = value if value is not None else safe_lookup(codes, code, label, device, errors)
+
+            for key, value in table.fixed.items():
+                result.setdefault(key, value)
+
+            # Device number (last 4)
+            if n >= table.length:
+                d_raw = serial[table.partial_sequence[0]:table.partial_sequence[1]]
+                result["sequence"] = d_raw if is_valid_sequence(d_raw) else _validate_sequence(d_raw, errors)
+
+            return result, errors
+
+    # If we got here with too short input, keep legacy error for backward-compat on very short strings
+    if n < 2:
+        errors.append(FORMAT_ERROR)
+    return result, errors
+
+# --- Strict Serial Parser (kept for tests/backward-compat) ---
+def parse_serial(serial, tables=None):
+    """
+    Decode a complete 10-char legacy or 14-char serial.
+    Returns (result dict, list of DecodeError); fields that failed to decode
+    hold their DecodeError.
+    """
+    if _recorder is not None:
+        return _recorder.observe("parse_serial", _parse_serial, serial, tables)
+    return _parse_serial(serial, tables)
+
+
+def _parse_serial(serial, tables=None):
+    if tables is None:
+        tables = default_tables()
+    n = len(serial)
+    table = tables.get(serial[4]) if n >= 5 else None
+
+    if table is None or table.length != n:
+        if n == 14:
+            # Known length, unknown device type: only year/week/number are checked
+            errors = []
+            validate_year_week_sequence(serial[:2], serial[2:4], serial[-4:], errors)
+            return {}, errors
+        return {}, [FORMAT_ERROR]
+
+    errors = []
+    y_raw = serial[:2]
+    w_raw = serial[2:4]
+    d_raw = serial[table.sequence[0]:table.sequence[1]]
+    production_year = current_year_codes().get(y_raw)
+    if production_year is None:
+        production_year = _validate_year(y_raw, errors)
+    production_week = w_raw if w_raw in WEEK_CODES else _validate_week(w_raw, errors)
+    device_number = d_raw if is_valid_sequence(d_raw) else _validate_sequence(d_raw, errors)
+
+    result = {
+        "schema_name": table.schema_name.format(serial[5]) if table.legacy else table.schema_name,
+        "year": production_year,
+        "week": production_week,
+        "sequence": device_number,
+        "device": table.device,
+    }
+    result.update(table.fixed)
+
+    device = table.error_device
+    for key, start, stop, codes, label, gate in table.fields:
+        code = serial[start:stop]
+        value = codes.get(code)
+        if value is None:
+            value = safe_lookup(codes, code, label, device, errors)
+        if key is not None:
+            result[key] = value
+
+    return result, errors
@@ -0,0 +1,402 @@
+"""
+Versioned, hot-reloading schema registry.
+
+``SchemaRegistry`` watches ``schemas.json`` (a cheap ``os.stat`` poll on a
+background thread), validates every edit and swaps the compiled tables in
+as a new ``SchemaVersion``. A file that fails validation - a missing
+section, a code of the wrong width, a format that does not match the field
+positions - is reported in ``last_error`` and the current version stays in
+service, so a half-saved edit never reaches the decoders. Versions are
+immutable and swapped by reference: decodes already running finish on the
+tables they started with, and nothing on the decode path takes a lock.
+
+Each version is identified by a digest of its content, which is the same
+on every replica that loaded the same file, and has an ``effective`` build
+week (year * 100 + week): the week it was first seen, or 0 - every build -
+for the first version a registry ever loads. Reverting an edit adds the
+old content again as a new version effective from the week of the revert. ``tables_for`` picks
+the version that applied when a serial was built. With a ``history``
+directory, every version is archived there as ``<effective>-<digest>.json``
+and reloaded on start; files can also be dropped in by hand to back-date
+a schema.
+
+    registry = watch()    # shared registry, also installed as the package default
+    registry.current.digest, registry.parse_serial("2107T410000042")
+
+    python -m smiley_identifier.registry schemas.json    # validate a schema file
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import date
+
+from . import parser
+from .tables import _STRICT_LAYOUTS, compile_schemas
+
+DEFAULT_INTERVAL = 2.0  # seconds between checks of the schema file
+HISTORY_DIR = os.environ.get("SMILEY_SCHEMA_HISTORY")
+
+# Sections every family needs besides its field sections ("format"/"formats" checked separately)
+_LEGACY_FAMILY = "Touch1000"
+_LEGACY_TEXT_SECTIONS = ("generation", "hardware")  # plain strings, not code tables
+_HISTORY_NAME = re.compile(r"([0-9]{6})-([0-9a-f]{12})\.json")
+
+# version: load order in this process (1, 2, ...); digest: content hash, stable across replicas
+# effective: first build week (year * 100 + week) the version applies to
+SchemaVersion = namedtuple("SchemaVersion", "version digest effective loaded schemas tables")
+
+
+class SchemaError(ValueError):
+    """A schema that failed validation; ``problems`` lists what is wrong."""
+
+    def __init__(self, problems, source=""):
+        self.problems = list(problems)
+        prefix = f"{source}: " if source else ""
+        super().__init__(f"{prefix}{len(self.problems)} schema problem(s): " + "; ".join(self.problems))
+
+
+# --- Validation ---
+def _check_format(family, fmt, length, problems):
+    if not isinstance(fmt, str) or len(fmt) != length:
+        problems.append(f"{family}: format {fmt!r} must be {length} characters")
+    elif not (fmt.startswith("YYWW") and fmt.endswith("XXXX")):
+        problems.append(f"{family}: format {fmt!r} must start with YYWW and end with XXXX")
+
+
+def _check_family(family, section, problems):
+    if not isinstance(section, dict):
+        problems.append(f"{family}: expected an object")
+        return
+    layout = _STRICT_LAYOUTS[family]
+    legacy = family == _LEGACY_FAMILY
+    length = 10 if legacy else 14
+
+    required = {"type"} | {name for _, name, _, _, _, _ in layout}
+    if legacy:
+        required |= {"formats", *_LEGACY_TEXT_SECTIONS}
+    elif "formats" not in section:
+        required.add("format")
+    for key in sorted(required - set(section)):
+        problems.append(f"{family}: missing section '{key}'")
+
+    for key, value in section.items():
+        if key in ("format", "formats") or (legacy and key in _LEGACY_TEXT_SECTIONS):
+            continue
+        if not isinstance(value, dict) or not all(isinstance(k, str) and isinstance(v, str) for k, v in value.items()):
+            problems.append(f"{family}.{key}: expected an object of code -> text")
+
+    # Every code must fill exactly the serial positions its field decodes
+    for _, name, start, stop, _, _ in layout:
+        codes = section.get(name)
+        if isinstance(codes, dict):
+            for code in codes:
+                if len(code) != stop - start:
+                    problems.append(f"{family}.{name}: code {code!r} must be {stop - start} character(s) (serial positions {start + 1}-{stop})")
+
+    types = section.get("type")
+    types = types if isinstance(types, dict) else {}
+    for code in types:
+        if len(code) != 1:
+            problems.append(f"{family}.type: code {code!r} must be 1 character")
+
+    if legacy:
+        cables = section.get("cables") if isinstance(section.get("cables"), dict) else {}
+        formats = section.get("formats")
+        for fmt in formats if isinstance(formats, list) else [formats]:
+            _check_format(family, fmt, length, problems)
+            if isinstance(fmt, str) and len(fmt) == length and (fmt[4] not in types or fmt[4:6] not in cables):
+                problems.append(f"{family}: format {fmt!r} does not match a type and cable code")
+        for key in _LEGACY_TEXT_SECTIONS:
+            if key in section and not isinstance(section[key], str):
+                problems.append(f"{family}.{key}: expected text")
+    elif "formats" in section:
+        formats = section["formats"]
+        if not isinstance(formats, dict):
+            problems.append(f"{family}.formats: expected an object of type code -> format")
+            return
+        for code in types:
+            fmt = formats.get(code)
+            if fmt is None:
+                problems.append(f"{family}.formats: no format for type '{code}'")
+                continue
+            _check_format(family, fmt, length, problems)
+            if isinstance(fmt, str) and len(fmt) == length and fmt[4] != code:
+                problems.append(f"{family}: format {fmt!r} must have type '{code}' at position 5")
+    else:
+        _check_format(family, section.get("format"), length, problems)
+
+
+def validate_schemas(schemas):
+    """
+    Problems found in a schemas.json dict, as a list of messages (empty if
+    it is valid): unknown families, missing sections, non-text entries,
+    codes whose width does not match their serial positions, formats of the
+    wrong length or shape, and type codes used by more than one family.
+    """
+    if not isinstance(schemas, dict) or not schemas:
+        return ["expected an object of device families"]
+    problems = []
+    owners = {}
+    for family, section in schemas.items():
+        if family not in _STRICT_LAYOUTS:
+            problems.append(f"{family}: unknown family (expected one of {', '.join(sorted(_STRICT_LAYOUTS))})")
+            continue
+        _check_family(family, section, problems)
+        if isinstance(section, dict) and isinstance(section.get("type"), dict):
+            for code in section["type"]:
+                if code in owners:
+                    problems.append(f"type code '{code}' is used by both {owners[code]} and {family}")
+                owners.setdefault(code, family)
+    return problems
+
+
+def schema_digest(schemas):
+    """Short content hash of a schema dict; formatting and key order do not matter."""
+    canonical = json.dumps(schemas, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+
+
+def this_week():
+    """The current build week as year * 100 + week."""
+    year, week, _ = date.today().isocalendar()
+    return year * 100 + min(week, 52)
+
+
+def _built(serial):
+    """Build week (year * 100 + week) of a serial, or None if it has no numeric YYWW."""
+    head = serial[:4]
+    return 200000 + int(head) if len(head) == 4 and head.isascii() and head.isdigit() else None
+
+
+def _applying(state, built):
+    """The version of a registry ``_state`` that applied in build week ``built``; the oldest for earlier weeks."""
+    versions, effective = state
+    i = bisect_right(effective, built)
+    return versions[i - 1] if i else versions[0]
+
+
+# --- Registry ---
+class SchemaRegistry:
+    """
+    Validated schema versions for one schemas.json file. Call ``check()``
+    to pick up edits, or ``start()`` to poll on a background thread. With
+    install=True each new current version also becomes the package-wide
+    default (``parser.default_tables()``), so every decoder follows it.
+    """
+
+    def __init__(self, path=parser.SCHEMA_PATH, history=None, interval=DEFAULT_INTERVAL, install=False):
+        self.path = path
+        self.history = history
+        self.interval = interval
+        self.install = install
+        self.last_error = None
+        # (versions sorted by (effective, version), their effective weeks): one
+        # tuple, swapped in a single assignment so readers never see a mix
+        self._state = ((), ())
+        self._current = None
+        self._signature = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if history:
+            self._load_history()
+        self.reload()
+
+    # --- Versions ---
+    @property
+    def current(self):
+        """The SchemaVersion loaded from the file now."""
+        return self._current
+
+    @property
+    def tables(self):
+        return self._current.tables
+
+    @property
+    def versions(self):
+        """All known versions, oldest first."""
+        return sorted(self._state[0], key=lambda v: v.version)
+
+    def get(self, key):
+        """A version by number or digest (the newest with that digest); KeyError if unknown."""
+        for version in sorted(self._state[0], key=lambda v: v.version, reverse=True):
+            if key in (version.version, version.digest):
+                return version
+        raise KeyError(key)
+
+    def for_build(self, built):
+        """The version that applied in build week ``built`` (year * 100 + week); the oldest for earlier weeks."""
+        return _applying(self._state, built)
+
+    def tables_for(self, serial):
+        """Decode tables of the schema that applied when ``serial`` was built (current if it has no build date)."""
+        built = _built(serial)
+        return self._current.tables if built is None else self.for_build(built).tables
+
+    def parse_serial(self, serial, as_built=True):
+        """``parser.parse_serial`` against the schema of the serial's build week (or the current one)."""
+        return parser.parse_serial(serial, self.tables_for(serial) if as_built else self._current.tables)
+
+    def parse_serial_partial(self, serial, as_built=True):
+        """``parser.parse_serial_partial`` against the schema of the serial's build week (or the current one)."""
+        return parser.parse_serial_partial(serial, self.tables_for(serial) if as_built else self._current.tables)
+
+    # --- Loading ---
+    def _add(self, schemas, tables, digest, effective):
+        """
+        Register a version (caller holds the lock). Returns the existing one
+        if it already applies from ``effective``; a known digest that does
+        not (an edit reverted after a newer version) is added again, so
+        ``for_build`` picks it for builds from ``effective`` on.
+        """
+        state = self._state
+        if state[0]:
+            applying = _applying(state, effective)
+            if applying.digest == digest:
+                return applying
+        number = max((v.version for v in state[0]), default=0) + 1
+        version = SchemaVersion(number, digest, effective, time.time(), schemas, tables)
+        versions = tuple(sorted(state[0] + (version,), key=lambda v: (v.effective, v.version)))
+        self._state = (versions, tuple(v.effective for v in versions))
+        return version
+
+    def _load_history(self):
+        os.makedirs(self.history, exist_ok=True)
+        # Versions from the same week load in the order they were archived
+        paths = [os.path.join(self.history, name) for name in os.listdir(self.history) if _HISTORY_NAME.fullmatch(name)]
+        for path in sorted(paths, key=lambda path: (os.path.basename(path)[:6], os.path.getmtime(path))):
+            match = _HISTORY_NAME.fullmatch(os.path.basename(path))
+            try:
+                schemas = parser.load_schemas(path)
+                problems = validate_schemas(schemas)
+                if problems:
+                    raise SchemaError(problems, path)
+            except (OSError, ValueError) as e:
+                self.last_error = str(e)
+                continue
+            with self._lock:
+                self._add(schemas, compile_schemas(schemas), schema_digest(schemas), int(match.group(1)))
+
+    def _archive(self, version):
+        target = os.path.join(self.history, f"{version.effective:06d}-{version.digest}.json")
+        if not os.path.exists(target):
+            partial = f"{target}.{os.getpid()}.tmp"
+            with open(partial, "w", encoding="utf-8") as f:
+                json.dump(version.schemas, f, ensure_ascii=False, indent=4)
+            os.replace(partial, target)
+        else:
+            # Re-added in the same week (a reverted edit): it now loads last
+            os.utime(target)
+
+    def reload(self, effective=None):
+        """
+        Read, validate and compile the schema file and make it current.
+        A new version applies from ``effective`` (default: this week, or
+        every build week for the registry's first version).
+        Raises SchemaError (or OSError) and keeps the current version if
+        the file is invalid. Returns the current SchemaVersion.
+        """
+        stat = os.stat(self.path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        schemas = parser.load_schemas(self.path)
+        problems = validate_schemas(schemas)
+        if problems:
+            raise SchemaError(problems, self.path)
+        digest = schema_digest(schemas)
+        tables = compile_schemas(schemas)
+
+        with self._lock:
+            self._signature = signature
+            self.last_error = None
+            if self._current is not None and self._current.digest == digest:
+                return self._current
+            count = len(self._state[0])
+            if effective is None:
+                effective = this_week() if count else 0
+            version = self._add(schemas, tables, digest, effective)
+            if self.history and len(self._state[0]) > count:
+                self._archive(version)
+            self._current = version
+        if self.install:
+            parser.set_default_schema(version.schemas, version.tables)
+        return version
+
+    def check(self):
+        """Reload if the file changed since the last load; True if the current version changed."""
+        try:
+            stat = os.stat(self.path)
+            if (stat.st_mtime_ns, stat.st_size) == self._signature:
+                return False
+            previous = self._current
+            return self.reload() is not previous
+        except (OSError, ValueError) as e:  # SchemaError, JSON syntax error, file mid-replace
+            self.last_error = str(e)
+            return False
+
+    # --- Watching ---
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        """Poll the schema file every ``interval`` seconds on a daemon thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="schema-registry", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def watch(path=parser.SCHEMA_PATH, history=HISTORY_DIR, interval=DEFAULT_INTERVAL):
+    """
+    The shared, started SchemaRegistry for ``path``, installed as the
+    package-wide default schema. Created on first call.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None or _registry.path != path:
+            if _registry is not None:
+                _registry.stop()
+            _registry = SchemaRegistry(path, history, interval, install=True)
+        return _registry.start()
+
+
+def main(argv=None):
+    paths = (argv if argv is not None else sys.argv[1:]) or [parser.SCHEMA_PATH]
+    failed = 0
+    for path in paths:
+        try:
+            schemas = parser.load_schemas(path)
+        except (OSError, ValueError) as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            failed += 1
+            continue
+        problems = validate_schemas(schemas)
+        for problem in problems:
+            print(f"{path}: {problem}", file=sys.stderr)
+        if problems:
+            failed += 1
+        else:
+            print(f"{path}: ok, digest {schema_digest(schemas)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
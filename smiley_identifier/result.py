@@ -0,0 +1,153 @@
+"""
+Compact decode results.
+
+A parser result dict costs several hundred bytes per serial, which adds
+up to gigabytes when a whole fleet is held in memory. ``DecodedSerial``
+keeps only the (interned) serial, a reference to the shared decode tables
+and the errors - display strings are resolved from the tables on demand:
+``decoded["device"]`` looks up that one field, and ``to_dict()`` rebuilds
+the exact dict the parsers return.
+"""
+import sys
+
+from . import parser
+from .tables import WEEK_CODES, current_year_codes, is_valid_sequence
+
+_NO_ERRORS = ()
+
+
+class DecodedSerial:
+    __slots__ = ("serial", "errors", "partial", "_tables")
+
+    def __init__(self, serial, errors=_NO_ERRORS, partial=False, tables=None):
+        self.serial = sys.intern(serial)
+        self.errors = tuple(errors) if errors else _NO_ERRORS
+        self.partial = partial
+        self._tables = tables
+
+    @property
+    def tables(self):
+        return self._tables if self._tables is not None else parser.default_tables()
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    @property
+    def table(self):
+        """DeviceTable for the serial's type code, or None if unknown."""
+        return self.tables.get(self.serial[4]) if len(self.serial) >= 5 else None
+
+    @property
+    def type_code(self):
+        return self.serial[4] if len(self.serial) >= 5 else ""
+
+    @property
+    def family(self):
+        table = self.table
+        return table.family if table is not None else None
+
+    def code(self, key):
+        """Raw code behind a result key, e.g. code("changelog") -> "01"."""
+        serial = self.serial
+        if key == "year":
+            return serial[0:2]
+        if key == "week":
+            return serial[2:4]
+        table = self.table
+        if table is None:
+            return None
+        if key == "sequence":
+            start, stop = table.partial_sequence if self.partial else table.sequence
+            return serial[start:stop]
+        for field in table.fields:
+            if field.key == key:
+                return serial[field.start:field.stop]
+        return None
+
+    def to_dict(self):
+        """The result dict parse_serial (or parse_serial_partial) returns for this serial."""
+        parse = parser.parse_serial_partial if self.partial else parser.parse_serial
+        return parse(self.serial, self._tables)[0]
+
+    def _error(self, label):
+        return next(error for error in self.errors if error.field == label)
+
+    def __getitem__(self, key):
+        """``to_dict()[key]``, decoding only that field from the serial and its table."""
+        serial = self.serial
+        n = len(serial)
+        table = self.table
+        if not self.partial and (table is None or table.length != n):
+            raise KeyError(key)  # unknown type code or wrong length: the parser returns {}
+        if key == "year" and n >= 2:
+            value = current_year_codes().get(serial[0:2])
+            return value if value is not None else self._error("year")
+        if key == "week" and n >= 4:
+            value = serial[2:4]
+            return value if value in WEEK_CODES else self._error("week")
+        if table is not None:
+            if key == "device":
+                return table.device
+            if key == "schema_name":
+                return table.schema_name.format(serial[5] if n >= 6 else "•") if table.legacy else table.schema_name
+            if key == "sequence" and n >= table.length:
+                value = self.code("sequence")
+                return value if is_valid_sequence(value) else self._error("sequence")
+            for field in table.partial_fields if self.partial else table.fields:
+                if field.key == key and (not self.partial or n >= field.gate):
+                    value = field.codes.get(serial[field.start:field.stop])
+                    return value if value is not None else self._error(field.label)
+            if key in table.fixed:
+                return table.fixed[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other):
+        if not isinstance(other, DecodedSerial):
+            return NotImplemented
+        return (self.serial, self.errors, self.partial) == (other.serial, other.errors, other.partial)
+
+    def __hash__(self):
+        return hash((self.serial, self.partial))
+
+    def __repr__(self):
+        return f"DecodedSerial({self.serial!r}, errors={len(self.errors)})"
+
+    def __reduce__(self):
+        # Tables are process-local; the receiving side resolves against its own
+        return (DecodedSerial, (self.serial, self.errors, self.partial))
+
+
+def decode_serial(serial, tables=None, partial=False):
+    """
+    Decode ``serial`` into a DecodedSerial.
+    Clean full-length serials are only validated (no result dict is built);
+    anything else goes through the parser to collect its errors.
+    """
+    if tables is None:
+        tables = parser.default_tables()
+    if not partial:
+        n = len(serial)
+        table = tables.get(serial[4]) if n >= 5 else None
+        if (
+            table is not None
+            and table.length == n
+            and serial[0:2] in current_year_codes()
+            and serial[2:4] in WEEK_CODES
+            and is_valid_sequence(serial[table.sequence[0]:table.sequence[1]])
+            and all(serial[f.start:f.stop] in f.codes for f in table.fields)
+        ):
+            return DecodedSerial(serial, _NO_ERRORS, False, tables)
+        return DecodedSerial(serial, parser.parse_serial(serial, tables)[1], False, tables)
+    return DecodedSerial(serial, parser.parse_serial_partial(serial, tables)[1], True, tables)
+
+
+def decode_serials(serials, tables=None, partial=False):
+    """Decode an iterable of serials into a list of DecodedSerial."""
+    return [decode_serial(serial, tables, partial) for serial in serials]
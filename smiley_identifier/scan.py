@@ -0,0 +1,267 @@
+"""
+Label photo scanning.
+
+Reads the serial off a photo of a device label - from its barcode / QR
+code, or with OCR when no code can be found - and decodes it with
+``parse_serial``. Everything runs locally; the backends are optional
+packages, used in this order when installed:
+
+    zxing-cpp     barcodes and QR codes   (pip install zxing-cpp)
+    pyzbar        barcodes and QR codes   (pip install pyzbar, needs libzbar)
+    pytesseract   OCR of the printed text (pip install pytesseract, needs tesseract)
+
+Every result records how long each stage took (load, barcode, ocr,
+parse), so batch runs show whether image decoding or parsing dominates.
+
+Usage:
+    python -m smiley_identifier.scan photos/ -o scanned.csv --jobs 0
+"""
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+
+from functools import lru_cache
+
+from . import parser
+from .bulk import DECODED_FIELDS, iter_chunks
+from .errors import render_value
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tif", ".tiff", ".webp")
+STAGES = ["load", "barcode", "ocr", "parse"]
+MAX_SIDE = 2000  # photos are downscaled to this before decoding
+OUTPUT_COLUMNS = ["file", "method", "serial"] + DECODED_FIELDS + ["errors", "suggestion"] + [f"{stage}_ms" for stage in STAGES]
+
+# Serial-shaped tokens: year/week digits followed by the device code and number
+_SERIAL_TOKEN = re.compile(r"(?<![A-Z0-9])[0-9]{4}[A-Z0-9]{6}(?:[A-Z0-9]{4})?(?![A-Z0-9])")
+_OCR_CONFIG = "--psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+# --- Backends ---
+def _read_zxing(image):
+    import zxingcpp
+
+    return [result.text for result in zxingcpp.read_barcodes(image)]
+
+
+def _read_pyzbar(image):
+    from pyzbar.pyzbar import decode
+
+    return [symbol.data.decode("utf-8", "replace") for symbol in decode(image)]
+
+
+def _read_tesseract(image):
+    import pytesseract
+
+    return [pytesseract.image_to_string(image, config=_OCR_CONFIG)]
+
+
+_BARCODE_BACKENDS = [("zxingcpp", _read_zxing), ("pyzbar.pyzbar", _read_pyzbar)]
+_OCR_BACKENDS = [("pytesseract", _read_tesseract)]
+
+
+def _importable(module):
+    try:
+        __import__(module)
+    except Exception:  # ImportError, or a missing native library
+        return False
+    return True
+
+
+@lru_cache(maxsize=1)
+def available_backends():
+    """(barcode reader or None, OCR reader or None) from the installed packages."""
+    barcode = next((read for module, read in _BARCODE_BACKENDS if _importable(module)), None)
+    ocr = next((read for module, read in _OCR_BACKENDS if _importable(module)), None)
+    return barcode, ocr
+
+
+# --- Pipeline ---
+def load_image(source):
+    """Open a path or file object as an upright, grayscale PIL image no larger than MAX_SIDE."""
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image).convert("L")
+    image.thumbnail((MAX_SIDE, MAX_SIDE))
+    return image
+
+
+def extract_serial(texts, tables=None):
+    """
+    Pick the serial out of decoded barcode payloads or OCR text: the first
+    serial-shaped token with a known device type of its length that decodes
+    without errors, else the first token. Returns (serial, result, errors)
+    with the chosen token's parse_serial output, or (None, {}, []).
+    """
+    if tables is None:
+        tables = parser.default_tables()
+    tokens = []
+    for text in texts:
+        text = text.upper()
+        tokens.extend(_SERIAL_TOKEN.findall(text))
+        tokens.extend(_SERIAL_TOKEN.findall("".join(text.split())))  # "2107 AB 0001"
+    if not tokens:
+        return None, {}, []
+    parsed = {}
+    for token in tokens:
+        # An unknown type code is not an error on its own (parse_serial only
+        # checks the date and number), so random OCR runs would pass
+        table = tables.get(token[4])
+        if token not in parsed and table is not None and table.length == len(token):
+            result, errors = parsed[token] = parser.parse_serial(token, tables)
+            if not errors:
+                return token, result, errors
+    serial = tokens[0]
+    result, errors = parsed.get(serial) or parser.parse_serial(serial, tables)
+    return serial, result, errors
+
+
+def read_label(source, tables=None, suggest=True):
+    """
+    Read and decode the serial on a label photo (path or file object).
+    Returns a dict with file, method ("barcode", "ocr" or None), text,
+    serial, result, errors, suggestion and per-stage timings in seconds;
+    "parse" is the time spent picking and decoding the serial.
+    """
+    barcode_reader, ocr_reader = available_backends()
+    if barcode_reader is None and ocr_reader is None:
+        raise RuntimeError("Reading labels requires zxing-cpp, pyzbar or pytesseract (pip install zxing-cpp)")
+
+    timings = dict.fromkeys(STAGES, 0.0)
+    record = {"file": source if isinstance(source, str) else getattr(source, "name", ""), "method": None, "text": []}
+
+    started = time.perf_counter()
+    image = load_image(source)
+    timings["load"] = time.perf_counter() - started
+
+    serial, result, errors = None, {}, []
+    for method, reader in (("barcode", barcode_reader), ("ocr", ocr_reader)):
+        if reader is None:
+            continue
+        started = time.perf_counter()
+        texts = reader(image)
+        timings[method] = time.perf_counter() - started
+        started = time.perf_counter()
+        serial, result, errors = extract_serial(texts, tables)
+        timings["parse"] += time.perf_counter() - started
+        if serial is not None:
+            record["method"] = method
+            record["text"] = texts
+            break
+
+    suggestion = None
+    if suggest and errors:
+        from .suggest import suggest as suggest_serial
+
+        best = suggest_serial(serial, tables, limit=1)
+        suggestion = best[0].serial if best else None
+
+    record.update(serial=serial, result=result, errors=errors, suggestion=suggestion, timings=timings)
+    return record
+
+
+# --- Batches ---
+def iter_images(directory):
+    """Image files under ``directory``, recursively, in a stable order."""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(root, name)
+
+
+def _read_labels(paths):
+    records = []
+    for path in paths:
+        try:
+            records.append(read_label(path))
+        except RuntimeError:
+            raise
+        except Exception as e:  # unreadable or corrupt image
+            records.append({"file": path, "method": None, "serial": None, "result": {}, "errors": [],
+                            "suggestion": None, "timings": dict.fromkeys(STAGES, 0.0), "failure": str(e)})
+    return records
+
+
+def scan_directory(directory, jobs=1, chunk_size=8):
+    """
+    Yield read_label records for every image under ``directory``, in file
+    order. jobs > 1 (or 0 for all cores) reads chunks of photos on a process pool.
+    """
+    chunks = iter_chunks(iter_images(directory), chunk_size)
+    if jobs == 1:
+        for chunk in chunks:
+            yield from _read_labels(chunk)
+        return
+
+    from .parallel import make_executor, map_ordered, resolve_jobs
+
+    jobs = resolve_jobs(jobs)
+    with make_executor(jobs) as executor:
+        for records in map_ordered(executor, _read_labels, chunks, jobs * 2):
+            yield from records
+
+
+def record_row(record):
+    """A record as a row of OUTPUT_COLUMNS."""
+    result = record["result"]
+    row = [record["file"], record["method"] or "", record["serial"] or ""]
+    row.extend(render_value(result.get(field, "")) for field in DECODED_FIELDS)
+    messages = [error.message for error in record["errors"]]
+    if "failure" in record:
+        messages.append(f"Could not read image: {record['failure']}")
+    elif not record["serial"]:
+        messages.append("No serial found on the label")
+    row.append("; ".join(messages))
+    row.append(record["suggestion"] or "")
+    row.extend(f"{record['timings'][stage] * 1000:.1f}" for stage in STAGES)
+    return row
+
+
+def timing_summary(timings, wall_seconds):
+    """Text summary of the time spent per stage across a batch."""
+    totals = dict.fromkeys(STAGES, 0.0)
+    for record_timings in timings:
+        for stage in STAGES:
+            totals[stage] += record_timings[stage]
+    busy = sum(totals.values()) or 1.0
+    parts = [f"{stage} {totals[stage]:.2f}s ({totals[stage] / busy:.0%})" for stage in STAGES]
+    bottleneck = max(STAGES, key=totals.get)
+    return f"{', '.join(parts)} - bottleneck: {bottleneck}; wall time {wall_seconds:.2f}s"
+
+
+# --- CLI ---
+def main(argv=None):
+    cli = argparse.ArgumentParser(description="Read Smiley serial numbers from label photos.")
+    cli.add_argument("directory", help="directory of label photos (searched recursively)")
+    cli.add_argument("-o", "--output", default="-", help="output CSV file (default: stdout)")
+    cli.add_argument("--jobs", type=int, default=1, help="worker processes (0 = all cores, default: 1)")
+    args = cli.parse_args(argv)
+
+    started = time.perf_counter()
+    out = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    timings = []
+    found = 0
+    try:
+        writer = csv.writer(out)
+        writer.writerow(OUTPUT_COLUMNS)
+        for record in scan_directory(args.directory, jobs=args.jobs):
+            writer.writerow(record_row(record))
+            timings.append(record["timings"])
+            found += bool(record["serial"])
+    except RuntimeError as e:
+        cli.error(str(e))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"Read {found} of {len(timings)} labels", file=sys.stderr)
+    print(timing_summary(timings, time.perf_counter() - started), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
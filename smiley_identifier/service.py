@@ -0,0 +1,343 @@
+"""
+HTTP JSON decode service.
+
+A dependency-free ASGI app exposing the parsers to machines (ticketing,
+MES) so they no longer have to scrape the Streamlit page:
+
+    GET  /decode/{serial}[?partial=1]   decode one serial
+    POST /decode/batch[?partial=1]      JSON list, or NDJSON (one serial per line)
+    GET  /metrics                       request counts and p50/p99 latency
+    GET  /metrics/prometheus            the same counters, plus decode instrumentation
+                                        when SMILEY_METRICS=1, in Prometheus text format
+    GET  /health                        liveness, plus the schema version in use
+    GET  /assets/{name}                 device photo thumbnails (see assets.py)
+
+Run it next to the UI with any ASGI server, e.g.:
+    uvicorn smiley_identifier.service:app --port 8000
+    python -m smiley_identifier.service --port 8000
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+
+from collections import deque
+from functools import lru_cache
+from urllib.parse import parse_qs
+
+from . import metrics, parser
+from .assets import THUMBNAIL_DIR
+from .errors import render_result
+
+MAX_BODY_BYTES = 16 * 1024 * 1024
+MAX_BATCH_SIZE = 100000
+INLINE_BATCH_SIZE = 256  # larger batches are decoded off the event loop
+LATENCY_WINDOW = 10000
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+# Thumbnail names carry a hash of the source photo, so a URL never changes content
+_ASSET_NAME = re.compile(r"[A-Za-z0-9_-]+-[0-9]+-[0-9a-f]{12}\.jpg")
+ASSET_CACHE_CONTROL = b"public, max-age=31536000, immutable"
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# --- Metrics ---
+class LatencyStats:
+    """Request counters plus a sliding window of recent latencies per route."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self.started = time.time()
+        self.serials = 0
+        self._requests = {}
+        self._errors = {}
+        self._latencies = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, seconds, serials=0, failed=False):
+        with self._lock:
+            self._requests[route] = self._requests.get(route, 0) + 1
+            if failed:
+                self._errors[route] = self._errors.get(route, 0) + 1
+            if route not in self._latencies:
+                self._latencies[route] = deque(maxlen=self.window)
+            self._latencies[route].append(seconds)
+            self.serials += serials
+
+    @staticmethod
+    def _percentile(ordered, pct):
+        return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+    def snapshot(self):
+        with self._lock:
+            latency = {}
+            for route, samples in self._latencies.items():
+                ordered = sorted(samples)
+                latency[route] = {
+                    "samples": len(ordered),
+                    "p50_ms": self._percentile(ordered, 50) * 1000,
+                    "p99_ms": self._percentile(ordered, 99) * 1000,
+                    "max_ms": ordered[-1] * 1000,
+                }
+            return {
+                "uptime_seconds": time.time() - self.started,
+                "serials_decoded": self.serials,
+                "requests": dict(self._requests),
+                "errors": dict(self._errors),
+                "latency": latency,
+            }
+
+    def to_prometheus(self, prefix="smiley"):
+        """Request counters in the Prometheus text exposition format."""
+        with self._lock:
+            lines = [
+                f"# HELP {prefix}_http_requests_total HTTP requests per route.",
+                f"# TYPE {prefix}_http_requests_total counter",
+            ]
+            lines += [f'{prefix}_http_requests_total{{route="{route}"}} {count}' for route, count in sorted(self._requests.items())]
+            lines += [
+                f"# HELP {prefix}_http_request_errors_total Failed HTTP requests per route.",
+                f"# TYPE {prefix}_http_request_errors_total counter",
+            ]
+            lines += [f'{prefix}_http_request_errors_total{{route="{route}"}} {count}' for route, count in sorted(self._errors.items())]
+            lines += [
+                f"# HELP {prefix}_http_serials_decoded_total Serials decoded over HTTP.",
+                f"# TYPE {prefix}_http_serials_decoded_total counter",
+                f"{prefix}_http_serials_decoded_total {self.serials}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+# --- Decoding ---
+def decode_one(serial, partial=False, tables=None):
+    """Decode one serial into the JSON shape returned by the service."""
+    serial = serial.strip().upper()
+    parse = parser.parse_serial_partial if partial else parser.parse_serial
+    result, errors = parse(serial, tables)
+    return {"serial": serial, "result": render_result(result), "errors": [error.to_dict() for error in errors]}
+
+
+def decode_batch(serials, partial=False, tables=None, ndjson=False):
+    """Decode a batch into the (response body, content type) of /decode/batch."""
+    decoded = [decode_one(serial, partial, tables) for serial in serials]
+    if ndjson:
+        return b"".join(_json(item) + b"\n" for item in decoded), "application/x-ndjson"
+    return _json(decoded), "application/json"
+
+
+def _parse_batch(body, content_type):
+    """Read serials from a JSON list / {"serials": [...]} body or NDJSON lines."""
+    try:
+        text = body.decode("utf-8")
+        if content_type in NDJSON_TYPES:
+            serials = []
+            for line in text.splitlines():
+                line = line.strip()
+                if line:
+                    # Lines may be JSON strings ("2107T...") or bare serials
+                    serials.append(json.loads(line) if line.startswith('"') else line)
+        else:
+            payload = json.loads(text)
+            serials = payload.get("serials") if isinstance(payload, dict) else payload
+    except ValueError:
+        raise HTTPError(400, "Body is not valid UTF-8 JSON/NDJSON")
+
+    if not isinstance(serials, list) or not all(isinstance(s, str) for s in serials):
+        raise HTTPError(400, "Expected a list of serial strings")
+    if len(serials) > MAX_BATCH_SIZE:
+        raise HTTPError(413, f"Batch too large (max {MAX_BATCH_SIZE} serials)")
+    return serials
+
+
+# --- ASGI plumbing ---
+async def _read_body(receive):
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise HTTPError(413, f"Body too large (max {MAX_BODY_BYTES} bytes)")
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+async def _respond(send, status, body, content_type="application/json", headers=None):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", content_type.encode()),
+            (b"content-length", str(len(body)).encode()),
+        ] + (headers or [(b"cache-control", b"no-store")]),
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def _json(payload):
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def _header(scope, name):
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1").split(";")[0].strip().lower()
+    return ""
+
+
+@lru_cache(maxsize=64)
+def _read_asset(directory, name):
+    with open(os.path.join(directory, name), "rb") as f:
+        return f.read()
+
+
+def read_asset(name, directory=THUMBNAIL_DIR):
+    """Bytes of the generated thumbnail ``name``; HTTPError 404 for anything else."""
+    if not _ASSET_NAME.fullmatch(name):
+        raise HTTPError(404, "Not found")
+    try:
+        return _read_asset(directory, name)
+    except OSError:
+        raise HTTPError(404, "Not found")
+
+
+def create_app(tables=None):
+    """
+    Build the ASGI app. ``tables`` pins the decode tables; by default the
+    package-wide compiled schema is used, and on server startup schemas.json
+    is watched so edits are picked up without a restart (see registry.py).
+    """
+    stats = LatencyStats()
+    registry = None
+
+    async def app(scope, receive, send):
+        nonlocal registry
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    if os.environ.get("SMILEY_METRICS", "").lower() in ("1", "true", "yes"):
+                        metrics.enable()
+                    if tables is None:
+                        from .registry import watch
+
+                        registry = watch()
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        started = time.perf_counter()
+        method = scope["method"]
+        path = scope["path"]
+        query = parse_qs(scope.get("query_string", b"").decode())
+        partial = query.get("partial", ["0"])[0].lower() in ("1", "true", "yes")
+        route = path
+        serials = 0
+
+        try:
+            if path.startswith("/decode/") and path != "/decode/batch":
+                route = "/decode/{serial}"
+                if method != "GET":
+                    raise HTTPError(405, "Use GET")
+                serial = path[len("/decode/"):]  # ASGI paths arrive percent-decoded
+                body = _json(decode_one(serial, partial, tables))
+                content_type = "application/json"
+                serials = 1
+
+            elif path == "/decode/batch":
+                if method != "POST":
+                    raise HTTPError(405, "Use POST")
+                request_type = _header(scope, b"content-type")
+                batch = _parse_batch(await _read_body(receive), request_type)
+                ndjson = request_type in NDJSON_TYPES
+                if len(batch) <= INLINE_BATCH_SIZE:
+                    body, content_type = decode_batch(batch, partial, tables, ndjson)
+                else:
+                    # Keeps /health and small requests responsive while a big batch decodes
+                    loop = asyncio.get_running_loop()
+                    body, content_type = await loop.run_in_executor(None, decode_batch, batch, partial, tables, ndjson)
+                serials = len(batch)
+
+            elif path == "/metrics":
+                body = _json(stats.snapshot())
+                content_type = "application/json"
+
+            elif path == "/metrics/prometheus":
+                text = stats.to_prometheus()
+                if metrics.current() is not None:
+                    text += metrics.current().to_prometheus()
+                body = text.encode("utf-8")
+                content_type = metrics.PROMETHEUS_CONTENT_TYPE
+
+            elif path.startswith("/assets/"):
+                route = "/assets/{name}"
+                if method != "GET":
+                    raise HTTPError(405, "Use GET")
+                name = path[len("/assets/"):]
+                data = read_asset(name)
+                etag = f'"{name[:-4]}"'.encode()
+                headers = [(b"cache-control", ASSET_CACHE_CONTROL), (b"etag", etag)]
+                if etag in [value for key, value in scope.get("headers", []) if key == b"if-none-match"]:
+                    await _respond(send, 304, b"", "image/jpeg", headers)
+                else:
+                    await _respond(send, 200, data, "image/jpeg", headers)
+                stats.record(route, time.perf_counter() - started)
+                return
+
+            elif path == "/health":
+                health = {"status": "ok"}
+                if registry is not None:
+                    health["schema"] = registry.current.digest
+                    health["schema_error"] = registry.last_error
+                body = _json(health)
+                content_type = "application/json"
+
+            else:
+                route = "(unmatched)"
+                raise HTTPError(404, "Not found")
+
+        except HTTPError as e:
+            await _respond(send, e.status, _json({"error": e.message}))
+            stats.record(route, time.perf_counter() - started, failed=True)
+            return
+
+        await _respond(send, 200, body, content_type)
+        stats.record(route, time.perf_counter() - started, serials)
+
+    app.stats = stats
+    return app
+
+
+app = create_app()
+
+
+def main(argv=None):
+    cli = argparse.ArgumentParser(description="Serve the Smiley serial decoder over HTTP.")
+    cli.add_argument("--host", default="127.0.0.1")
+    cli.add_argument("--port", type=int, default=8000)
+    cli.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    args = cli.parse_args(argv)
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("Serving requires an ASGI server: pip install uvicorn")
+    uvicorn.run("smiley_identifier.service:app", host=args.host, port=args.port, workers=args.workers, access_log=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Persistent result cache for bulk decoding.
+
+Audit files repeat the same serials within a file and across days and
+sites. ``ResultStore`` keeps the decoded output row of every serial it has
+seen in an SQLite file, so bulk runs only decode serials that are new:
+
+    python -m smiley_identifier.bulk audit.xlsx -o decoded.csv --cache results.db
+
+Each chunk is deduplicated first, the unique serials are looked up in one
+query, and only the misses are decoded (on the process pool with --jobs)
+and written back. Rows are keyed by serial plus the schema version - a
+digest of the schema in use and the current year, since "year in the
+future" errors expire - so editing schemas.json invalidates the cache
+automatically. Rows of other versions are kept - processes on different
+schemas can share one file - until ``prune()`` (bulk ``--prune-cache``)
+drops them. A schema swapped in mid-run (by a SchemaRegistry) applies from
+the next chunk read, and rows decoded under the replaced one are not stored.
+Hit ratios are kept per run and in total to help size the file.
+"""
+import json
+import sqlite3
+import threading
+
+from collections import deque
+from datetime import date
+
+from . import parser
+from .bulk import decode_chunk
+from .registry import schema_digest
+
+COUNTERS = ("lookups", "duplicates", "hits", "misses")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    version TEXT NOT NULL,
+    serial TEXT NOT NULL,
+    row TEXT NOT NULL,             -- JSON list: the decoded columns after "serial"
+    PRIMARY KEY (version, serial)
+) WITHOUT ROWID
+"""
+
+_versions = {}  # id(schema dict) -> (schema dict, digest)
+
+
+def schema_version(schemas=None):
+    """Cache key for ``schemas`` (default: the package-wide schema): its digest plus the current year."""
+    if schemas is None:
+        schemas = parser.schemas
+    cached = _versions.get(id(schemas))
+    if cached is None or cached[0] is not schemas:
+        _versions.clear()
+        cached = _versions[id(schemas)] = (schemas, schema_digest(schemas))
+    return f"{cached[1]}:{date.today().year}"
+
+
+def _current_schema():
+    """(schema dict, decode tables) of the package default, read as one consistent pair."""
+    parser.default_tables()  # loads the schema on first use
+    with parser._load_lock:
+        return parser.schemas, parser.device_tables
+
+
+def hit_ratios(counts):
+    """Add hit_ratio (duplicates and store hits over lookups) and store_hit_ratio (hits over unique serials)."""
+    unique = counts["hits"] + counts["misses"]
+    counts = dict(counts)
+    counts["hit_ratio"] = (counts["duplicates"] + counts["hits"]) / counts["lookups"] if counts["lookups"] else 0.0
+    counts["store_hit_ratio"] = counts["hits"] / unique if unique else 0.0
+    return counts
+
+
+class ResultStore:
+    """
+    SQLite-backed memo of decoded bulk rows. Each thread gets its own
+    connection, so one instance can be shared by a server or Streamlit app.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # --- Lookups ---
+    def _lookup(self, chunk, version, counts):
+        """({serial: output row} for the chunk's serials stored under ``version``, [unique serials to decode])."""
+        unique = list(dict.fromkeys(chunk))
+        rows = {}
+        query = "SELECT serial, row FROM results WHERE version = ? AND serial IN (SELECT value FROM json_each(?))"
+        for serial, row in self._connect().execute(query, (version, json.dumps(unique))):
+            rows[serial] = [serial] + json.loads(row)
+        missing = [serial for serial in unique if serial not in rows]
+        counts["lookups"] += len(chunk)
+        counts["duplicates"] += len(chunk) - len(unique)
+        counts["hits"] += len(rows)
+        counts["misses"] += len(missing)
+        return rows, missing
+
+    def _save(self, version, decoded):
+        rows = [(version, row[0], json.dumps(row[1:], ensure_ascii=False)) for row in decoded]
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?)", rows)
+
+    def _finish(self, chunk, version, rows, decoded):
+        """Output rows for a looked-up chunk once its misses are decoded (a row list, or a future of one)."""
+        if not isinstance(decoded, list):
+            decoded = decoded.result()
+        if decoded:
+            # Rows decoded under a schema that has since been replaced must not be served for the new one
+            if version == schema_version():
+                self._save(version, decoded)
+            rows.update((row[0], row) for row in decoded)
+        return [rows[serial] for serial in chunk]
+
+    def decode_chunks(self, chunks, jobs=1, counts=None):
+        """
+        Like mapping ``bulk.decode_chunk`` over ``chunks`` (lists of serials),
+        yielding one list of output rows per chunk, but only serials missing
+        from the store are decoded - on a process pool when jobs != 1.
+        Each chunk is looked up, decoded and stored under the schema that
+        was current when it was read; the pool is restarted when that
+        schema changes. ``counts`` (a dict of COUNTERS) collects this run's
+        lookups.
+        """
+        counts = counts if counts is not None else dict.fromkeys(COUNTERS, 0)
+        before = dict(counts)
+        if jobs != 1:
+            from .parallel import make_executor, resolve_jobs
+
+            jobs = resolve_jobs(jobs)
+        # Looked-up chunks in input order: (chunk, version, cached rows, decoded rows or future)
+        pending = deque()
+        executor = executor_version = None
+        try:
+            for chunk in chunks:
+                schemas, tables = _current_schema()
+                version = schema_version(schemas)
+                rows, missing = self._lookup(chunk, version, counts)
+                if not missing:
+                    decoded = []
+                elif jobs == 1:
+                    decoded = decode_chunk(missing, tables)
+                else:
+                    if version != executor_version:
+                        # Workers keep the schema they were started with
+                        while pending:
+                            yield self._finish(*pending.popleft())
+                        if executor is not None:
+                            executor.shutdown()
+                        executor, executor_version = make_executor(jobs, schema=schemas), version
+                    decoded = executor.submit(decode_chunk, missing)
+                pending.append((chunk, version, rows, decoded))
+                # At most jobs * 2 chunks decoding; finished ones go out in order
+                while pending and (len(pending) > jobs * 2 or isinstance(pending[0][3], list)):
+                    yield self._finish(*pending.popleft())
+            while pending:
+                yield self._finish(*pending.popleft())
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            with self._lock:
+                for key in COUNTERS:
+                    self.counts[key] += counts[key] - before[key]
+
+    # --- Stats ---
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def info(self):
+        """Totals since the store was opened, with hit ratios, plus the number of stored serials."""
+        with self._lock:
+            counts = hit_ratios(self.counts)
+        counts["size"] = len(self)
+        return counts
+
+    def prune(self, version=None):
+        """
+        Delete the rows of every schema version but ``version`` (default:
+        the current one); returns how many were deleted. Only run it when no
+        process on another schema shares the file.
+        """
+        if version is None:
+            version = schema_version(_current_schema()[0])
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM results WHERE version != ?", (version,)).rowcount
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM results")
@@ -0,0 +1,157 @@
+"""
+Async streaming decoder.
+
+``decode_stream`` decodes serials from an async source - an
+``asyncio.StreamReader`` on a socket, an ``asyncio.Queue`` drained by a
+generator, a message-bus consumer - as they arrive:
+
+    async for serial, result, errors in decode_stream(reader):
+        ...
+
+Serials are grouped into micro-batches (``batch_size`` serials, or whatever
+arrived within ``max_wait`` seconds of the first one) and each batch is
+decoded with ``parse_serial`` on an executor, so the event loop never
+blocks on decoding. Results are yielded in input order. A batch takes one
+of ``concurrency`` slots before it is submitted and gives it back once
+its results have been yielded, and serials reach the batcher through a
+queue of ``batch_size``: when the consumer falls behind, decoding pauses
+and then reading from the source pauses, so at most
+(concurrency + 2) * batch_size serials are held however fast the source
+produces.
+"""
+import asyncio
+
+from . import parser
+from .result import decode_serial
+
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_MAX_WAIT = 0.05  # seconds a partial batch waits for more serials
+DEFAULT_CONCURRENCY = 4
+
+_END = object()
+
+
+def decode_batch(serials, partial=False, tables=None, compact=False):
+    """
+    Decode a list of serials. Returns (serial, result, errors) triples, or
+    DecodedSerial objects with compact=True. Module-level so it can run on
+    a process pool.
+    """
+    if compact:
+        return [decode_serial(serial, tables, partial) for serial in serials]
+    parse = parser.parse_serial_partial if partial else parser.parse_serial
+    return [(serial, *parse(serial, tables)) for serial in serials]
+
+
+def _clean(item):
+    if isinstance(item, bytes):
+        item = item.decode("utf-8", "replace")
+    return item.strip().upper()
+
+
+async def _read(source, items):
+    """Feed cleaned, non-blank serials from ``source`` into ``items``, then _END (also after an error)."""
+    try:
+        if hasattr(source, "__aiter__"):
+            async for item in source:
+                serial = _clean(item)
+                if serial:
+                    await items.put(serial)
+        else:
+            for item in source:
+                serial = _clean(item)
+                if serial:
+                    await items.put(serial)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        await items.put(_END)
+        raise
+    await items.put(_END)
+
+
+async def _batch(items, inflight, slots, decode, batch_size, max_wait):
+    """
+    Group serials from ``items`` into batches and start decoding them, in
+    order, into ``inflight``. Each batch first takes one of ``slots``, which
+    the consumer gives back once it has yielded the batch's results.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        first = await items.get()
+        if first is _END:
+            break
+        batch = [first]
+        deadline = loop.time() + max_wait
+        while len(batch) < batch_size:
+            try:
+                item = items.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(items.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if item is _END:
+                await slots.acquire()
+                inflight.put_nowait(decode(batch))
+                inflight.put_nowait(_END)
+                return
+            batch.append(item)
+        # Blocks while ``concurrency`` batches are decoding or waiting to be consumed
+        await slots.acquire()
+        inflight.put_nowait(decode(batch))
+    inflight.put_nowait(_END)
+
+
+async def decode_stream(
+    source,
+    partial=False,
+    batch_size=DEFAULT_BATCH_SIZE,
+    max_wait=DEFAULT_MAX_WAIT,
+    concurrency=DEFAULT_CONCURRENCY,
+    executor=None,
+    tables=None,
+    compact=False,
+):
+    """
+    Decode serials from ``source`` (an async iterable, or a plain iterable,
+    of str or bytes lines; blank lines are skipped) and yield
+    (serial, result, errors) for each, in input order - DecodedSerial
+    objects with compact=True. ``executor`` runs the decoding: the event
+    loop's default thread pool if None, or e.g. ``parallel.make_executor()``
+    to use every core (its workers then decode with their own copy of the
+    schema, unless ``tables`` is given).
+    """
+    if batch_size < 1 or concurrency < 1:
+        raise ValueError("batch_size and concurrency must be at least 1")
+    loop = asyncio.get_running_loop()
+
+    def decode(batch):
+        return loop.run_in_executor(executor, decode_batch, batch, partial, tables, compact)
+
+    items = asyncio.Queue(maxsize=batch_size)
+    # Never holds more than ``concurrency`` futures (plus _END): ``slots`` bounds it
+    inflight = asyncio.Queue()
+    slots = asyncio.Semaphore(concurrency)
+    reader = asyncio.ensure_future(_read(source, items))
+    batcher = asyncio.ensure_future(_batch(items, inflight, slots, decode, batch_size, max_wait))
+    try:
+        while True:
+            future = await inflight.get()
+            if future is _END:
+                break
+            for decoded in await future:
+                yield decoded
+            slots.release()
+        await batcher
+        await reader  # re-raises an error from the source
+    finally:
+        for task in (reader, batcher):
+            task.cancel()
+        while not inflight.empty():
+            future = inflight.get_nowait()
+            if future is not _END:
+                future.cancel()
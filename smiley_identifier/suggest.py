@@ -0,0 +1,299 @@
+"""
+"Did you mean" serial correction.
+
+``suggest`` returns the valid serials closest to a mistyped one, within
+two edits (substitutions, insertions, deletions or swapped neighbours).
+A serial is split into three segments - build date (YYWW), device code
+(type letter plus the schema field codes) and device number - and each
+segment is corrected against a precomputed symmetric-delete index of
+every valid value for it, so a query costs a few hundred dict lookups
+instead of generating and validating every edit of the whole serial.
+
+The set of valid device codes comes from ``schemas.json``: only code
+combinations that decode cleanly are indexed, so candidates respect the
+per-position alphabets of each device family. Device numbers can only be
+repaired by dropping extra characters or reading look-alike letters as
+digits (O -> 0, I -> 1, ...); a missing or mistyped digit cannot be
+guessed. Candidates are ranked by edit distance, then by how many of the
+substitutions are look-alike characters, so "21O7" suggests "2107" first.
+"""
+import threading
+
+from collections import namedtuple
+from datetime import date
+from functools import lru_cache
+from itertools import combinations, product
+
+from . import parser
+from .tables import WEEK_CODES, year_codes
+
+MAX_DISTANCE = 2
+# Any two-digit change to YYWW is another plausible build date, so the date
+# only gets one edit; spending more there just floods the results
+MAX_DATE_EDITS = 1
+MEMO_SIZE = 100000
+TOO_FAR = 1 << 20
+
+# Characters commonly misread or mistyped for each other (scanners, OCR, handwriting)
+LOOKALIKES = {("O", "0"), ("Q", "0"), ("D", "0"), ("I", "1"), ("L", "1"), ("Z", "2"), ("S", "5"), ("G", "6"), ("B", "8")}
+LOOKALIKES |= {(b, a) for a, b in LOOKALIKES}
+_DIGIT_LOOKALIKES = {a: b for a, b in LOOKALIKES if b.isdigit() and not a.isdigit()}
+
+Suggestion = namedtuple("Suggestion", "serial distance")
+
+
+@lru_cache(maxsize=1 << 16)
+def _distance(a, b, budget):
+    """
+    Optimal string alignment distance between ``a`` and ``b``, packed as
+    edits * 16 - look-alike substitutions so that lower is better. Only the
+    band of cells within ``budget`` edits is filled in, and anything over
+    budget comes back as TOO_FAR.
+    """
+    if abs(len(a) - len(b)) > budget:
+        return TOO_FAR
+    cutoff = budget * 16
+    n = len(b)
+    previous2 = None
+    previous = [j * 16 if j <= budget else TOO_FAR for j in range(n + 1)]
+    for i in range(1, len(a) + 1):
+        x = a[i - 1]
+        low, high = max(1, i - budget), min(n, i + budget)
+        current = [i * 16 if i <= budget else TOO_FAR] + [TOO_FAR] * n
+        row_best = current[0]
+        for j in range(low, high + 1):
+            y = b[j - 1]
+            best = previous[j - 1]
+            if x != y:
+                best += 15 if (x, y) in LOOKALIKES else 16
+            cost = previous[j] + 16
+            if cost < best:
+                best = cost
+            cost = current[j - 1] + 16
+            if cost < best:
+                best = cost
+            if i > 1 and j > 1 and x == b[j - 2] and a[i - 2] == y:
+                cost = previous2[j - 2] + 16
+                if cost < best:
+                    best = cost
+            current[j] = best
+            if best < row_best:
+                row_best = best
+        if row_best > cutoff:
+            return TOO_FAR
+        previous2, previous = previous, current
+    return previous[n] if previous[n] <= cutoff else TOO_FAR
+
+
+def _edits(cost):
+    return (cost + 15) // 16
+
+
+def _deletes(word, depth):
+    """[{word}, strings with 1 character deleted, ..., with ``depth`` deleted]."""
+    levels = [{word}]
+    for _ in range(depth):
+        levels.append({w[:i] + w[i + 1:] for w in levels[-1] for i in range(len(w))})
+    return levels
+
+
+class _DeleteIndex:
+    """
+    Symmetric-delete index over words of one length: all words within
+    ``budget`` edits of a query. Variants are kept per number of deleted
+    characters, so a query only meets word variants of the same length.
+    """
+
+    def __init__(self, words, length, max_distance=MAX_DISTANCE):
+        self.length = length
+        self._levels = [{} for _ in range(max_distance + 1)]
+        for word in set(words):
+            for level, variants in zip(self._levels, _deletes(word, max_distance)):
+                for variant in variants:
+                    level.setdefault(variant, []).append(word)
+
+    def lookup(self, piece, budget):
+        candidates = set()
+        for i, variants in enumerate(_deletes(piece, budget)):
+            j = self.length - len(piece) + i
+            if 0 <= j <= budget:
+                level = self._levels[j]
+                for variant in variants:
+                    candidates.update(level.get(variant, ()))
+        found = []
+        for word in candidates:
+            cost = _distance(piece, word, budget)
+            if cost != TOO_FAR:
+                found.append((word, cost))
+        return found
+
+
+def _prefix_indexes(words, length):
+    """{prefix length: _DeleteIndex of the words' prefixes} for 1..length."""
+    return {j: _DeleteIndex({word[:j] for word in words}, j) for j in range(1, length + 1)}
+
+
+def _code_strings(table):
+    """Every device code (serial[4:device number]) that decodes cleanly for ``table``."""
+    start, stop = 4, table.sequence[0]
+    slots = {}
+    for field in table.fields:
+        slot = (field.start, field.stop)
+        slots[slot] = slots[slot] & set(field.codes) if slot in slots else set(field.codes)
+    starts = sorted(slots)
+    for combo in product(*[sorted(slots[slot]) for slot in starts]):
+        chars = {0: table.type_code}
+        consistent = all(
+            chars.setdefault(i, char) == char
+            for (slot_start, _), code in zip(starts, combo)
+            for i, char in enumerate(code, slot_start - start)
+        )
+        if consistent and len(chars) == stop - start:
+            yield "".join(chars[i] for i in range(stop - start))
+
+
+def _number_candidates(piece, length, budget):
+    """Device number (prefix) candidates: drop extra characters, read look-alikes as digits."""
+    extra = len(piece) - length
+    if extra < 0 or extra > budget:
+        return []
+    found = {}
+    for dropped in combinations(range(len(piece)), extra):
+        kept = [char for i, char in enumerate(piece) if i not in dropped]
+        fixed = [char if char.isdigit() else _DIGIT_LOOKALIKES.get(char) for char in kept]
+        if None in fixed:
+            continue
+        repairs = sum(a != b for a, b in zip(kept, fixed))
+        number = "".join(fixed)
+        cost = extra * 16 + repairs * 15
+        if extra + repairs <= budget and (length < 4 or number != "0000") and cost < found.get(number, cost + 1):
+            found[number] = cost
+    return list(found.items())
+
+
+class SerialCorrector:
+    """
+    Precomputed candidate indexes for one set of decode tables.
+    Building takes a few milliseconds; reuse the instance (see ``suggest``).
+    """
+
+    def __init__(self, tables, max_distance=MAX_DISTANCE):
+        self.tables = tables
+        self.max_distance = max_distance
+        self.year = date.today().year
+        dates = [year + week for year in year_codes(self.year) for week in WEEK_CODES]
+        self._dates = _prefix_indexes(dates, 4)
+
+        codes = {}
+        for table in tables.values():
+            codes.setdefault((table.length, table.sequence[0] - 4), set()).update(_code_strings(table))
+        # (serial length, device code length, prefix indexes of the device codes)
+        self._layouts = [
+            (length, code_length, _prefix_indexes(words, code_length))
+            for (length, code_length), words in sorted(codes.items())
+        ]
+        # Segment lookups, shared between queries (dates and device codes repeat a lot)
+        self._memo = {}
+
+    def _segment(self, index, piece, length, budget):
+        key = (id(index), piece, length, budget)
+        memo = self._memo
+        found = memo.get(key)
+        if found is None:
+            if len(memo) >= MEMO_SIZE:
+                memo.clear()
+            if length == 0:
+                found = [("", len(piece) * 16)] if len(piece) <= budget else []
+            elif index is None:
+                found = _number_candidates(piece, length, budget)
+            else:
+                found = index[length].lookup(piece, budget)
+            memo[key] = found
+        return found
+
+    def candidates(self, serial, partial=False, max_distance=None):
+        """{candidate: (packed cost (see _distance), date cost)} for every split of ``serial`` within ``max_distance`` edits."""
+        limit = self.max_distance if max_distance is None else max_distance
+        n = len(serial)
+        found = {}
+        for length, code_length, code_index in self._layouts:
+            targets = range(max(1, n - limit), min(length, n + limit) + 1) if partial else [length]
+            for m in targets:
+                if abs(n - m) > limit:
+                    continue
+                # Target segment lengths for a serial (prefix) of length m
+                sizes = (min(4, m), min(code_length, max(0, m - 4)), max(0, m - 4 - code_length))
+                indexes = (self._dates, code_index, None)
+                for date_size in range(max(0, sizes[0] - limit), sizes[0] + limit + 1):
+                    for number_size in range(max(0, sizes[2] - limit), sizes[2] + limit + 1):
+                        if date_size + number_size > n:
+                            continue
+                        pieces = (serial[:date_size], serial[date_size:n - number_size], serial[n - number_size:])
+                        # Length differences have to be made up by insertions/deletions
+                        gaps = [abs(len(piece) - size) for piece, size in zip(pieces, sizes)]
+                        if sum(gaps) <= limit:
+                            self._combine(found, pieces, sizes, gaps, indexes, limit)
+        return found
+
+    def _combine(self, found, pieces, sizes, gaps, indexes, limit):
+        date_part, code_part, number_part = pieces
+        date_budget = min(MAX_DATE_EDITS, limit - gaps[1] - gaps[2])
+        for date_text, date_cost in self._segment(indexes[0], date_part, sizes[0], date_budget):
+            left = limit - _edits(date_cost)
+            for code_text, code_cost in self._segment(indexes[1], code_part, sizes[1], left - gaps[2]):
+                rest = left - _edits(code_cost)
+                for number_text, number_cost in self._segment(indexes[2], number_part, sizes[2], rest):
+                    # Ties go to candidates that keep the build date: the device
+                    # code is checked against the schema, the date hardly at all
+                    rank = (date_cost + code_cost + number_cost, date_cost)
+                    candidate = date_text + code_text + number_text
+                    if candidate not in found or rank < found[candidate]:
+                        found[candidate] = rank
+
+    def suggest(self, serial, partial=False, limit=5):
+        """
+        Up to ``limit`` of the closest valid serials within max_distance edits
+        of ``serial``, best first; only the nearest distance that has any
+        matches is returned, and a valid serial is its own only match. With partial=True
+        the candidates are serial prefixes that parse_serial_partial accepts
+        without errors.
+        """
+        serial = "".join(serial.split()).replace("-", "").upper()
+        # Widen the search one edit at a time until something matches
+        suggestions = []
+        for distance in range(self.max_distance + 1):
+            ranked = sorted(self.candidates(serial, partial, distance).items(), key=lambda item: (item[1], item[0]))
+            for candidate, (cost, _) in ranked:
+                # The uninstrumented parsers: candidates are not lookups, so metrics must not count them
+                if partial:
+                    ok = not parser._parse_serial_partial(candidate, self.tables)[1]
+                else:
+                    ok = not parser._parse_serial(candidate, self.tables)[1]
+                if ok:
+                    suggestions.append(Suggestion(candidate, _edits(cost)))
+                    if len(suggestions) == limit:
+                        break
+            if suggestions:
+                break
+        return suggestions
+
+
+_corrector = None
+_corrector_lock = threading.Lock()
+
+
+def get_corrector(tables=None):
+    """Shared SerialCorrector for ``tables``; rebuilt when the tables or the year change."""
+    global _corrector
+    if tables is None:
+        tables = parser.default_tables()
+    corrector = _corrector
+    if corrector is None or corrector.tables is not tables or corrector.year != date.today().year:
+        with _corrector_lock:
+            corrector = _corrector = SerialCorrector(tables)
+    return corrector
+
+
+def suggest(serial, tables=None, partial=False, limit=5):
+    """Ranked "did you mean" Suggestion(serial, distance) tuples for ``serial``."""
+    return get_corrector(tables).suggest(serial, partial, limit)
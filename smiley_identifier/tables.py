@@ -0,0 +1,186 @@
+"""
+Precompiled decode tables.
+
+``compile_schemas`` flattens the nested ``schemas.json`` sections into one
+``DeviceTable`` per device type code (the character at position 4). Each
+table lists the fields to decode as flat ``Field`` entries - where the code
+sits in the serial, which lookup dict resolves it and what to call it in
+error messages - so the parsers can run a single generic loop instead of
+re-walking the schema and branching per family for every serial.
+"""
+import time
+
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+# key: result key the looked-up value is stored under (None = validate only)
+# start/stop: slice of the serial holding the code
+# codes: code -> display value
+# label: field name used in error messages
+# gate: minimum serial length before the partial parser decodes the field
+Field = namedtuple("Field", "key start stop codes label gate")
+
+DeviceTable = namedtuple(
+    "DeviceTable",
+    [
+        "type_code",         # character at position 4
+        "family",            # top-level schemas.json section
+        "length",            # full serial length
+        "device",            # device display name
+        "error_device",      # device name used in error messages
+        "schema_name",       # schema display (legacy: template filled with serial[5])
+        "legacy",            # True for the 10-char Touch1000 schema
+        "fixed",             # result entries that do not depend on the serial
+        "fields",            # strict parser fields, in error order
+        "partial_fields",    # partial parser fields, in error order
+        "sequence",          # (start, stop) of the device number, strict
+        "partial_sequence",  # (start, stop) of the device number, partial
+    ],
+)
+
+LEGACY_SCHEMA_NAME = "Legacy Schema: YYWWA{}XXXX (used late 2017 - early 2019)"
+REFER_TO_SHAREPOINT = "Refer to Sharepoint document"
+
+# --- Family layouts ---
+# (result key, schema section, start, stop, error label, partial gate), listed in
+# the order the strict parser reports errors.
+_STRICT_LAYOUTS = {
+    "SmileyMini": [
+        ("generation", "generation", 5, 6, "generation", 6),
+        ("radio", "radio", 6, 7, "radio", 7),
+        ("hardware", "hardware", 7, 8, "hardware revision", 8),
+        ("network", "network", 6, 7, "network", 7),
+        ("changelog", "changelog", 8, 10, "hardware", 10),
+    ],
+    "SmileyTerminal": [
+        ("generation", "generation", 5, 6, "generation", 6),
+        ("radio", "radio", 6, 7, "radio", 7),
+        ("hardware", "hardware", 7, 8, "hardware revision", 8),
+        ("network", "network", 6, 7, "network", 7),
+        ("changelog", "changelog", 8, 10, "changelog", 10),
+    ],
+    # Touch stores the radio code under "network", the model (from G) under
+    # "hardware" and the specifications (also from G) under "radio".
+    "SmileyTouch": [
+        ("generation", "generation", 5, 6, "generation", 6),
+        ("network", "radio", 6, 7, "radio", 7),
+        (None, "hardware", 7, 8, "hardware revision", None),
+        ("changelog", "cables", 8, 10, "cable", 10),
+        ("hardware", "model", 5, 6, "model", 8),
+        ("radio", "specifications", 5, 6, "specifications", 6),
+    ],
+    "Touch1000": [
+        ("changelog", "cables", 4, 6, "cable", 6),
+    ],
+}
+
+# Order the partial parser reports errors in, by result key.
+_PARTIAL_ORDER = {
+    "SmileyMini": ["generation", "radio", "network", "hardware", "changelog"],
+    "SmileyTerminal": ["generation", "radio", "network", "hardware", "changelog"],
+    "SmileyTouch": ["generation", "network", "hardware", "changelog", "radio"],
+    "Touch1000": ["changelog"],
+}
+
+
+def _fields(section, layout):
+    return tuple(
+        Field(key, start, stop, section[name], label, gate)
+        for key, name, start, stop, label, gate in layout
+    )
+
+
+def _compile_family(family, section):
+    layout = _STRICT_LAYOUTS[family]
+    fields = _fields(section, layout)
+    partial_fields = tuple(
+        next(f for f in fields if f.key == key) for key in _PARTIAL_ORDER[family]
+    )
+
+    tables = {}
+    for type_code, device in section["type"].items():
+        if family == "Touch1000":
+            tables[type_code] = DeviceTable(
+                type_code=type_code,
+                family=family,
+                length=10,
+                device=device,
+                error_device=family,
+                schema_name=LEGACY_SCHEMA_NAME,
+                legacy=True,
+                fixed={
+                    "generation": section["generation"],
+                    "radio": REFER_TO_SHAREPOINT,
+                    "network": REFER_TO_SHAREPOINT,
+                    "hardware": section["hardware"],
+                },
+                fields=fields,
+                partial_fields=partial_fields,
+                sequence=(6, 10),
+                partial_sequence=(6, 10),
+            )
+            continue
+
+        schema_name = section["formats"][type_code] if "formats" in section else section["format"]
+        tables[type_code] = DeviceTable(
+            type_code=type_code,
+            family=family,
+            length=14,
+            device=device,
+            error_device=device,
+            schema_name=schema_name,
+            legacy=False,
+            fixed={},
+            fields=fields,
+            partial_fields=partial_fields,
+            sequence=(10, 14),
+            partial_sequence=(-4, None),
+        )
+    return tables
+
+
+def compile_schemas(schemas):
+    """
+    Compile the raw schema dict into {type code: DeviceTable}.
+    Families without a known layout are skipped.
+    """
+    tables = {}
+    for family, section in schemas.items():
+        if family in _STRICT_LAYOUTS:
+            tables.update(_compile_family(family, section))
+    return tables
+
+
+# --- Year / week / device number fast paths ---
+@lru_cache(maxsize=4)
+def year_codes(current_year):
+    """Valid two-digit year codes (20YY <= current_year) -> display year."""
+    return {f"{y:02d}": str(2000 + y) for y in range(100) if 2000 + y <= current_year}
+
+
+_today_codes = (float("-inf"), {})  # (local midnight ending the day, year codes of that day's year)
+
+
+def current_year_codes():
+    """
+    ``year_codes`` for today's year. ``date.today()`` costs more than the
+    rest of a year check, so the table is kept until local midnight and
+    only then looked up again.
+    """
+    global _today_codes
+    until, codes = _today_codes
+    if time.time() < until:
+        return codes
+    today = date.today()
+    codes = year_codes(today.year)
+    _today_codes = (datetime.combine(today + timedelta(days=1), datetime.min.time()).timestamp(), codes)
+    return codes
+
+
+WEEK_CODES = frozenset(f"{w:02d}" for w in range(1, 53))
+
+
+def is_valid_sequence(code):
+    """Fast check for a valid 4-digit device number (ASCII digits, > 0)."""
+    return code.isascii() and code.isdigit() and code != "0000"
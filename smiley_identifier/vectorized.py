@@ -0,0 +1,129 @@
+"""
+Vectorized batch decoding with pandas.
+
+``parse_serials`` decodes a whole column at once: fixed positions are sliced
+across the string array and mapped through the compiled decode tables with
+column operations, one device type at a time. Rows where any code fails to
+resolve (or whose length/type is not recognized) fall back to the scalar
+``parse_serial`` so their error text is exactly what the single-serial
+parser reports. Code lookups are one hash-table probe per column rather
+than a dict lookup per row, so the only per-row Python work left is that
+fallback and the speedup shrinks as the error rate grows
+(``benchmarks/bench_vectorized.py`` measures it).
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from . import parser
+from .bulk import DECODED_FIELDS, OUTPUT_COLUMNS
+from .errors import render_value
+from .tables import WEEK_CODES, year_codes
+
+
+def _as_series(serials):
+    if isinstance(serials, pd.Series):
+        series = serials
+    else:
+        series = pd.Series(np.asarray(serials, dtype=object), dtype=object)
+    return series.fillna("").astype(str)
+
+
+_WEEKS = {code: code for code in sorted(WEEK_CODES)}
+_code_indexes = {}  # id(code dict) -> (code dict, pd.Index of codes, display values)
+
+
+def _lookup(codes, values):
+    """
+    Display values for an array of codes and a mask of the ones found: one
+    hash-table probe for the whole array instead of a dict lookup per row.
+    """
+    cached = _code_indexes.get(id(codes))
+    if cached is None or cached[0] is not codes:
+        if len(_code_indexes) > 1024:  # stale tables from schema reloads
+            _code_indexes.clear()
+        # The trailing "" is what the -1 of a missing code picks
+        cached = _code_indexes[id(codes)] = (
+            codes,
+            pd.Index(list(codes), dtype=object),
+            np.array(list(codes.values()) + [""], dtype=object),
+        )
+    positions = cached[1].get_indexer(values)
+    return cached[2][positions], positions >= 0
+
+
+def parse_serials(serials, tables=None):
+    """
+    Decode an array-like of serials (list, NumPy array or pandas Series).
+    Returns (frame, error_mask): a DataFrame with the columns of
+    OUTPUT_COLUMNS (missing fields are ""), indexed like the input, and a
+    boolean Series that is True for rows with errors.
+    """
+    if tables is None:
+        tables = parser.default_tables()
+    series = _as_series(serials)
+    index = series.index
+    series = series.reset_index(drop=True)
+    size = len(series)
+
+    columns = {field: np.full(size, "", dtype=object) for field in DECODED_FIELDS}
+    clean = np.zeros(size, dtype=bool)
+
+    lengths = series.str.len().to_numpy()
+    type_codes = series.str.slice(4, 5).to_numpy(dtype=object)
+    years, year_ok = _lookup(year_codes(date.today().year), series.str.slice(0, 2))
+    weeks, week_ok = _lookup(_WEEKS, series.str.slice(2, 4))
+
+    for type_code, table in tables.items():
+        rows = np.flatnonzero((lengths == table.length) & (type_codes == type_code))
+        if not len(rows):
+            continue
+        sub = series.iloc[rows]
+
+        ok = year_ok[rows] & week_ok[rows]
+        sequence = sub.str.slice(*table.sequence)
+        ok &= (
+            sequence.str.fullmatch(r"[0-9]{4}", na=False) & (sequence != "0000")
+        ).to_numpy()
+
+        decoded = {}
+        for key, start, stop, codes, label, gate in table.fields:
+            values, found = _lookup(codes, sub.str.slice(start, stop))
+            ok &= found
+            if key is not None:
+                decoded[key] = values
+
+        good = rows[ok]
+        if not len(good):
+            continue
+        clean[good] = True
+        if table.legacy:
+            prefix, suffix = table.schema_name.split("{}")
+            columns["schema_name"][good] = (prefix + sub.str.slice(5, 6) + suffix).to_numpy(dtype=object)[ok]
+        else:
+            columns["schema_name"][good] = table.schema_name
+        columns["device"][good] = table.device
+        columns["year"][good] = years[good]
+        columns["week"][good] = weeks[good]
+        columns["sequence"][good] = sequence.to_numpy(dtype=object)[ok]
+        for key, value in table.fixed.items():
+            columns[key][good] = value
+        for key, values in decoded.items():
+            columns[key][good] = values[ok]
+
+    # Scalar fallback for everything the fast path could not fully resolve
+    errors = np.full(size, "", dtype=object)
+    raw = series.to_numpy(dtype=object)
+    dirty = np.flatnonzero(~clean)
+    if len(dirty):
+        parse_serial = parser.parse_serial
+        decoded = [parse_serial(serial, tables) for serial in raw[dirty]]
+        for field in DECODED_FIELDS:
+            columns[field][dirty] = [render_value(result.get(field, "")) for result, _ in decoded]
+        errors[dirty] = ["; ".join([error.message for error in row_errors]) for _, row_errors in decoded]
+
+    frame = pd.DataFrame({"serial": raw, **columns, "errors": errors}, columns=OUTPUT_COLUMNS)
+    frame.index = index
+    error_mask = pd.Series(errors != "", index=index, name="has_errors")
+    return frame, error_mask
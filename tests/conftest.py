@@ -0,0 +1,77 @@
+import os
+import random
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from smiley_identifier import compile_schemas, load_schemas, parser  # noqa: E402
+
+SCHEMA_FILE = os.path.join(ROOT, "schemas.json")
+ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# One clean serial per device type code
+VALID_SERIALS = {
+    "T": "2107T410000042",
+    "C": "2107C410000042",
+    "A": "1807AA0042",
+    "V": "2107V130010042",
+    "X": "2107X130010042",
+    "M": "2107M180010042",
+}
+
+
+@pytest.fixture(scope="session")
+def schemas():
+    return load_schemas(SCHEMA_FILE)
+
+
+@pytest.fixture(scope="session")
+def tables(schemas):
+    return compile_schemas(schemas)
+
+
+@pytest.fixture
+def default_schema(schemas):
+    """Make the repository's schemas.json the package default for one test, then restore the previous one."""
+    previous = parser.schemas, parser.device_tables
+    parser.set_default_schema(schemas)
+    try:
+        yield schemas
+    finally:
+        parser.set_default_schema(*previous)
+
+
+def make_corpus(tables, count=2000, seed=0):
+    """
+    Serials for every device type: mostly valid codes, with a random
+    character swapped in, a truncation or a duplicate now and then.
+    """
+    rng = random.Random(seed)
+    serials = list(VALID_SERIALS.values())
+    for _ in range(count):
+        serial = list(rng.choice(list(VALID_SERIALS.values())))
+        table = tables[serial[4]]
+        for field in table.fields:
+            code = rng.choice(sorted(field.codes))
+            if field.start == 4 and code[0] != serial[4]:
+                continue  # the legacy cable code includes the type code
+            serial[field.start:field.stop] = code
+        serial[10 if table.length == 14 else 6:] = f"{rng.randint(0, 9999):04d}"
+        roll = rng.random()
+        if roll < 0.2:
+            serial[rng.randrange(len(serial))] = rng.choice(ALPHABET)
+        elif roll < 0.25:
+            del serial[rng.randrange(len(serial)):]
+        serial = "".join(serial)
+        serials.append(serial)
+        if roll > 0.9:
+            serials.append(serial)
+    return serials
+
+
+@pytest.fixture(scope="session")
+def corpus(tables):
+    return make_corpus(tables)
@@ -0,0 +1,54 @@
+import io
+import os
+
+import pytest
+
+from smiley_identifier import assets
+
+pytest.importorskip("PIL")
+
+
+@pytest.fixture
+def photo(tmp_path):
+    from PIL import Image
+
+    path = str(tmp_path / "device.jpg")
+    Image.new("RGB", (1000, 500), "orange").save(path)
+    return path
+
+
+def test_thumbnail_buckets():
+    assert [assets.thumbnail_width(w) for w in (1, 160, 161, 480, 2000)] == [160, 160, 320, 480, 480]
+
+
+def test_thumbnail_is_rendered_once_and_named_by_content(tmp_path, photo):
+    from PIL import Image
+
+    directory = str(tmp_path / "thumbs")
+    name, data = assets.thumbnail(photo, 300, directory)
+    assert name.startswith("device-320-") and name.endswith(".jpg")
+    assert os.listdir(directory) == [name]
+    with Image.open(os.path.join(directory, name)) as image:
+        assert image.size == (320, 160)
+    assert assets.thumbnail(photo, 250, directory) == (name, data)
+
+    # A replaced photo gets a new name
+    Image.new("RGB", (1000, 500), "blue").save(photo)
+    os.utime(photo, ns=(0, os.stat(photo).st_mtime_ns + 1))
+    assert assets.thumbnail(photo, 300, directory)[0] != name
+
+
+def test_small_images_are_not_upscaled(tmp_path):
+    from PIL import Image
+
+    path = str(tmp_path / "small.png")
+    Image.new("RGB", (100, 50)).save(path)
+    _, data = assets.thumbnail(path, 480, str(tmp_path))
+    with Image.open(io.BytesIO(data)) as image:
+        assert image.size == (100, 50)
+
+
+def test_device_images_fall_back_to_the_logo():
+    assert assets.device_image("Smiley Mini") == ("images/mini_standard.jpg", "Smiley Mini")
+    assert assets.device_image("Unknown") == (assets.LOGO_IMAGE, "[ Image Not Available ]")
+    assert assets.device_thumbnail("Unknown", 320) == (assets.LOGO_IMAGE, "[ Image Not Available ]")
@@ -0,0 +1,82 @@
+import csv
+import io
+
+import pytest
+
+from smiley_identifier import bulk
+from smiley_identifier.bulk import OUTPUT_COLUMNS, decode_chunk, decode_file, iter_chunks, read_serials
+
+
+def _write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows(rows)
+    return str(path)
+
+
+def test_reads_the_named_column(tmp_path):
+    path = _write_csv(tmp_path / "in.csv", [["site", "Serial"], ["x", " 2107t410000042 "], ["y", ""], ["z", "1807AA0042"]])
+    assert list(read_serials(path)) == ["2107T410000042", "1807AA0042"]
+
+
+def test_without_a_header_the_first_column_is_read(tmp_path):
+    path = _write_csv(tmp_path / "in.csv", [["2107T410000042", "a"], ["1807AA0042", "b"]])
+    assert list(read_serials(path)) == ["2107T410000042", "1807AA0042"]
+
+
+def test_reads_uploads_and_excel(tmp_path):
+    upload = io.BytesIO("\ufeffserial\n2107T410000042\n".encode("utf-8"))  # Excel-saved CSVs start with a BOM
+    upload.name = "upload.csv"
+    assert list(read_serials(upload)) == ["2107T410000042"]
+
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    workbook.active.append(["Serial"])
+    workbook.active.append(["2107V130010042"])
+    workbook.active.append([None])
+    workbook.save(tmp_path / "in.xlsx")
+    assert list(read_serials(str(tmp_path / "in.xlsx"))) == ["2107V130010042"]
+
+
+def test_iter_chunks():
+    assert list(iter_chunks(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(iter_chunks([], 3)) == []
+
+
+def test_decode_file_to_csv(tmp_path, default_schema, corpus):
+    serials = [serial for serial in corpus if serial]
+    source = _write_csv(tmp_path / "in.csv", [["serial"]] + [[serial] for serial in serials])
+    progress = []
+    stats = decode_file(source, str(tmp_path / "out.csv"), chunk_size=500, progress=progress.append)
+
+    with open(tmp_path / "out.csv", newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    expected = decode_chunk(serials)
+    assert rows == [OUTPUT_COLUMNS] + expected
+    assert stats["rows"] == len(serials)
+    assert stats["invalid"] == sum(1 for row in expected if row[-1])
+    # One progress call per chunk, with the running row count
+    assert progress == [min(n, len(serials)) for n in range(500, len(serials) + 500, 500)]
+
+
+def test_decode_file_to_parquet(tmp_path, default_schema):
+    pq = pytest.importorskip("pyarrow.parquet")
+    source = _write_csv(tmp_path / "in.csv", [["serial"], ["2107T410000042"], ["2107T430000042"]])
+    decode_file(source, str(tmp_path / "out.parquet"), chunk_size=1)
+    table = pq.read_table(tmp_path / "out.parquet")
+    assert table.column_names == OUTPUT_COLUMNS
+    assert [list(row.values()) for row in table.to_pylist()] == decode_chunk(["2107T410000042", "2107T430000042"])
+
+
+def test_unsupported_output_format(tmp_path):
+    with pytest.raises(ValueError, match="Unsupported output format"):
+        decode_file(_write_csv(tmp_path / "in.csv", [["serial"]]), str(tmp_path / "out.txt"), fmt="txt")
+
+
+def test_cli(tmp_path, default_schema, capsys):
+    source = _write_csv(tmp_path / "in.csv", [["serial"], ["2107T410000042"], ["2107T430000042"], ["2107T410000042"]])
+    cache = str(tmp_path / "results.db")
+    assert bulk.main([source, "--cache", cache]) == 0
+    out, err = capsys.readouterr()
+    assert list(csv.reader(io.StringIO(out)))[1:] == decode_chunk(["2107T410000042", "2107T430000042", "2107T410000042"])
+    assert "Decoded 3 serials (1 with errors)" in err
+    assert "Cache: 1 repeats, 0 hits, 2 decoded" in err
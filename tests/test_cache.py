@@ -0,0 +1,50 @@
+from conftest import VALID_SERIALS
+from smiley_identifier import parser
+from smiley_identifier.cache import DecodeCache
+
+
+def test_hits_and_misses(tables):
+    cache = DecodeCache()
+    for serial in ["2107T410000042", "2107T410000042", "2107T430000042", "2107T410000042"]:
+        assert cache.parse_serial(serial, tables) == parser.parse_serial(serial, tables)
+    # Strict and partial results are cached separately
+    assert cache.parse_serial_partial("2107T410000042", tables) == parser.parse_serial_partial("2107T410000042", tables)
+    assert cache.info() == {"hits": 2, "misses": 3, "size": 3, "maxsize": cache.maxsize, "hit_ratio": 0.4}
+
+
+def test_least_recently_used_entry_is_evicted(tables):
+    cache = DecodeCache(maxsize=2)
+    cache.parse_serial(VALID_SERIALS["T"], tables)
+    cache.parse_serial(VALID_SERIALS["V"], tables)
+    cache.parse_serial(VALID_SERIALS["T"], tables)  # T is now the most recent
+    cache.parse_serial(VALID_SERIALS["M"], tables)  # evicts V
+    assert cache.info()["size"] == 2
+    misses = cache.info()["misses"]
+    cache.parse_serial(VALID_SERIALS["T"], tables)
+    cache.parse_serial(VALID_SERIALS["V"], tables)
+    assert cache.info()["misses"] == misses + 1
+
+
+def test_new_tables_empty_the_cache(schemas, tables):
+    from smiley_identifier import compile_schemas
+
+    cache = DecodeCache()
+    cache.parse_serial(VALID_SERIALS["T"], tables)
+    cache.parse_serial(VALID_SERIALS["T"], compile_schemas(schemas))
+    assert cache.info()["hits"] == 0 and cache.info()["size"] == 1
+    cache.clear()
+    assert cache.info()["size"] == cache.info()["misses"] == 0
+
+
+def test_decoder_replaces_the_parser_on_a_miss(tables):
+    calls = []
+
+    def decoder(serial, tables):
+        calls.append(serial)
+        return parser.parse_serial_partial(serial, tables)
+
+    cache = DecodeCache()
+    for serial in ["2107", "2107T", "2107"]:
+        cache.parse_serial_partial(serial, tables, decoder=decoder)
+    assert calls == ["2107", "2107T"]
+
@@ -0,0 +1,62 @@
+import csv
+import io
+import json
+import subprocess
+import sys
+
+from conftest import ROOT
+from smiley_identifier import cli
+from smiley_identifier.bulk import OUTPUT_COLUMNS, decode_chunk
+from smiley_identifier.parser import parse_serial_partial
+from smiley_identifier.service import decode_one
+
+LINES = ["2107t410000042\n", "\n", "  2107T430000042  \n", "1807AA0042"]
+SERIALS = ["2107T410000042", "2107T430000042", "1807AA0042"]
+
+
+def test_ndjson_matches_the_service(default_schema):
+    out = io.StringIO()
+    assert cli.decode_lines(LINES, out) == (3, 1)
+    assert [json.loads(line) for line in out.getvalue().splitlines()] == [decode_one(serial) for serial in SERIALS]
+
+
+def test_csv_matches_the_bulk_decoder(default_schema):
+    out = io.StringIO()
+    cli.decode_lines(LINES, out, fmt="csv")
+    assert list(csv.reader(io.StringIO(out.getvalue()))) == [OUTPUT_COLUMNS] + decode_chunk(SERIALS)
+
+
+def test_partial_and_suggestions(default_schema):
+    out = io.StringIO()
+    cli.decode_lines(["2107T4", "2107T9"], out, partial=True, suggestions=True)
+    first, second = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert first["result"] == parse_serial_partial("2107T4")[0] and first["suggestions"] == []
+    assert second["errors"] and second["suggestions"]
+
+
+def test_each_serial_is_written_before_the_next_line_is_read(default_schema):
+    out = io.StringIO()
+
+    def lines():
+        # Records written before each line is read; the blank line writes nothing
+        for written, line in zip([0, 1, 1, 2], LINES):
+            assert out.getvalue().count("\n") == written
+            yield line
+
+    cli.decode_lines(lines(), out, line_buffered=True)
+
+
+def test_pool_keeps_input_order(default_schema, corpus):
+    serials = [serial for serial in corpus[:500] if serial]
+    out = io.StringIO()
+    cli.decode_lines([serial + "\n" for serial in serials], out, fmt="csv", jobs=2, chunk_size=40)
+    assert list(csv.reader(io.StringIO(out.getvalue())))[1:] == decode_chunk(serials)
+
+
+def test_stdin_to_stdout():
+    done = subprocess.run(
+        [sys.executable, "-m", "smiley_identifier", "--format", "csv"],
+        input="".join(LINES), capture_output=True, text=True, cwd=ROOT, check=True,
+    )
+    assert [row[0] for row in csv.reader(io.StringIO(done.stdout))] == ["serial"] + SERIALS
+    assert "Decoded 3 serials (1 with errors)" in done.stderr
@@ -0,0 +1,121 @@
+import random
+
+import pytest
+
+from smiley_identifier.fleet import FleetIndex, build_index, main
+from smiley_identifier.result import decode_serial
+
+
+@pytest.fixture(scope="module")
+def corpus(corpus):
+    """The shared corpus with build dates spread over 2017-2024, every week."""
+    rng = random.Random(1)
+    return [f"{rng.randint(17, 24):02d}{rng.randint(1, 52):02d}{serial[4:]}" if len(serial) >= 4 else serial for serial in corpus]
+
+
+@pytest.fixture
+def fleet(tmp_path, tables, corpus):
+    index = FleetIndex(str(tmp_path / "fleet.db"), tables)
+    index.add(corpus, chunk_size=500)
+    index.create_indexes()
+    yield index
+    index.close()
+
+
+def _clean(tables, corpus):
+    decoded = (decode_serial(serial, tables) for serial in set(corpus))
+    return sorted(d.serial for d in decoded if d.ok and d.table is not None)
+
+
+def _built(serial):
+    return 2000 + int(serial[0:2]), int(serial[2:4])
+
+
+def test_indexes_each_clean_serial_once(fleet, tables, corpus):
+    clean = _clean(tables, corpus)
+    assert len(fleet) == len(clean)
+    assert sorted(fleet.search(limit=len(corpus))) == clean
+    assert sum(fleet.type_counts().values()) == len(clean)
+    # Adding the same serials again indexes nothing new
+    assert fleet.add(corpus[:100]) == (0, 100)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        dict(family="SmileyTouch"),
+        dict(type_code=["V", "X"]),
+        dict(year=2021),
+        dict(year=(2020, 2022)),
+        dict(week="10-30"),
+        dict(year="2019-2021", week=(5, 20)),
+        dict(family="SmileyTouch", year=2021, week=(10, 30), generation="4", network="1"),
+        dict(family="SmileyTerminal", changelog=["01", "02"]),
+        dict(type_code="A", changelog="AA"),
+    ],
+)
+def test_search_matches_a_scan(fleet, tables, corpus, query):
+    def matches(serial):
+        table = tables[serial[4]]
+        year, week = _built(serial)
+        if "family" in query and table.family != query["family"]:
+            return False
+        if "type_code" in query and serial[4] not in query["type_code"]:
+            return False
+        if "year" in query:
+            low, high = _bounds(query["year"])
+            if not low <= year <= high:
+                return False
+        if "week" in query:
+            low, high = _bounds(query["week"])
+            if not low <= week <= high:
+                return False
+        codes = {field.key: serial[field.start:field.stop] for field in table.fields if field.key is not None}
+        for key in ("generation", "network", "radio", "hardware", "changelog"):
+            if key in query and codes.get(key) not in ([query[key]] if isinstance(query[key], str) else query[key]):
+                return False
+        return True
+
+    expected = [serial for serial in _clean(tables, corpus) if matches(serial)]
+    assert expected, "the query should match part of the corpus"
+    assert sorted(fleet.search(limit=len(corpus), **query)) == expected
+    assert fleet.count(**query) == len(expected)
+
+
+def _bounds(value):
+    if isinstance(value, int):
+        return value, value
+    if isinstance(value, str):
+        low, _, high = value.partition("-")
+        return int(low), int(high)
+    return value
+
+
+def test_week_range_applies_to_every_year(fleet):
+    # 2020 week 40 is inside 2020-2021 as a span, but outside weeks 10-30
+    serials = fleet.search(limit=10000, year=(2020, 2021), week=(10, 30))
+    assert serials and all(10 <= _built(serial)[1] <= 30 for serial in serials)
+
+
+def test_search_paging(fleet):
+    everything = fleet.search(limit=10000, family="SmileyTouch")
+    assert fleet.search(limit=5, offset=3, family="SmileyTouch") == everything[3:8]
+
+
+def test_rejects_unknown_fields_and_families(fleet):
+    with pytest.raises(ValueError, match="Unknown field"):
+        fleet.search(colour="red")
+    with pytest.raises(ValueError, match="Unknown device family"):
+        fleet.count(family="SmileyMaxi")
+
+
+def test_build_and_query_cli(tmp_path, default_schema, capsys):
+    source = tmp_path / "serials.csv"
+    source.write_text("serial\n2107T410000042\n2107T410000043\n2107V130010042\n2107T430000042\n")
+    path = str(tmp_path / "fleet.db")
+    assert build_index(str(source), path)["indexed"] == 3
+
+    assert main(["query", path, "--family", "SmileyTouch", "--year", "2021", "--field", "network=1"]) == 0
+    assert capsys.readouterr().out.split() == ["2107T410000042", "2107T410000043"]
+    assert main(["query", path, "--type", "V", "--count"]) == 0
+    assert capsys.readouterr().out.strip() == "1"
@@ -0,0 +1,23 @@
+"""IncrementalDecoder must give exactly what parse_serial_partial gives, keystroke by keystroke."""
+from smiley_identifier import parser
+from smiley_identifier.incremental import IncrementalDecoder
+
+
+def test_incremental_matches_partial_parser_while_typing(tables, corpus):
+    decoder = IncrementalDecoder(tables)
+    for serial in corpus[:300]:
+        for end in range(len(serial) + 1):
+            assert decoder.decode(serial[:end]) == parser.parse_serial_partial(serial[:end], tables)
+
+
+def test_incremental_handles_edits_and_backspaces(tables, corpus):
+    decoder = IncrementalDecoder(tables)
+    previous = ""
+    for serial in corpus[:300]:
+        # Backspace to a shared prefix, then type the next serial
+        while not serial.startswith(previous):
+            previous = previous[:-1]
+            assert decoder.decode(previous) == parser.parse_serial_partial(previous, tables)
+        assert decoder.decode(serial) == parser.parse_serial_partial(serial, tables)
+        previous = serial
+    assert decoder.reused > 0
@@ -0,0 +1,112 @@
+import pytest
+
+from conftest import VALID_SERIALS
+from smiley_identifier import metrics
+from smiley_identifier.cache import DecodeCache
+from smiley_identifier.incremental import IncrementalDecoder
+from smiley_identifier.suggest import suggest
+
+
+@pytest.fixture
+def recorder(default_schema):
+    recorded = metrics.enable(metrics.DecodeMetrics())
+    try:
+        yield recorded
+    finally:
+        metrics.disable()
+
+
+def _decodes(recorded):
+    return {(row["stage"], row["family"]): (row["decodes"], row["with_errors"]) for row in recorded.snapshot()["families"]}
+
+
+def test_app_lookups_are_recorded_per_family(recorder):
+    # The app's single-serial path: a DecodeCache in front of an IncrementalDecoder
+    cache, decoder = DecodeCache(), IncrementalDecoder()
+    typed = ["2107", "2107T", "2107T41", "2107T410000042", "2107V130010042", "2107T410000042", "2107V930010042"]
+    for serial in typed:
+        cache.parse_serial_partial(serial, decoder=decoder.decode)
+
+    # Cache hits are not decodes; every miss is one, under its own family
+    assert cache.info()["hits"] == 1
+    assert _decodes(recorder) == {
+        ("parse_serial_partial", "(unknown)"): (1, 0),
+        ("parse_serial_partial", "SmileyTerminal"): (2, 1),
+        ("parse_serial_partial", "SmileyTouch"): (3, 0),
+    }
+    assert recorder.snapshot()["stages"]["parse_serial_partial"]["count"] == 6
+
+
+def test_suggest_candidates_are_not_recorded(recorder):
+    assert suggest("2107T430000042")
+    assert suggest("2107T43", partial=True)
+    assert _decodes(recorder) == {}
+
+
+def test_counters_per_family_error_and_lookup(recorder):
+    from smiley_identifier.parser import parse_serial
+
+    for serial in [VALID_SERIALS["T"], VALID_SERIALS["A"], "2107T430000042", "2153T410000042", "2107Q410000042", "21"]:
+        parse_serial(serial)
+
+    snapshot = recorder.snapshot()
+    assert _decodes(recorder) == {
+        ("parse_serial", "(unknown)"): (2, 1),
+        ("parse_serial", "SmileyTouch"): (3, 2),
+        ("parse_serial", "Touch1000"): (1, 0),
+    }
+    assert snapshot["stages"]["parse_serial"]["count"] == 6
+    assert snapshot["stages"]["parse_serial_partial"]["count"] == 0
+    assert {(row["field"], row["code"]): row["errors"] for row in snapshot["errors"]} == {
+        ("radio", "UNKNOWN_CODE"): 1,
+        ("week", "WEEK_RANGE"): 1,
+        ("serial", "FORMAT"): 1,
+    }
+    lookups = {(row["field"], row["outcome"]): row["lookups"] for row in snapshot["lookups"]}
+    assert lookups[("radio", "hit")] == 2 and lookups[("radio", "miss")] == 1
+    assert lookups[("cable", "hit")] == 4
+
+    recorder.reset()
+    assert _decodes(recorder) == {}
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = metrics.Histogram((1.0, 2.0, 4.0))
+    for seconds in (0.5, 1.5, 1.5, 3.0, 10.0):
+        histogram.observe(seconds)
+    assert histogram.cumulative() == [(1.0, 1), (2.0, 3), (4.0, 4), (float("inf"), 5)]
+    assert histogram.quantile(0.5) == pytest.approx(1.75)
+    assert histogram.quantile(1.0) == 4.0  # +Inf bucket: the largest finite bound
+    assert metrics.Histogram().quantile(0.5) == 0.0
+
+
+def test_prometheus_text(recorder):
+    from smiley_identifier.parser import parse_serial
+
+    parse_serial("2107T430000042")
+    text = recorder.to_prometheus()
+    lines = text.splitlines()
+    assert text.endswith("\n")
+    assert "# TYPE smiley_decode_seconds histogram" in lines
+    assert 'smiley_decode_seconds_bucket{stage="parse_serial",le="+Inf"} 1' in lines
+    assert 'smiley_decode_seconds_count{stage="parse_serial_partial"} 0' in lines
+    assert 'smiley_decodes_total{stage="parse_serial",family="SmileyTouch"} 1' in lines
+    assert 'smiley_decode_failures_total{stage="parse_serial",family="SmileyTouch"} 1' in lines
+    assert 'smiley_decode_errors_total{field="radio",code="UNKNOWN_CODE"} 1' in lines
+    assert 'smiley_lookups_total{field="radio",outcome="miss"} 1' in lines
+    # Every sample line is "name{labels} value"
+    for line in lines:
+        if not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            assert name.startswith("smiley_") and float(value) >= 0
+
+
+def test_enable_and_disable():
+    assert metrics.current() is None
+    recorded = metrics.enable()
+    try:
+        assert metrics.current() is recorded
+        assert metrics.enable() is recorded  # enabling again keeps the same recorder
+    finally:
+        assert metrics.disable() is recorded
+    assert metrics.current() is None
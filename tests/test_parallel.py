@@ -0,0 +1,71 @@
+import json
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from conftest import SCHEMA_FILE
+from smiley_identifier import parser
+from smiley_identifier.bulk import OUTPUT_COLUMNS, decode_chunk, iter_chunks
+from smiley_identifier.parallel import decode_parallel, decode_rows_parallel, map_ordered, resolve_jobs
+from smiley_identifier.result import decode_serials
+
+
+def test_resolve_jobs():
+    assert resolve_jobs(3) == 3
+    assert resolve_jobs(0) == resolve_jobs(None) >= 1
+
+
+def test_map_ordered_keeps_order_and_window():
+    running = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def work(item):
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        time.sleep(0.001 * (item % 3))  # finish out of order
+        with lock:
+            running["now"] -= 1
+        return item * 2
+
+    submitted = []
+
+    def items():
+        for item in range(40):
+            submitted.append(item)
+            yield item
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = []
+        for result in map_ordered(executor, work, items(), 4):
+            # Never more than ``window`` tasks ahead of what has been yielded
+            assert len(submitted) - len(results) <= 4
+            results.append(result)
+    assert results == [item * 2 for item in range(40)]
+    assert running["peak"] <= 4
+
+
+def test_decode_parallel_matches_the_parsers(default_schema, corpus):
+    serials = corpus[:400]
+    assert list(decode_parallel(serials, jobs=2, chunk_size=50)) == [parser.parse_serial(s) for s in serials]
+    partial = [serial[:7] for serial in serials]
+    assert list(decode_parallel(partial, jobs=2, chunk_size=50, partial=True)) == [parser.parse_serial_partial(s) for s in partial]
+    assert list(decode_parallel(serials, jobs=2, chunk_size=50, compact=True)) == decode_serials(serials)
+
+
+def test_workers_use_the_parents_schema(default_schema):
+    edited = json.loads(json.dumps(default_schema))
+    edited["SmileyTouch"]["type"]["T"] = "Smiley Touch v2"
+    parser.set_default_schema(edited)
+    device = OUTPUT_COLUMNS.index("device")
+    (rows,) = decode_rows_parallel([["2107T410000042"]], jobs=1)
+    assert rows[0][device] == "Smiley Touch v2"
+    # An explicit schema file wins over the parent's schema
+    (rows,) = decode_rows_parallel([["2107T410000042"]], jobs=1, schema_path=SCHEMA_FILE)
+    assert rows[0][device] == "Smiley Touch"
+
+
+def test_decode_rows_parallel_matches_decode_chunk(default_schema, corpus):
+    chunks = list(iter_chunks(corpus[:600], 100))
+    assert list(decode_rows_parallel(chunks, jobs=2)) == [decode_chunk(chunk) for chunk in chunks]
@@ -0,0 +1,184 @@
+from datetime import date
+
+import pytest
+
+from conftest import VALID_SERIALS
+from smiley_identifier import tables as tables_module
+from smiley_identifier.errors import ErrorCode
+from smiley_identifier.parser import parse_serial, parse_serial_partial
+
+TOUCH_T4100 = {
+    "year": "2021",
+    "week": "07",
+    "sequence": "0042",
+    "generation": "HON-T4100",
+    "network": "LTE",
+    "changelog": "Random USB cables (Zhenfu/Juicebit mix)",
+    "hardware": "SM-T505 - Samsung Galaxy Tab A7 10.4 (2020)",
+    "radio": "10.4 inch 2000x1200 (224ppi), Camera enabled, 7040 mAh, USB-C",
+}
+TERMINAL_V1 = {
+    "schema_name": "YYWWTGRHWDXXXX",
+    "year": "2021",
+    "week": "07",
+    "sequence": "0042",
+    "generation": "Case v1",
+    "radio": "SARA U201",
+    "hardware": "Standard Terminal PCB",
+    "network": "3G JPN",
+    "changelog": "Components as of 1.6.2022",
+}
+
+EXPECTED = {
+    "T": dict(TOUCH_T4100, schema_name="YYWWTGRHWDXXXX", device="Smiley Touch"),
+    "C": dict(TOUCH_T4100, schema_name="YYWWCGRHWDXXXX", device="Smiley Touch (camera hole)"),
+    "A": {
+        "schema_name": "Legacy Schema: YYWWAAXXXX (used late 2017 - early 2019)",
+        "year": "2018",
+        "week": "07",
+        "sequence": "0042",
+        "device": "Smiley Touch - HONT1000",
+        "generation": "SM-T585 - Samsung Galaxy Tab A (2016)",
+        "radio": "Refer to Sharepoint document",
+        "network": "Refer to Sharepoint document",
+        "hardware": "10.1 inch (1920x1200, 224ppi), No Camera, 7300 mAh, micro-USB",
+        "changelog": "Default 1.08m USB cable",
+    },
+    "V": dict(TERMINAL_V1, device="Smiley Terminal (Standard, Table, Rail)"),
+    "X": dict(TERMINAL_V1, device="Smiley Terminal (Wall attachment)"),
+    "M": {
+        "schema_name": "YYWWTGRHWDXXXX",
+        "year": "2021",
+        "week": "07",
+        "sequence": "0042",
+        "device": "Smiley Mini",
+        "generation": "SARA Module PCB Design",
+        "radio": "SARA R410M",
+        "hardware": "Standard Mini PCB",
+        "network": "LTE-M",
+        "changelog": "Components as of 1.6.2022",
+    },
+}
+
+
+def _errors(errors):
+    return [(error.code, error.field, error.value, error.device) for error in errors]
+
+
+@pytest.mark.parametrize("type_code", sorted(VALID_SERIALS))
+def test_valid_serial_per_device_type(tables, type_code):
+    result, errors = parse_serial(VALID_SERIALS[type_code], tables)
+    assert errors == []
+    assert result == EXPECTED[type_code]
+
+
+@pytest.mark.parametrize("type_code", sorted(VALID_SERIALS))
+def test_partial_parser_agrees_on_complete_serials(tables, type_code):
+    result, errors = parse_serial_partial(VALID_SERIALS[type_code], tables)
+    assert errors == []
+    assert result == EXPECTED[type_code]
+
+
+@pytest.mark.parametrize(
+    "serial, expected",
+    [
+        ("", [(ErrorCode.FORMAT, "serial", "", "")]),
+        ("2107T41000", [(ErrorCode.FORMAT, "serial", "", "")]),
+        ("2107T41900042", [(ErrorCode.FORMAT, "serial", "", "")]),
+        ("9907T410000042", [(ErrorCode.YEAR_FUTURE, "year", "99", "")]),
+        ("A107T410000042", [(ErrorCode.YEAR_NOT_NUMERIC, "year", "A1", "")]),
+        ("²107T410000042", [(ErrorCode.YEAR_NOT_NUMERIC, "year", "²1", "")]),
+        ("2153T410000042", [(ErrorCode.WEEK_RANGE, "week", "53", "")]),
+        ("21W7T410000042", [(ErrorCode.WEEK_NOT_NUMERIC, "week", "W7", "")]),
+        ("2107T410000000", [(ErrorCode.SEQUENCE_ZERO, "sequence", "0000", "")]),
+        ("2107T41000004X", [(ErrorCode.SEQUENCE_NOT_NUMERIC, "sequence", "004X", "")]),
+        ("2107T430000042", [(ErrorCode.UNKNOWN_CODE, "radio", "3", "Smiley Touch")]),
+        ("2107T410990042", [(ErrorCode.UNKNOWN_CODE, "cable", "99", "Smiley Touch")]),
+        (
+            "2107T910000042",
+            [
+                (ErrorCode.UNKNOWN_CODE, "generation", "9", "Smiley Touch"),
+                (ErrorCode.UNKNOWN_CODE, "model", "9", "Smiley Touch"),
+                (ErrorCode.UNKNOWN_CODE, "specifications", "9", "Smiley Touch"),
+            ],
+        ),
+        (
+            "2107M170050042",
+            [
+                (ErrorCode.UNKNOWN_CODE, "radio", "7", "Smiley Mini"),
+                (ErrorCode.UNKNOWN_CODE, "network", "7", "Smiley Mini"),
+                (ErrorCode.UNKNOWN_CODE, "hardware", "05", "Smiley Mini"),
+            ],
+        ),
+        ("1807AZ0042", [(ErrorCode.UNKNOWN_CODE, "cable", "AZ", "Touch1000")]),
+    ],
+)
+def test_error_paths(tables, serial, expected):
+    result, errors = parse_serial(serial, tables)
+    assert _errors(errors) == expected
+    # Failed fields hold their error
+    for error in errors:
+        if error.code is not ErrorCode.FORMAT:
+            assert error in result.values()
+
+
+def test_unknown_type_code_only_checks_date_and_number(tables):
+    assert parse_serial("2107Q410000042", tables) == ({}, [])
+    assert _errors(parse_serial("2153Q410000042", tables)[1]) == [(ErrorCode.WEEK_RANGE, "week", "53", "")]
+
+
+def test_error_messages(tables):
+    _, errors = parse_serial("2107T410990042", tables)
+    assert [error.message for error in errors] == ["Invalid cable code '99' for Smiley Touch"]
+
+
+@pytest.mark.parametrize(
+    "serial, keys, expected",
+    [
+        ("2", [], [(ErrorCode.FORMAT, "serial", "", "")]),
+        ("AB", ["year"], [(ErrorCode.YEAR_NOT_NUMERIC, "year", "AB", "")]),
+        ("21", ["year"], []),
+        ("2199", ["year", "week"], [(ErrorCode.WEEK_RANGE, "week", "99", "")]),
+        ("2107Q4", ["year", "week"], []),
+        ("2107T", ["year", "week", "device", "schema_name"], []),
+        (
+            "2107T9",
+            ["year", "week", "device", "schema_name", "generation", "radio"],
+            [
+                (ErrorCode.UNKNOWN_CODE, "generation", "9", "Smiley Touch"),
+                (ErrorCode.UNKNOWN_CODE, "specifications", "9", "Smiley Touch"),
+            ],
+        ),
+        (
+            "2107T49",
+            ["year", "week", "device", "schema_name", "generation", "network", "radio"],
+            [(ErrorCode.UNKNOWN_CODE, "radio", "9", "Smiley Touch")],
+        ),
+        (
+            "2107T410000000",
+            ["year", "week", "device", "schema_name", "generation", "network", "hardware", "changelog", "radio", "sequence"],
+            [(ErrorCode.SEQUENCE_ZERO, "sequence", "0000", "")],
+        ),
+        (
+            "1807A",
+            ["year", "week", "device", "schema_name", "generation", "radio", "network", "hardware"],
+            [],
+        ),
+    ],
+)
+def test_partial_serials(tables, serial, keys, expected):
+    result, errors = parse_serial_partial(serial, tables)
+    assert list(result) == keys
+    assert _errors(errors) == expected
+
+
+def test_partial_legacy_schema_name_placeholder(tables):
+    result, _ = parse_serial_partial("1807A", tables)
+    assert result["schema_name"] == "Legacy Schema: YYWWA•XXXX (used late 2017 - early 2019)"
+
+
+def test_year_codes_refresh_when_the_day_ends(monkeypatch):
+    monkeypatch.setattr(tables_module, "_today_codes", (0.0, {}))  # expired at the epoch
+    codes = tables_module.current_year_codes()
+    assert codes == tables_module.year_codes(date.today().year)
+    assert tables_module.current_year_codes() is codes
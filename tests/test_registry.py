@@ -0,0 +1,128 @@
+import json
+import os
+
+import pytest
+
+from conftest import SCHEMA_FILE
+from smiley_identifier import registry
+from smiley_identifier.registry import SchemaError, SchemaRegistry, schema_digest, validate_schemas
+
+
+def _write(path, schemas):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(schemas, f, ensure_ascii=False)
+    # Make sure check() sees a new signature even within one mtime tick
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def _edited(schemas, label):
+    edited = json.loads(json.dumps(schemas))
+    edited["SmileyTouch"]["type"]["T"] = label
+    return edited
+
+
+@pytest.fixture
+def schema_file(tmp_path, schemas):
+    path = str(tmp_path / "schemas.json")
+    _write(path, schemas)
+    return path
+
+
+@pytest.fixture
+def week(monkeypatch):
+    """Set the registry's idea of the current build week."""
+    current = {"week": 202201}
+    monkeypatch.setattr(registry, "this_week", lambda: current["week"])
+    return current
+
+
+# --- Validation ---
+def test_repository_schema_is_valid(schemas):
+    assert validate_schemas(schemas) == []
+
+
+@pytest.mark.parametrize(
+    "edit, problem",
+    [
+        (lambda s: s.pop("SmileyMini"), None),
+        (lambda s: s.update(Unknown={}), "Unknown: unknown family"),
+        (lambda s: s["SmileyTouch"].pop("radio"), "SmileyTouch: missing section 'radio'"),
+        (lambda s: s["SmileyTouch"]["radio"].update({"12": "x"}), "SmileyTouch.radio: code '12' must be 1 character(s)"),
+        (lambda s: s["SmileyTouch"]["radio"].update({"5": 5}), "SmileyTouch.radio: expected an object of code -> text"),
+        (lambda s: s["SmileyMini"]["type"].update(T="x"), "type code 'T' is used by both"),
+    ],
+)
+def test_validation_problems(schemas, edit, problem):
+    edited = json.loads(json.dumps(schemas))
+    edit(edited)
+    problems = validate_schemas(edited)
+    if problem is None:
+        assert problems == []
+    else:
+        assert any(p.startswith(problem) for p in problems), problems
+
+
+def test_invalid_edit_keeps_current_version(schema_file, schemas, week):
+    reg = SchemaRegistry(schema_file)
+    broken = json.loads(json.dumps(schemas))
+    broken["SmileyTouch"]["radio"]["12"] = "too wide"
+    _write(schema_file, broken)
+    assert reg.check() is False
+    assert "SmileyTouch.radio" in reg.last_error
+    assert reg.current.digest == schema_digest(schemas)
+    with pytest.raises(SchemaError):
+        reg.reload()
+
+
+def test_cli_validates_files(tmp_path, capsys):
+    bad = tmp_path / "bad.json"
+    bad.write_text('{"SmileyTouch": {}}')
+    assert registry.main([SCHEMA_FILE]) == 0
+    assert registry.main([str(bad)]) == 1
+    assert "missing section" in capsys.readouterr().err
+
+
+# --- Versions ---
+def test_as_built_decoding_picks_the_version_of_the_build_week(schema_file, schemas, week):
+    reg = SchemaRegistry(schema_file)
+    assert reg.current.effective == 0
+    _write(schema_file, _edited(schemas, "Smiley Touch v2"))
+    assert reg.check() is True
+    assert [(v.version, v.effective) for v in reg.versions] == [(1, 0), (2, 202201)]
+
+    assert reg.parse_serial("2152T410000042")[0]["device"] == "Smiley Touch"
+    assert reg.parse_serial("2201T410000042")[0]["device"] == "Smiley Touch v2"
+    assert reg.parse_serial("2152T410000042", as_built=False)[0]["device"] == "Smiley Touch v2"
+    assert reg.for_build(0) is reg.get(1)
+    assert reg.get(reg.current.digest) is reg.current
+    with pytest.raises(KeyError):
+        reg.get(3)
+
+
+def test_reverted_edit_applies_from_the_revert(schema_file, schemas, week):
+    reg = SchemaRegistry(schema_file)
+    _write(schema_file, _edited(schemas, "Smiley Touch v2"))
+    reg.check()
+    week["week"] = 202210
+    _write(schema_file, schemas)
+    assert reg.check() is True
+
+    assert reg.current.version == 3 and reg.current.digest == reg.get(1).digest
+    assert reg.parse_serial("2205T410000042")[0]["device"] == "Smiley Touch v2"
+    assert reg.parse_serial("2210T410000042")[0]["device"] == "Smiley Touch"
+
+
+def test_history_restores_versions(tmp_path, schema_file, schemas, week):
+    history = str(tmp_path / "history")
+    reg = SchemaRegistry(schema_file, history=history)
+    _write(schema_file, _edited(schemas, "Smiley Touch v2"))
+    reg.check()
+    assert sorted(os.listdir(history)) == [
+        f"000000-{schema_digest(schemas)}.json",
+        f"202201-{reg.current.digest}.json",
+    ]
+
+    restored = SchemaRegistry(schema_file, history=history)
+    assert [(v.digest, v.effective) for v in restored.versions] == [(v.digest, v.effective) for v in reg.versions]
+    assert restored.parse_serial("2152T410000042")[0]["device"] == "Smiley Touch"
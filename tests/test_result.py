@@ -0,0 +1,41 @@
+import pickle
+
+import pytest
+
+from conftest import VALID_SERIALS
+from smiley_identifier.parser import parse_serial, parse_serial_partial
+from smiley_identifier.result import DecodedSerial, decode_serial, decode_serials
+
+KEYS = ["schema_name", "year", "week", "sequence", "device", "generation", "radio", "network", "hardware", "changelog"]
+
+
+@pytest.mark.parametrize("partial", [False, True])
+def test_fields_match_the_parser(tables, corpus, partial):
+    parse = parse_serial_partial if partial else parse_serial
+    prefixes = [serial[:end] for serial in corpus[:300] for end in range(len(serial) + 1)] if partial else corpus
+    for serial in prefixes:
+        result, errors = parse(serial, tables)
+        decoded = decode_serial(serial, tables, partial)
+        assert decoded.ok == (not errors)
+        assert decoded.to_dict() == result
+        for key in KEYS:
+            assert decoded.get(key, "missing") == result.get(key, "missing"), (serial, key)
+            if key not in result:
+                with pytest.raises(KeyError):
+                    decoded[key]
+
+
+def test_codes_and_type(tables):
+    decoded = decode_serial(VALID_SERIALS["T"], tables)
+    assert (decoded.type_code, decoded.family) == ("T", "SmileyTouch")
+    assert [decoded.code(key) for key in ("year", "week", "sequence", "changelog", "network")] == ["21", "07", "0042", "00", "1"]
+    assert decode_serial("21", tables).table is None
+
+
+def test_compact_and_picklable(tables):
+    decoded = decode_serials(VALID_SERIALS.values(), tables)
+    assert all(d.ok for d in decoded)
+    assert not hasattr(decoded[0], "__dict__")
+    copy = pickle.loads(pickle.dumps(decoded[0]))
+    assert copy == decoded[0] and hash(copy) == hash(decoded[0])
+    assert DecodedSerial("2107T430000042", parse_serial("2107T430000042", tables)[1]) != decoded[0]
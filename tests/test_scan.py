@@ -0,0 +1,66 @@
+import pytest
+
+from smiley_identifier import scan
+from smiley_identifier.parser import parse_serial
+
+
+@pytest.mark.parametrize(
+    "texts, serial",
+    [
+        (["2107T410000042"], "2107T410000042"),
+        (["S/N: 2107 T410 0000 42\n"], "2107T410000042"),        # spaced out on the label
+        (["LOT 2107Q4100000", "2107v130010042"], "2107V130010042"),  # unknown type code skipped
+        (["1807AA0042 ref 20210101"], "1807AA0042"),
+        (["2107T430000042", "2107T410000042"], "2107T410000042"),  # the token that decodes wins
+        (["2107T430000042"], "2107T430000042"),                  # else the first token
+        (["no serial here", ""], None),
+    ],
+)
+def test_extract_serial(tables, texts, serial):
+    found, result, errors = scan.extract_serial(texts, tables)
+    assert found == serial
+    assert (result, errors) == (parse_serial(serial, tables) if serial else ({}, []))
+
+
+def test_extract_serial_parses_each_token_once(tables, monkeypatch):
+    calls = []
+    monkeypatch.setattr(scan.parser, "parse_serial", lambda serial, tables: calls.append(serial) or parse_serial(serial, tables))
+    scan.extract_serial(["2107T430000042 2107T430000042", "2107T430000042"], tables)
+    assert calls == ["2107T430000042"]
+
+
+@pytest.fixture
+def labels(tmp_path):
+    zxingcpp = pytest.importorskip("zxingcpp")
+    from PIL import Image, ImageOps
+
+    def write(name, text):
+        code = zxingcpp.create_barcode(text, zxingcpp.BarcodeFormat.QRCode).to_image(scale=4)
+        ImageOps.expand(Image.fromarray(code), 40, fill=255).save(tmp_path / name)
+
+    write("a.png", "2107T410000042")
+    write("b.png", "SN 2107T430000042")
+    (tmp_path / "c.png").write_bytes(b"not an image")
+    return tmp_path
+
+
+def test_read_label_records_the_parse_stage(labels, default_schema):
+    record = scan.read_label(str(labels / "a.png"))
+    assert (record["method"], record["serial"], record["errors"]) == ("barcode", "2107T410000042", [])
+    assert record["result"] == parse_serial("2107T410000042")[0]
+    assert set(record["timings"]) == set(scan.STAGES) and record["timings"]["parse"] > 0
+
+
+def test_scan_directory_rows(labels, default_schema):
+    records = list(scan.scan_directory(str(labels)))
+    rows = [scan.record_row(record) for record in records]
+    assert [row[:3] for row in rows] == [
+        [str(labels / "a.png"), "barcode", "2107T410000042"],
+        [str(labels / "b.png"), "barcode", "2107T430000042"],
+        [str(labels / "c.png"), "", ""],
+    ]
+    errors = scan.OUTPUT_COLUMNS.index("errors")
+    assert rows[1][errors] == "Invalid radio code '3' for Smiley Touch"
+    assert rows[1][errors + 1]  # a suggestion
+    assert rows[2][errors].startswith("Could not read image")
+    assert "bottleneck" in scan.timing_summary([record["timings"] for record in records], 1.0)
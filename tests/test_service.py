@@ -0,0 +1,124 @@
+import asyncio
+import json
+
+import pytest
+
+from smiley_identifier import service
+from smiley_identifier.parser import parse_serial, parse_serial_partial
+
+
+def _call(app, method, path, body=b"", content_type="application/json", query=b""):
+    """Run one HTTP request through the ASGI app; returns (status, headers, body)."""
+    sent = []
+    chunks = [body[i:i + 1000] for i in range(0, len(body), 1000)] or [b""]
+
+    async def receive():
+        chunk = chunks.pop(0)
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query,
+        "headers": [(b"content-type", content_type.encode())],
+    }
+    asyncio.run(app(scope, receive, send))
+    start, response = sent
+    return start["status"], dict(start["headers"]), response["body"]
+
+
+@pytest.fixture
+def app(tables):
+    return service.create_app(tables)
+
+
+def test_decode_one(app, tables):
+    status, headers, body = _call(app, "GET", "/decode/2107t430000042")
+    assert status == 200 and headers[b"content-type"] == b"application/json"
+    decoded = json.loads(body)
+    result, errors = parse_serial("2107T430000042", tables)
+    assert decoded["serial"] == "2107T430000042"
+    assert decoded["result"]["device"] == result["device"]
+    assert decoded["errors"] == [error.to_dict() for error in errors]
+    assert decoded["errors"][0]["code"] == "UNKNOWN_CODE"
+
+
+def test_decode_partial(app, tables):
+    _, _, body = _call(app, "GET", "/decode/2107T4", query=b"partial=1")
+    result, errors = parse_serial_partial("2107T4", tables)
+    assert json.loads(body) == {"serial": "2107T4", "result": result, "errors": []}
+
+
+def test_batch_json_and_ndjson_agree(app):
+    serials = ["2107T410000042", "2107V930010042", "1807AA0042"]
+    status, _, body = _call(app, "POST", "/decode/batch", json.dumps({"serials": serials}).encode())
+    assert status == 200
+    as_json = json.loads(body)
+    assert [item["serial"] for item in as_json] == serials
+
+    # NDJSON lines may be bare serials or JSON strings; blank lines are skipped
+    lines = '2107T410000042\n"2107V930010042"\n\n1807AA0042\n'.encode()
+    status, headers, body = _call(app, "POST", "/decode/batch", lines, "application/x-ndjson")
+    assert status == 200 and headers[b"content-type"] == b"application/x-ndjson"
+    assert [json.loads(line) for line in body.splitlines()] == as_json
+
+
+def test_large_batch_is_decoded_off_the_event_loop(app):
+    serials = ["2107T410000042"] * (service.INLINE_BATCH_SIZE + 1)
+    status, _, body = _call(app, "POST", "/decode/batch", json.dumps(serials).encode())
+    assert status == 200 and len(json.loads(body)) == len(serials)
+
+
+@pytest.mark.parametrize(
+    "method, path, body, status",
+    [
+        ("POST", "/decode/2107T410000042", b"", 405),
+        ("GET", "/decode/batch", b"", 405),
+        ("POST", "/decode/batch", b"not json", 400),
+        ("POST", "/decode/batch", b'{"serials": [1, 2]}', 400),
+        ("POST", "/decode/batch", b"\xff\xfe", 400),
+        ("GET", "/nowhere", b"", 404),
+        ("GET", "/assets/../schemas.json", b"", 404),
+    ],
+)
+def test_error_codes(app, method, path, body, status):
+    got, _, response = _call(app, method, path, body)
+    assert got == status
+    assert "error" in json.loads(response)
+
+
+def test_batch_limits(app, monkeypatch):
+    monkeypatch.setattr(service, "MAX_BATCH_SIZE", 2)
+    status, _, _ = _call(app, "POST", "/decode/batch", b'["a", "b", "c"]')
+    assert status == 413
+    monkeypatch.setattr(service, "MAX_BODY_BYTES", 1500)
+    status, _, _ = _call(app, "POST", "/decode/batch", json.dumps(["2107T410000042"] * 200).encode())
+    assert status == 413
+
+
+def test_metrics_count_requests(app):
+    _call(app, "GET", "/decode/2107T410000042")
+    _call(app, "POST", "/decode/batch", b'["2107T410000042", "2107T410000043"]')
+    _call(app, "GET", "/nowhere")
+
+    status, _, body = _call(app, "GET", "/metrics")
+    snapshot = json.loads(body)
+    assert snapshot["serials_decoded"] == 3
+    assert snapshot["requests"] == {"/decode/{serial}": 1, "/decode/batch": 1, "(unmatched)": 1}
+    assert snapshot["errors"] == {"(unmatched)": 1}
+    assert set(snapshot["latency"]["/decode/batch"]) == {"samples", "p50_ms", "p99_ms", "max_ms"}
+
+    status, headers, body = _call(app, "GET", "/metrics/prometheus")
+    lines = body.decode().splitlines()
+    assert headers[b"content-type"].startswith(b"text/plain; version=0.0.4")
+    assert 'smiley_http_requests_total{route="/decode/batch"} 1' in lines
+    assert "smiley_http_serials_decoded_total 3" in lines
+
+
+def test_health(app):
+    status, _, body = _call(app, "GET", "/health")
+    assert (status, json.loads(body)) == (200, {"status": "ok"})
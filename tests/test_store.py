@@ -0,0 +1,106 @@
+"""ResultStore must serve exactly what bulk.decode_chunk gives, for the schema version in use."""
+import json
+
+from smiley_identifier import parser
+from smiley_identifier.bulk import OUTPUT_COLUMNS, decode_chunk, iter_chunks
+from smiley_identifier.store import ResultStore
+
+
+def test_store_matches_decode_chunk(tmp_path, default_schema, corpus):
+    expected = decode_chunk(corpus)
+    store = ResultStore(str(tmp_path / "results.db"))
+    counts = {"lookups": 0, "duplicates": 0, "hits": 0, "misses": 0}
+    first = [row for chunk in store.decode_chunks(iter_chunks(corpus, 300), counts=counts) for row in chunk]
+    assert first == expected
+    unique_per_chunk = sum(len(set(chunk)) for chunk in iter_chunks(corpus, 300))
+    assert counts["lookups"] == len(corpus)
+    assert counts["duplicates"] == len(corpus) - unique_per_chunk
+    assert counts["hits"] + counts["misses"] == unique_per_chunk
+    assert len(store) == len(set(corpus))
+
+    # A second run is served from the store and decodes nothing
+    counts = dict.fromkeys(counts, 0)
+    second = [row for chunk in store.decode_chunks(iter_chunks(corpus, 300), counts=counts) for row in chunk]
+    assert second == expected
+    assert counts["misses"] == 0
+    store.close()
+
+
+def test_store_parallel_matches_decode_chunk(tmp_path, default_schema, corpus):
+    serials = corpus[:600]
+    store = ResultStore(str(tmp_path / "results.db"))
+    rows = [row for chunk in store.decode_chunks(iter_chunks(serials, 100), jobs=2) for row in chunk]
+    assert rows == decode_chunk(serials)
+    store.close()
+
+
+def test_store_invalidates_on_schema_change(tmp_path, default_schema):
+    edited = json.loads(json.dumps(default_schema))
+    edited["SmileyTouch"]["type"]["T"] = "Smiley Touch v2"
+    path = str(tmp_path / "results.db")
+    serials = ["2107T410000042", "2107V130010042"]
+
+    store = ResultStore(path)
+    list(store.decode_chunks([serials]))
+    parser.set_default_schema(edited)
+    counts = {"lookups": 0, "duplicates": 0, "hits": 0, "misses": 0}
+    (rows,) = store.decode_chunks([serials], counts=counts)
+    assert counts["misses"] == 2
+    assert rows[0][OUTPUT_COLUMNS.index("device")] == "Smiley Touch v2"
+    store.close()
+
+    # Rows of both versions are kept until pruned
+    parser.set_default_schema(default_schema)
+    store = ResultStore(path)
+    assert len(store) == 4
+    assert store.prune() == 2
+    counts = dict.fromkeys(counts, 0)
+    (rows,) = store.decode_chunks([serials], counts=counts)
+    assert counts["hits"] == 2
+    assert rows[0][OUTPUT_COLUMNS.index("device")] == "Smiley Touch"
+    store.close()
+
+
+def test_store_drops_rows_decoded_before_a_schema_change(tmp_path, default_schema):
+    edited = json.loads(json.dumps(default_schema))
+    edited["SmileyTouch"]["type"]["T"] = "Smiley Touch v2"
+    store = ResultStore(str(tmp_path / "results.db"))
+
+    def chunks():
+        yield ["2107T410000042"]
+        # The first chunk is still on the pool when the schema changes
+        parser.set_default_schema(edited)
+        yield ["2107T410000043"]
+
+    (first,), (second,) = store.decode_chunks(chunks(), jobs=2)
+    device = OUTPUT_COLUMNS.index("device")
+    assert (first[device], second[device]) == ("Smiley Touch", "Smiley Touch v2")
+    # Only the row decoded under the current schema was stored
+    counts = {"lookups": 0, "duplicates": 0, "hits": 0, "misses": 0}
+    (rows,) = store.decode_chunks([["2107T410000042", "2107T410000043"]], counts=counts)
+    assert (counts["hits"], counts["misses"]) == (1, 1)
+    assert [row[device] for row in rows] == ["Smiley Touch v2", "Smiley Touch v2"]
+    store.close()
+
+
+def test_stores_on_different_schemas_share_a_file(tmp_path, default_schema):
+    edited = json.loads(json.dumps(default_schema))
+    edited["SmileyTouch"]["type"]["T"] = "Smiley Touch v2"
+    path = str(tmp_path / "results.db")
+    serials = ["2107T410000042", "2107V130010042"]
+    device = OUTPUT_COLUMNS.index("device")
+
+    def run():
+        counts = dict.fromkeys(("lookups", "duplicates", "hits", "misses"), 0)
+        (rows,) = ResultStore(path).decode_chunks([serials], counts=counts)
+        return rows[0][device], counts["hits"]
+
+    # Two processes alternating, one on each schema: neither wipes the other's rows
+    assert run() == ("Smiley Touch", 0)
+    parser.set_default_schema(edited)
+    assert run() == ("Smiley Touch v2", 0)
+    parser.set_default_schema(default_schema)
+    assert run() == ("Smiley Touch", 2)
+    parser.set_default_schema(edited)
+    assert run() == ("Smiley Touch v2", 2)
+    assert len(ResultStore(path)) == 4
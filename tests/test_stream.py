@@ -0,0 +1,83 @@
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate, takewhile
+
+import pytest
+
+from smiley_identifier import parser
+from smiley_identifier.stream import decode_stream
+
+
+async def _collect(source, **options):
+    return [decoded async for decoded in decode_stream(source, **options)]
+
+
+def test_results_in_input_order(default_schema, corpus):
+    serials = [serial for serial in corpus if serial]  # blank lines are skipped
+
+    async def source():
+        for i, serial in enumerate(serials):
+            if i % 97 == 0:
+                await asyncio.sleep(0.001)  # let partial batches time out
+            yield serial
+
+    decoded = asyncio.run(_collect(source(), batch_size=64, max_wait=0.0005, concurrency=3))
+    assert decoded == [(serial, *parser.parse_serial(serial)) for serial in serials]
+
+
+def test_cleans_lines_and_skips_blanks(default_schema):
+    lines = [b"2107t410000042\n", "  \n", " 2107V130010042 ", b""]
+    decoded = asyncio.run(_collect(lines, partial=True))
+    assert [serial for serial, _, _ in decoded] == ["2107T410000042", "2107V130010042"]
+    assert decoded[0][1:] == parser.parse_serial_partial("2107T410000042")
+
+
+def test_source_errors_propagate(default_schema):
+    async def source():
+        yield "2107T410000042"
+        raise OSError("connection reset")
+
+    with pytest.raises(OSError, match="connection reset"):
+        asyncio.run(_collect(source()))
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """Records the size of every batch submitted (from the event loop thread)."""
+
+    def __init__(self):
+        super().__init__(max_workers=2)
+        self.sizes = []
+
+    def submit(self, fn, serials, *args):
+        self.sizes.append(len(serials))
+        return super().submit(fn, serials, *args)
+
+
+def test_backpressure_bounds_serials_held(default_schema, corpus):
+    batch_size, concurrency = 20, 3
+    serials = [serial for serial in corpus if serial][:1000]
+    executor = CountingExecutor()
+    state = {"read": 0, "yielded": 0, "lead": 0, "outstanding": 0}
+
+    async def source():
+        for serial in serials:
+            state["read"] += 1
+            state["lead"] = max(state["lead"], state["read"] - state["yielded"])
+            yield serial
+
+    async def slow_consumer():
+        async for _ in decode_stream(
+            source(), batch_size=batch_size, max_wait=0.01, concurrency=concurrency, executor=executor
+        ):
+            # Batches submitted but not completely yielded yet
+            finished = len(list(takewhile(lambda total: total <= state["yielded"], accumulate(executor.sizes))))
+            state["outstanding"] = max(state["outstanding"], len(executor.sizes) - finished)
+            state["yielded"] += 1
+            await asyncio.sleep(0.0002)
+
+    with executor:
+        asyncio.run(slow_consumer())
+    assert state["yielded"] == 1000
+    assert state["outstanding"] <= concurrency
+    assert state["lead"] <= (concurrency + 2) * batch_size
@@ -0,0 +1,98 @@
+import random
+
+import pytest
+
+from conftest import ALPHABET, VALID_SERIALS
+from smiley_identifier.parser import parse_serial, parse_serial_partial
+from smiley_identifier.suggest import TOO_FAR, SerialCorrector, _distance, _edits
+
+
+def _osa(a, b):
+    """Reference optimal string alignment distance (full table)."""
+    d = [[i + j if i == 0 or j == 0 else 0 for j in range(len(b) + 1)] for i in range(len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            d[i][j] = min(d[i - 1][j] + 1, d[i][j - 1] + 1, d[i - 1][j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                d[i][j] = min(d[i][j], d[i - 2][j - 2] + 1)
+    return d[-1][-1]
+
+
+@pytest.fixture(scope="module")
+def corrector(tables):
+    return SerialCorrector(tables)
+
+
+def test_distance_matches_reference():
+    rng = random.Random(0)
+    for _ in range(2000):
+        a = "".join(rng.choice(ALPHABET[:6]) for _ in range(rng.randint(0, 6)))
+        b = "".join(rng.choice(ALPHABET[:6]) for _ in range(rng.randint(0, 6)))
+        expected = _osa(a, b)
+        cost = _distance(a, b, 2)
+        assert (cost == TOO_FAR) == (expected > 2), (a, b)
+        if expected <= 2:
+            assert _edits(cost) == expected, (a, b)
+
+
+def test_lookalike_substitutions_rank_first():
+    # Same number of edits, but O for 0 is the likelier slip
+    assert _distance("21O7", "2107", 1) < _distance("2117", "2107", 1)
+    assert _edits(_distance("21O7", "2107", 1)) == 1
+
+
+@pytest.mark.parametrize("type_code", sorted(VALID_SERIALS))
+def test_valid_serial_is_its_own_only_match(corrector, type_code):
+    serial = VALID_SERIALS[type_code]
+    assert corrector.suggest(serial) == [(serial, 0)]
+
+
+@pytest.mark.parametrize(
+    "typed, expected",
+    [
+        ("21O7T410000042", "2107T410000042"),    # look-alike letter
+        ("2107T41000O042", "2107T410000042"),    # look-alike in the device number
+        ("2107T401000042", "2107T410000042"),    # swapped neighbours
+    ],
+)
+def test_suggests_the_intended_serial_first(corrector, typed, expected):
+    assert corrector.suggest(typed)[0] == (expected, 1)
+
+
+def test_extra_characters_are_dropped(corrector):
+    # Which zero was doubled cannot be told, so every way of dropping one is offered
+    assert corrector.suggest("2107T4100000042") == [
+        ("2107T410000002", 1),
+        ("2107T410000004", 1),
+        ("2107T410000042", 1),
+    ]
+    assert ("1807AA0042", 1) in corrector.suggest("1807AA00042")
+
+
+def test_input_is_normalised(corrector):
+    assert corrector.suggest("2107-v130010042 ") == [("2107V130010042", 0)]
+
+
+def test_suggestions_are_valid_and_equally_near(corrector, corpus):
+    for typed in corpus[:200]:
+        suggestions = corrector.suggest(typed, limit=5)
+        assert len(suggestions) <= 5
+        assert len({distance for _, distance in suggestions}) <= 1  # only the nearest distance
+        for serial, distance in suggestions:
+            assert parse_serial(serial)[1] == []
+            # Device numbers are only repaired by drops and look-alikes, so a
+            # few candidates are reached over a longer path than the shortest
+            assert _osa(typed.upper(), serial) <= distance <= 2
+
+
+def test_partial_suggestions_are_clean_prefixes(corrector):
+    suggestions = corrector.suggest("2107T9", partial=True, limit=10)
+    assert suggestions and all(distance == 1 for _, distance in suggestions)
+    for serial, _ in suggestions:
+        assert parse_serial_partial(serial)[1] == []
+    assert ("2107T4", 1) in suggestions
+
+
+def test_nothing_within_reach(corrector):
+    assert corrector.suggest("ZZZZZZZZZZZZZZ") == []
+    assert corrector.suggest("") == []
@@ -0,0 +1,25 @@
+"""parse_serials must give exactly the rows bulk.decode_chunk gives."""
+import pytest
+
+from smiley_identifier.bulk import OUTPUT_COLUMNS, decode_chunk
+
+
+def test_vectorized_matches_parse_serial(tables, corpus):
+    pytest.importorskip("pandas")
+    from smiley_identifier.vectorized import parse_serials
+
+    frame, has_errors = parse_serials(corpus, tables)
+    rows = decode_chunk(corpus, tables)
+    assert list(frame.columns) == OUTPUT_COLUMNS
+    assert frame.values.tolist() == rows
+    assert has_errors.tolist() == [bool(row[-1]) for row in rows]
+
+
+def test_vectorized_keeps_the_input_index(tables):
+    pd = pytest.importorskip("pandas")
+    from smiley_identifier.vectorized import parse_serials
+
+    series = pd.Series(["2107T410000042", None, "2107T430000042"], index=[10, 20, 30])
+    frame, has_errors = parse_serials(series, tables)
+    assert frame.index.tolist() == [10, 20, 30]
+    assert has_errors.tolist() == [False, True, True]